@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('ui', 'ui'), ('utils', 'utils'), ('receivers', 'receivers')],
+    datas=[('ui', 'ui'), ('utils', 'utils'), ('receivers', 'receivers'), ('mecast_daemon', 'mecast_daemon')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,70 @@
+"""
+Host cost of the scrcpy session presets, measured on a real device.
+
+Runs one session per preset for a fixed time, records the scrcpy process's
+CPU usage and peak RSS into preset_costs.json (the numbers MainWindow shows
+next to each preset) and prints a table. Needs Linux (/proc) and a connected
+device; the display must be available unless --record-only is given.
+
+    python benchmarks/bench_presets.py --serial R58M12
+    python benchmarks/bench_presets.py --serial R58M12 --seconds 60 --preset light --preset view_only
+    python benchmarks/bench_presets.py --serial R58M12 --record-only
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+READY_TIMEOUT = 20.0
+
+
+def measure(serial, preset, seconds, record_only):
+    from receivers.scrcpy_wrapper import ScrcpyWrapper
+    wrapper = ScrcpyWrapper()
+    success, message = wrapper.start_mirroring(serial, preset=preset, record_only=record_only)
+    if not success or not wrapper.wait_until_ready(READY_TIMEOUT):
+        wrapper.stop_mirroring(wait=True)
+        print(f"{preset}: başlatılamadı ({message if not success else wrapper.state})")
+        return False
+    time.sleep(seconds)
+    wrapper.stop_mirroring(wait=True)
+    return True
+
+
+def main():
+    sys.path.insert(0, ROOT)
+    from receivers.preset_costs import preset_costs, cost_key, MIN_MEASURE_SECONDS
+    from receivers.scrcpy_wrapper import SCRCPY_PRESETS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--serial", required=True)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--preset", action="append", choices=sorted(SCRCPY_PRESETS),
+                        help="measure only these presets (repeatable)")
+    parser.add_argument("--record-only", action="store_true",
+                        help="measure without on-screen playback (records to MECAST_RECORD_DIR)")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/stat"):
+        print("CPU/RSS ölçümü /proc gerektirir (Linux).")
+        return 1
+    seconds = max(args.seconds, MIN_MEASURE_SECONDS + 1)
+    presets = args.preset or list(SCRCPY_PRESETS)
+    for preset in presets:
+        print(f"{preset}: {seconds:.0f} sn ölçülüyor...", flush=True)
+        measure(args.serial, preset, seconds, args.record_only)
+
+    print(f"{'preset':<12}{'CPU %':>8}{'RSS MB':>9}{'sessions':>10}")
+    for preset in presets:
+        cost = preset_costs.get(cost_key(preset, args.record_only))
+        if cost:
+            print(f"{preset:<12}{cost['cpu_percent']:>8.1f}{cost['rss_mb']:>9.0f}{cost['sessions']:>10}")
+        else:
+            print(f"{preset:<12}{'-':>8}{'-':>9}{0:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Headless session start-latency benchmark for MeCast.
+
+Runs the real MainWindow / IosReceiver / QrManager code against fake
+`adb`, `scrcpy` and `uxplay` executables (benchmarks/stubs) on the Qt
+offscreen platform, reports p50/p95 latency per stage and fails when a
+stage's p95 regresses past the stored baseline.
+
+    python benchmarks/bench_startup.py                 # run and compare
+    python benchmarks/bench_startup.py --update-baseline
+    python benchmarks/bench_startup.py --stage android_start --iterations 20
+    python benchmarks/bench_startup.py --stub-delay scrcpy=0.5 --stub-fail uxplay=exit
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_DIR = os.path.join(ROOT, "benchmarks", "stubs")
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+# Default behaviour of the fake tools (seconds before they report ready)
+DEFAULT_STUB_DELAYS = {"adb": 0.02, "scrcpy": 0.2, "uxplay": 0.2}
+# Fake executable name -> stub script
+STUBS = {"adb": "adb.py", "scrcpy": "scrcpy.py", "uxplay": "uxplay.py"}
+
+BENCH_SERIAL = "bench-device"
+STAGE_TIMEOUT = 20.0
+
+
+def prepare_environment(args):
+    """Isolated PATH with only the stubs, offscreen Qt, throwaway config dir."""
+    bin_dir = tempfile.mkdtemp(prefix="mecast-bench-bin-")
+    for name, script in STUBS.items():
+        path = os.path.join(bin_dir, name)
+        with open(path, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(STUB_DIR, script)}" "$@"\n')
+        os.chmod(path, 0o755)
+
+    os.environ["PATH"] = bin_dir
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    os.environ["XDG_CONFIG_HOME"] = tempfile.mkdtemp(prefix="mecast-bench-config-")
+    for tool, delay in DEFAULT_STUB_DELAYS.items():
+        os.environ[f"MECAST_STUB_{tool.upper()}_DELAY"] = str(delay)
+    for spec in args.stub_delay:
+        tool, value = spec.split("=", 1)
+        os.environ[f"MECAST_STUB_{tool.upper()}_DELAY"] = value
+    for spec in args.stub_fail:
+        tool, mode = spec.split("=", 1)
+        os.environ[f"MECAST_STUB_{tool.upper()}_FAIL"] = mode
+    sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def wait_until(app, predicate, timeout=STAGE_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError("stage did not finish in time")
+        app.processEvents()
+        time.sleep(0.001)
+
+
+# ============== Stages ==============
+
+def bench_android_start(app, iterations):
+    """Button press (MainWindow.start_mirroring) -> scrcpy reports ready."""
+    from ui.main_window import MainWindow
+
+    window = MainWindow()
+    window.update_device_list([{"serial": BENCH_SERIAL, "status": "device", "model": "Bench_Phone"}])
+    window.device_list.setCurrentIndex(window.device_model.index(0))
+    events = []
+    window.sessions.add_listener(lambda serial, event, message: events.append(event))
+
+    samples = []
+    for _ in range(iterations):
+        events.clear()
+        # Kademeli başlatma aralığının ölçüme karışmaması için bekle
+        time.sleep(window.sessions.launch_interval)
+        started_at = time.perf_counter()
+        window.start_mirroring()
+        wait_until(app, lambda: "started" in events or "failed" in events)
+        elapsed = time.perf_counter() - started_at
+        if "failed" in events:
+            raise RuntimeError("scrcpy session failed to start")
+        samples.append(elapsed)
+        window.sessions.stop_all()
+        wait_until(app, lambda: window.sessions.session_count() == 0)
+    window.close()
+    return samples
+
+
+def bench_android_fail(app, iterations):
+    """Failing scrcpy -> MainWindow learns about the failure."""
+    os.environ["MECAST_STUB_SCRCPY_FAIL"] = "exit"
+    from receivers.session_manager import MirrorSessionManager
+
+    manager = MirrorSessionManager(launch_interval=0)
+    events = []
+    manager.add_listener(lambda serial, event, message: events.append(event))
+    samples = []
+    try:
+        for _ in range(iterations):
+            events.clear()
+            started_at = time.perf_counter()
+            manager.start(BENCH_SERIAL)
+            wait_until(app, lambda: "failed" in events or "started" in events)
+            samples.append(time.perf_counter() - started_at)
+    finally:
+        os.environ.pop("MECAST_STUB_SCRCPY_FAIL", None)
+        manager.stop_all()
+    return samples
+
+
+def bench_ios_start(app, iterations):
+    """IosReceiver.start() -> receiver reports its RTSP port ready."""
+    from receivers.ios_receiver import IosReceiver, port_accepts_connections
+
+    samples = []
+    for _ in range(iterations):
+        receiver = IosReceiver()
+        started_at = time.perf_counter()
+        receiver.start()
+        wait_until(app, receiver.ready_event.is_set)
+        elapsed = time.perf_counter() - started_at
+        if receiver.state != "ready":
+            raise RuntimeError("uxplay failed to become ready")
+        samples.append(elapsed)
+        receiver.stop()
+        if port_accepts_connections(receiver.port):
+            raise RuntimeError("uxplay still listening after stop()")
+    return samples
+
+
+def bench_qr_pairing(app, iterations):
+    """QrManager.wait_for_pairing with a fake phone advertising over mDNS."""
+    from zeroconf import Zeroconf, ServiceInfo
+    from utils.qr_manager import QrManager
+
+    phone = Zeroconf()
+    samples = []
+    try:
+        for i in range(iterations):
+            manager = QrManager()
+            services = [
+                ServiceInfo("_adb-tls-pairing._tcp.local.",
+                            f"{manager.service_name}._adb-tls-pairing._tcp.local.",
+                            addresses=[socket.inet_aton("127.0.0.1")], port=37100 + i,
+                            server="mecast-bench.local."),
+                ServiceInfo("_adb-tls-connect._tcp.local.",
+                            f"adb-{BENCH_SERIAL}-{i}._adb-tls-connect._tcp.local.",
+                            addresses=[socket.inet_aton("127.0.0.1")], port=37200 + i,
+                            server="mecast-bench.local."),
+            ]
+            # Telefon QR'ı okuyup servislerini yayınlamış durumda
+            for info in services:
+                phone.register_service(info)
+            started_at = time.perf_counter()
+            success, message = manager.wait_for_pairing()
+            elapsed = time.perf_counter() - started_at
+            for info in services:
+                phone.unregister_service(info)
+            if not success:
+                raise RuntimeError(f"pairing failed: {message}")
+            samples.append(elapsed)
+    finally:
+        phone.close()
+    return samples
+
+
+def bench_cold_start(app, iterations):
+    """Fresh `main.py --startup-check` process -> DeviceSelectionDialog shown."""
+    samples = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        result = subprocess.run([sys.executable, os.path.join(ROOT, "main.py"), "--startup-check"],
+                                capture_output=True, text=True)
+        elapsed = time.perf_counter() - started_at
+        if result.returncode != 0:
+            raise RuntimeError(f"startup budget exceeded:\n{result.stdout}")
+        samples.append(elapsed)
+    return samples
+
+
+STAGES = {
+    "cold_start": bench_cold_start,
+    "android_start": bench_android_start,
+    "android_fail": bench_android_fail,
+    "ios_start": bench_ios_start,
+    "qr_pairing": bench_qr_pairing,
+}
+
+
+# ============== Reporting ==============
+
+def summarize(samples):
+    return {
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "mean": statistics.mean(samples),
+        "n": len(samples),
+    }
+
+
+def compare(results, baseline, tolerance, slack):
+    """Return the stages whose p95 exceeds baseline * (1 + tolerance) + slack."""
+    regressions = []
+    for stage, summary in results.items():
+        reference = baseline.get(stage)
+        if not reference:
+            continue
+        limit = reference["p95"] * (1 + tolerance) + slack
+        if summary["p95"] > limit:
+            regressions.append((stage, summary["p95"], limit))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MeCast session start-latency benchmark")
+    parser.add_argument("--stage", action="append", choices=sorted(STAGES),
+                        help="stage to run (repeatable, default: all)")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--stub-delay", action="append", default=[], metavar="TOOL=SECONDS")
+    parser.add_argument("--stub-fail", action="append", default=[], metavar="TOOL=exit|hang")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative p95 regression (default 25%%)")
+    parser.add_argument("--slack", type=float, default=0.05,
+                        help="allowed absolute p95 regression in seconds")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    prepare_environment(args)
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+
+    results = {}
+    for stage in args.stage or list(STAGES):
+        samples = STAGES[stage](app, args.iterations)
+        results[stage] = summarize(samples)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'stage':<16}{'p50 (ms)':>10}{'p95 (ms)':>10}{'mean (ms)':>11}{'n':>5}")
+        for stage, s in results.items():
+            print(f"{stage:<16}{s['p50'] * 1000:>10.1f}{s['p95'] * 1000:>10.1f}"
+                  f"{s['mean'] * 1000:>11.1f}{s['n']:>5}")
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.slack)
+    for stage, p95, limit in regressions:
+        print(f"REGRESSION {stage}: p95 {p95 * 1000:.1f} ms > limit {limit * 1000:.1f} ms")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
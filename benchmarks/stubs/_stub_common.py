@@ -0,0 +1,37 @@
+"""
+Shared behaviour of the fake tools used by the benchmark suite.
+Each stub reads MECAST_STUB_<TOOL>_DELAY (seconds before it reports
+anything) and MECAST_STUB_<TOOL>_FAIL ("exit": print an error and exit 1,
+"hang": never become ready).
+"""
+
+import os
+import sys
+import time
+
+
+def config(tool):
+    prefix = f"MECAST_STUB_{tool.upper()}_"
+    delay = float(os.environ.get(prefix + "DELAY", "0"))
+    fail = os.environ.get(prefix + "FAIL", "")
+    return delay, fail
+
+
+def startup(tool):
+    """Sleep the configured delay and apply the failure mode. Returns normally when healthy."""
+    delay, fail = config(tool)
+    time.sleep(delay)
+    if fail == "exit":
+        print(f"ERROR: {tool} stub failure", file=sys.stderr, flush=True)
+        sys.exit(1)
+    if fail == "hang":
+        while True:
+            time.sleep(3600)
+
+
+def serve_forever():
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,51 @@
+"""Fake `adb` for the benchmark suite."""
+
+import sys
+from _stub_common import startup
+
+FINGERPRINT = "mecast/bench/bench:14/BENCH.1/1:user/release-keys"
+# Fake device answers for `adb shell <command>`
+SHELL_OUTPUT = {
+    "wm size": "Physical size: 1080x2400",
+    "wm density": "Physical density: 420",
+    "getprop ro.build.version.release": "14",
+    "getprop ro.build.version.sdk": "34",
+    "getprop ro.build.fingerprint": FINGERPRINT,
+}
+
+
+def shell(command):
+    # Batched commands are "echo marker; cmd; echo marker; cmd ..."
+    for part in command.split(";"):
+        part = part.strip()
+        if part.startswith("echo "):
+            print(part[5:])
+        elif part in SHELL_OUTPUT:
+            print(SHELL_OUTPUT[part])
+
+
+def main(args):
+    if args[:1] == ["--version"]:
+        print("Android Debug Bridge version 1.0.41 (MeCast benchmark stub)")
+        return 0
+    if args[:1] == ["start-server"]:
+        return 0
+    if args[:1] == ["-s"]:
+        args = args[2:]
+
+    startup("adb")
+    command = args[0] if args else ""
+    if command == "devices":
+        print("List of devices attached")
+        print("bench-device          device product:bench model:Bench_Phone device:bench transport_id:1")
+    elif command == "pair":
+        print(f"Successfully paired to {args[1]} [guid=adb-bench-device]")
+    elif command == "connect":
+        print(f"connected to {args[1]}")
+    elif command == "shell":
+        shell(" ".join(args[1:]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
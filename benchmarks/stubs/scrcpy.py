@@ -0,0 +1,24 @@
+"""Fake `scrcpy` for the benchmark suite."""
+
+import sys
+from _stub_common import serve_forever, startup
+
+
+def main(args):
+    if "--version" in args:
+        print("scrcpy 2.4 (MeCast benchmark stub)")
+        return 0
+    if "--list-encoders" in args:
+        print("[server] INFO: List of video encoders:")
+        print("    --video-codec=h264 --video-encoder=c2.bench.avc.encoder     (hw) [vendor]")
+        return 0
+
+    startup("scrcpy")
+    print("INFO: Device: [MeCast] Bench Phone (Android 14)", file=sys.stderr, flush=True)
+    print("INFO: Renderer: opengl", file=sys.stderr, flush=True)
+    serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,25 @@
+"""Fake `uxplay` for the benchmark suite: listens on its -p port once ready."""
+
+import socket
+import sys
+from _stub_common import serve_forever, startup
+
+
+def main(args):
+    if "-h" in args or "-v" in args:
+        print("UxPlay 1.68: (MeCast benchmark stub)")
+        return 0
+
+    port = int(args[args.index("-p") + 1]) if "-p" in args else 7000
+    startup("uxplay")
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("0.0.0.0", port))
+    server.listen(16)
+    print(f"Initialized server socket(s) on port {port}", flush=True)
+    serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,8 +1,20 @@
 import sys
-from PyQt6.QtWidgets import QApplication
-from ui.main_window import MainWindow
+import time
+
+_START = time.perf_counter()
 
 def main():
+    if "--profile-imports" in sys.argv:
+        from utils.startup_profile import profile_imports
+        sys.exit(profile_imports(__file__))
+
+    if "--daemon" in sys.argv:
+        # Arayüzsüz mod: Qt hiç yüklenmez, kontrol Unix soketi üzerinden JSON-RPC ile
+        from mecast_daemon.server import run_daemon
+        sys.exit(run_daemon(sys.argv))
+
+    # Heavy modules (main window, zeroconf, qrcode) are imported only when needed
+    from PyQt6.QtWidgets import QApplication
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
     
@@ -10,40 +22,52 @@ def main():
     from ui.device_selection import DeviceSelectionDialog
     selection_dialog = DeviceSelectionDialog()
     
+    if "--startup-check" in sys.argv:
+        from utils.startup_profile import check_startup_budget
+        sys.exit(check_startup_budget(app, selection_dialog, _START))
+    
     if selection_dialog.exec():
         mode = selection_dialog.selected_mode
         
         if mode == 'android':
+            from ui.main_window import MainWindow
+            from utils.zeroconf_service import zeroconf_service
+            # mDNS servisi uygulamanın ömrü boyunca yaşar
+            app.aboutToQuit.connect(zeroconf_service.shutdown)
             window = MainWindow()
             window.show()
             sys.exit(app.exec())
             
         elif mode == 'ios':
             from ui.ios_setup_dialog import IosSetupDialog
-            from receivers.ios_receiver import IosReceiver
             from PyQt6.QtWidgets import QMessageBox
             
             # Show setup dialog first
             setup_dialog = IosSetupDialog()
             
             if setup_dialog.exec():
-                receiver = IosReceiver()
+                from receivers.ios_receiver_pool import IosReceiverPool
+                from ui.ios_session_dialog import IosSessionDialog
+                
+                # Her alıcı kendi adı ve port bloğuyla çalışır, çökerse yeniden başlatılır
+                pool = IosReceiverPool()
+                pool.stop_stale()
+                session_dialog = IosSessionDialog(pool, setup_dialog.selected_profile)
                 try:
-                    receiver.start()
-                    
-                    # Show a simple dialog while mirroring is active
-                    msg = QMessageBox()
-                    msg.setWindowTitle("MeCast - iOS Mirroring")
-                    msg.setText("iOS Mirroring Başlatıldı.\n\nLütfen iOS cihazınızdan Ekran Yansıtma menüsünü açın ve 'MeCast'i seçin.\n\nDurdurmak için bu pencereyi kapatın veya Tamam'a basın.")
-                    msg.setIcon(QMessageBox.Icon.Information)
-                    msg.exec()
-                    
-                    receiver.stop()
-                    
+                    for _ in range(setup_dialog.selected_count):
+                        pool.add(setup_dialog.selected_profile)
                 except FileNotFoundError as e:
+                    pool.stop_all()
                     QMessageBox.critical(None, "Hata", str(e))
+                    sys.exit(1)
                 except Exception as e:
+                    pool.stop_all()
                     QMessageBox.critical(None, "Hata", f"Bir hata oluştu: {str(e)}")
+                    sys.exit(1)
+                
+                # Modal olmayan oturum penceresi; kapatılınca alıcı durur
+                session_dialog.show()
+                sys.exit(app.exec())
                 
     else:
         sys.exit(0)
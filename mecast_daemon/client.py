@@ -0,0 +1,91 @@
+"""
+Minimal client for the MeCast daemon's JSON-RPC socket.
+
+    python -m mecast_daemon.client devices.list
+    python -m mecast_daemon.client session.start serial=R58M12 bitrate=8M max_size:=1024
+    python -m mecast_daemon.client ios.start profile=low_latency count:=2
+    python -m mecast_daemon.client telemetry.prometheus
+    python -m mecast_daemon.client subscribe          # print events until Ctrl+C
+"""
+
+import itertools
+import json
+import socket
+import sys
+from mecast_daemon.server import default_socket_path
+
+
+class RpcCallError(Exception):
+    def __init__(self, error):
+        super().__init__(f"{error.get('code')}: {error.get('message')}")
+        self.code = error.get("code")
+
+
+class DaemonClient:
+    def __init__(self, socket_path=None, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path or default_socket_path())
+        self.file = self.sock.makefile("r", encoding="utf-8")
+        self._ids = itertools.count(1)
+        self.events = []  # Yanıt beklerken gelen bildirimler
+
+    def call(self, method, **params):
+        request_id = next(self._ids)
+        self.sock.sendall((json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method,
+                                       "params": params}) + "\n").encode())
+        while True:
+            message = self.read_message()
+            if message.get("id") == request_id:
+                if "error" in message:
+                    raise RpcCallError(message["error"])
+                return message["result"]
+            self.events.append(message)
+
+    def read_message(self):
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Daemon closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def parse_params(args):
+    """key=value gives a string, key:=value a JSON value (number, bool, null, ...)."""
+    params = {}
+    for arg in args:
+        key, _, value = arg.partition("=")
+        if key.endswith(":"):
+            params[key[:-1]] = json.loads(value)
+        else:
+            params[key] = value
+    return params
+
+
+def main(argv):
+    if not argv:
+        print(__doc__)
+        return 2
+    method = argv[0]
+    client = DaemonClient()
+    try:
+        result = client.call(method, **parse_params(argv[1:]))
+        print(result if isinstance(result, str) else json.dumps(result, indent=2, ensure_ascii=False))
+        if method == "subscribe":
+            while True:
+                print(json.dumps(client.read_message()["params"], ensure_ascii=False), flush=True)
+    except RpcCallError as e:
+        print(f"Hata {e}")
+        return 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,373 @@
+"""
+Headless MeCast daemon.
+Hosts the ADB, scrcpy and uxplay session logic without any Qt widgets and
+takes JSON-RPC 2.0 commands over a Unix socket, one JSON object per line.
+Every client gets its own connection handler on a single asyncio loop, so
+many clients can be connected at once; blocking work (adb, pairing) runs on
+the default executor. Device changes are pushed by the ADB server
+(host:track-devices-l), so an idle daemon does not wake up at all.
+
+    python main.py --daemon [--socket PATH]
+
+Methods: ping, devices.list, session.start, session.stop, session.list,
+session.presets, ios.start, ios.stop, ios.list, pair.begin, pair.wait, stats,
+telemetry, telemetry.prometheus, subscribe.
+Subscribed clients receive {"jsonrpc": "2.0", "method": "event", "params": {...}}
+notifications for device, session, iOS and pairing events.
+"""
+
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import signal
+import socket
+import statistics
+import sys
+import time
+from receivers.ios_receiver import UXPLAY_PROFILES, DEFAULT_PROFILE
+from receivers.ios_receiver_pool import IosReceiverPool
+from receivers.preset_costs import preset_costs, cost_key
+from receivers.scrcpy_wrapper import SCRCPY_PRESETS, DEFAULT_PRESET as DEFAULT_SCRCPY_PRESET
+from receivers.session_manager import MirrorSessionManager
+from utils.adb_client import DeviceTracker
+from utils.adb_manager import AdbManager
+from utils.telemetry import telemetry
+from utils.tracing import tracer
+from utils.system_utils import get_config_dir
+
+JSONRPC_VERSION = "2.0"
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+MAX_REQUEST_BYTES = 1 << 20
+PAIR_TIMEOUT = 60
+# Sonucu pair.wait ile alınmayan eşleştirmeler bu kadar sonra unutulur
+PAIR_RESULT_TTL = 60
+# Her eşleştirme bitene kadar bir executor iş parçacığı tutar
+MAX_PAIRINGS = 4
+# Bu kadar yazılmamış veri biriktiren abone bağlantısı kesilir
+MAX_SUBSCRIBER_BUFFER = 1 << 20
+
+# session.start seçenekleri, ScrcpyWrapper.start_mirroring'e aynen iletilir
+SESSION_OPTIONS = {"bitrate", "max_size", "stay_awake", "new_display", "turn_screen_off",
+                   "fullscreen", "print_fps", "video_codec", "video_encoder",
+                   "preset", "record", "record_only", "segment_seconds"}
+
+
+def default_socket_path():
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    return os.path.join(runtime_dir or get_config_dir(), "mecast.sock")
+
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class MeCastDaemon:
+    def __init__(self, socket_path=None, sessions=None, ios_pool=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.sessions = sessions or MirrorSessionManager()
+        self.ios_pool = ios_pool or IosReceiverPool()
+        self.devices = None  # ADB sunucusunun son bildirdiği liste
+        self.tracker = DeviceTracker(self._on_devices, error_callback=lambda msg: self._emit("adb_error", message=msg))
+        self.pairings = {}  # id -> {"manager", "future"}
+        self._pair_ids = itertools.count(1)
+        self.clients = set()
+        self.subscribers = set()
+        self.started_at = time.monotonic()
+        self.loop = None
+        self.server = None
+        self.methods = {
+            "ping": self.ping,
+            "devices.list": self.devices_list,
+            "session.start": self.session_start,
+            "session.stop": self.session_stop,
+            "session.list": self.session_list,
+            "session.presets": self.session_presets,
+            "ios.start": self.ios_start,
+            "ios.stop": self.ios_stop,
+            "ios.list": self.ios_list,
+            "pair.begin": self.pair_begin,
+            "pair.wait": self.pair_wait,
+            "stats": self.stats,
+            "telemetry": self.telemetry_history,
+            "telemetry.prometheus": self.telemetry_prometheus,
+            "subscribe": self.subscribe,
+        }
+        self.sessions.add_listener(
+            lambda serial, event, message: self._emit("session", serial=serial, event=event, message=message))
+        self.ios_pool.add_listener(
+            lambda name, event, message: self._emit("ios", name=name, event=event, message=message))
+
+    # ============== Events ==============
+
+    def _on_devices(self, devices):
+        self.devices = devices
+        self._emit("devices", devices=devices)
+
+    def _emit(self, kind, **params):
+        """Thread-safe: queue a notification for all subscribed clients."""
+        if self.loop is None or not self.subscribers:
+            return
+        line = json.dumps({"jsonrpc": JSONRPC_VERSION, "method": "event",
+                           "params": dict(params, type=kind)}) + "\n"
+        self.loop.call_soon_threadsafe(self._broadcast, line.encode())
+
+    def _broadcast(self, data):
+        for writer in list(self.subscribers):
+            if writer.is_closing():
+                self.subscribers.discard(writer)
+            elif writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                # Okumayan abone daemon belleğini şişirmesin
+                self.subscribers.discard(writer)
+                writer.close()
+            else:
+                writer.write(data)
+
+    # ============== Methods ==============
+
+    async def ping(self, writer):
+        return "pong"
+
+    async def devices_list(self, writer):
+        if self.devices is None:
+            self.devices = await self.loop.run_in_executor(None, AdbManager.get_devices)
+        return self.devices
+
+    async def session_start(self, writer, serial, **options):
+        unknown = set(options) - SESSION_OPTIONS
+        if unknown:
+            raise RpcError(INVALID_PARAMS, f"Unknown session options: {', '.join(sorted(unknown))}")
+        if options.get("preset", DEFAULT_SCRCPY_PRESET) not in SCRCPY_PRESETS:
+            raise RpcError(INVALID_PARAMS, f"Unknown preset: {options['preset']}")
+        queued, message = self.sessions.start(serial, **options)
+        return {"queued": queued, "message": message}
+
+    async def session_stop(self, writer, serial=None):
+        if serial is None:
+            await self.loop.run_in_executor(None, self.sessions.stop_all)
+        else:
+            await self.loop.run_in_executor(None, self.sessions.stop, serial)
+        return True
+
+    async def session_list(self, writer):
+        sessions = []
+        for serial, wrapper in list(self.sessions.sessions.items()):
+            sessions.append({"serial": serial, "state": wrapper.state, "preset": wrapper.preset,
+                             "startup_latency": wrapper.startup_latency})
+        for serial in self.sessions.pending_serials():
+            sessions.append({"serial": serial, "state": "queued", "preset": None, "startup_latency": None})
+        return sessions
+
+    async def session_presets(self, writer):
+        """Presets with their measured host cost (None until measured)."""
+        return {name: {"label": preset["label"], "description": preset["description"],
+                       "args": preset["args"], "cost": preset_costs.get(cost_key(name)),
+                       "cost_record_only": preset_costs.get(cost_key(name, record_only=True))}
+                for name, preset in SCRCPY_PRESETS.items()}
+
+    async def ios_start(self, writer, profile=DEFAULT_PROFILE, count=1):
+        if profile not in UXPLAY_PROFILES:
+            raise RpcError(INVALID_PARAMS, f"Unknown profile: {profile}")
+        names = []
+        for _ in range(count):
+            supervisor = await self.loop.run_in_executor(None, self.ios_pool.add, profile)
+            names.append(supervisor.receiver.name)
+        return names
+
+    async def ios_stop(self, writer, name=None):
+        if name is None:
+            await self.loop.run_in_executor(None, self.ios_pool.stop_all)
+        else:
+            await self.loop.run_in_executor(None, self.ios_pool.remove, name)
+        return True
+
+    async def ios_list(self, writer):
+        return [{"name": name, "port": s.receiver.port, "profile": s.receiver.profile,
+                 "state": s.state, "metrics": s.metrics}
+                for name, s in self.ios_pool.supervisors().items()]
+
+    async def pair_begin(self, writer, timeout=PAIR_TIMEOUT):
+        """Start QR pairing; the client renders qr_content and calls pair.wait."""
+        if sum(1 for p in self.pairings.values() if not p["future"].done()) >= MAX_PAIRINGS:
+            raise RpcError(INVALID_REQUEST, f"At most {MAX_PAIRINGS} pairings can run at once")
+        from utils.qr_manager import QrManager
+        manager = QrManager(render_image=False)
+        pair_id = next(self._pair_ids)
+
+        def run():
+            success, message = manager.wait_for_pairing(timeout=timeout)
+            self._emit("pair", id=pair_id, success=success, message=message)
+            return {"success": success, "message": message}
+
+        future = self.loop.run_in_executor(None, run)
+        future.add_done_callback(lambda _: self.loop.call_later(PAIR_RESULT_TTL, self.pairings.pop, pair_id, None))
+        self.pairings[pair_id] = {"manager": manager, "future": future}
+        return {"id": pair_id, "qr_content": manager.qr_content, "service_name": manager.service_name}
+
+    async def pair_wait(self, writer, id):
+        pairing = self.pairings.get(id)
+        if pairing is None:
+            raise RpcError(INVALID_PARAMS, f"Unknown or expired pairing id: {id}")
+        result = await asyncio.shield(pairing["future"])
+        self.pairings.pop(id, None)
+        return result
+
+    async def stats(self, writer):
+        latencies = [h["latency"] for h in self.sessions.launch_history if h["success"]]
+        times = os.times()
+        return {
+            "uptime": time.monotonic() - self.started_at,
+            "cpu_seconds": times.user + times.system,
+            "clients": len(self.clients),
+            "subscribers": len(self.subscribers),
+            "devices": len(self.devices or []),
+            "sessions": {
+                "active": len(self.sessions.active_serials()),
+                "total": self.sessions.session_count(),
+                "launches": len(self.sessions.launch_history),
+                "failures": sum(1 for h in self.sessions.launch_history if not h["success"]),
+                "startup_p50": statistics.median(latencies) if latencies else None,
+            },
+            "ios": {name: dict(s.metrics, state=s.state) for name, s in self.ios_pool.supervisors().items()},
+            "processes": telemetry.latest(),
+            "spans": tracer.histograms(),
+        }
+
+    async def telemetry_history(self, writer, name=None):
+        """Ring buffer of per-process samples (one process or all)."""
+        return telemetry.history(name)
+
+    async def telemetry_prometheus(self, writer):
+        return telemetry.to_prometheus()
+
+    async def subscribe(self, writer):
+        self.subscribers.add(writer)
+        return True
+
+    # ============== Transport ==============
+
+    async def _dispatch(self, request, writer):
+        """Handle one decoded request; returns the response dict or None for notifications."""
+        request_id = request.get("id") if isinstance(request, dict) else None
+        is_notification = isinstance(request, dict) and "id" not in request
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                raise RpcError(INVALID_REQUEST, "Invalid request")
+            method = self.methods.get(request["method"])
+            if method is None:
+                raise RpcError(METHOD_NOT_FOUND, f"Method not found: {request['method']}")
+            params = request.get("params") or {}
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "params must be an object")
+            try:
+                inspect.signature(method).bind(writer, **params)
+            except TypeError as e:
+                raise RpcError(INVALID_PARAMS, str(e))
+            result = await method(writer, **params)
+            response = {"jsonrpc": JSONRPC_VERSION, "id": request_id, "result": result}
+        except RpcError as e:
+            response = {"jsonrpc": JSONRPC_VERSION, "id": request_id,
+                        "error": {"code": e.code, "message": e.message}}
+        except Exception as e:
+            response = {"jsonrpc": JSONRPC_VERSION, "id": request_id,
+                        "error": {"code": INTERNAL_ERROR, "message": str(e)}}
+        return None if is_notification else response
+
+    async def _handle_client(self, reader, writer):
+        self.clients.add(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    break  # Satır sınırı aşıldı
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {"jsonrpc": JSONRPC_VERSION, "id": None,
+                                "error": {"code": PARSE_ERROR, "message": "Parse error"}}
+                else:
+                    response = await self._dispatch(request, writer)
+                if response is not None:
+                    writer.write((json.dumps(response) + "\n").encode())
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            self.subscribers.discard(writer)
+            writer.close()
+
+    def _claim_socket_path(self):
+        """Remove a stale socket file; refuse to start if another daemon answers on it."""
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.remove(self.socket_path)
+        else:
+            raise RuntimeError(f"Another MeCast daemon is listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self._claim_socket_path()
+        self.server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path,
+                                                      limit=MAX_REQUEST_BYTES)
+        os.chmod(self.socket_path, 0o600)
+        self.tracker.start()
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            self.loop.add_signal_handler(signum, stop.set)
+        print(f"MeCast daemon dinliyor: {self.socket_path}", flush=True)
+        try:
+            await stop.wait()
+        finally:
+            await self.shutdown()
+
+    async def shutdown(self):
+        self.server.close()
+        for writer in list(self.clients):
+            writer.close()
+        await self.server.wait_closed()
+        self.tracker.stop()
+        # Çıkmadan önce kayıtların son segmentleri yazılır
+        await self.loop.run_in_executor(None, lambda: self.sessions.stop_all(wait=True))
+        await self.loop.run_in_executor(None, self.ios_pool.stop_all)
+        for pairing in self.pairings.values():
+            pairing["manager"].close()
+        if "utils.zeroconf_service" in sys.modules:
+            sys.modules["utils.zeroconf_service"].zeroconf_service.shutdown()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def run_daemon(argv):
+    """Entry point for `main.py --daemon [--socket PATH]`; returns an exit code."""
+    if not hasattr(socket, "AF_UNIX"):
+        print("Daemon modu Unix soketi gerektirir (bu platformda yok).")
+        return 1
+    socket_path = argv[argv.index("--socket") + 1] if "--socket" in argv[:-1] else None
+    daemon = MeCastDaemon(socket_path)
+    try:
+        asyncio.run(daemon.serve())
+    except RuntimeError as e:
+        print(e)
+        return 1
+    return 0
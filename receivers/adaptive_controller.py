@@ -0,0 +1,164 @@
+"""
+Adaptive bitrate/resolution controller for MeCast.
+Watches the FPS that scrcpy reports (--print-fps) for wireless sessions and
+restarts a session one step down the quality ladder when frames keep being
+dropped, or one step up once the link has recovered. scrcpy only produces
+frames when the screen changes, so a low frame rate alone is not a sign of
+trouble: a window counts as degraded only when a noticeable share of its
+frames was skipped, and windows of a (nearly) static screen are ignored.
+Separate consecutive-window counts and a cooldown after every change provide
+hysteresis; a level that had to be left right after stepping up to
+it needs twice as long a good streak before it is tried again, so sessions
+do not flap between two neighbouring levels.
+"""
+
+import threading
+import time
+from utils.tracing import tracer
+
+# (video bit rate, max size) from best to cheapest
+QUALITY_LADDER = [
+    ("16M", 1920),
+    ("8M", 1600),
+    ("4M", 1280),
+    ("2M", 1024),
+    ("1M", 720),
+]
+
+
+def is_wireless(serial):
+    """Wi-Fi devices show up as ip:port or as an mDNS service name."""
+    return ":" in serial or serial.startswith("adb-")
+
+
+class _AdaptiveState:
+    def __init__(self, options, level):
+        self.options = options
+        self.level = level
+        self.low_count = 0
+        self.high_count = 0
+        self.last_change = time.monotonic()
+        self.last_step_up = False
+        self.restarting = False
+        self.failed_up = {}  # level -> failed step-up attempts
+
+
+class AdaptiveBitrateController:
+    def __init__(self, manager, drop_ratio=0.1, static_fps=5,
+                 down_after=3, up_after=10, cooldown=15.0, ladder=QUALITY_LADDER):
+        self.manager = manager
+        self.drop_ratio = drop_ratio
+        self.static_fps = static_fps
+        self.down_after = down_after
+        self.up_after = up_after
+        self.cooldown = cooldown
+        self.ladder = ladder
+        self._states = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        manager.add_listener(self._on_session_event)
+        manager.add_log_listener(self._on_log_event)
+
+    def add_listener(self, callback):
+        """callback(serial, bitrate, max_size) after every quality change."""
+        self._listeners.append(callback)
+
+    def session_options(self, serial, options, level=1):
+        """
+        Return scrcpy options for an adaptive session and start tracking it.
+        Non-wireless devices are not adapted and get the options unchanged.
+        """
+        if not is_wireless(serial):
+            return options
+        level = max(0, min(level, len(self.ladder) - 1))
+        options = dict(options, print_fps=True)
+        with self._lock:
+            self._states[serial] = _AdaptiveState(options, level)
+        return self._apply_level(options, level)
+
+    def untrack(self, serial):
+        with self._lock:
+            self._states.pop(serial, None)
+
+    def level(self, serial):
+        with self._lock:
+            state = self._states.get(serial)
+            return state.level if state else None
+
+    def _apply_level(self, options, level):
+        bitrate, max_size = self.ladder[level]
+        return dict(options, bitrate=bitrate, max_size=max_size)
+
+    def _on_session_event(self, serial, event, message):
+        if event in ("stopped", "failed"):
+            with self._lock:
+                state = self._states.get(serial)
+                # Kendi yeniden başlatmamızın "stopped" olayı takibi bitirmez
+                if state and (event == "failed" or not state.restarting):
+                    del self._states[serial]
+        elif event == "started":
+            with self._lock:
+                state = self._states.get(serial)
+                if state:
+                    state.restarting = False
+                    state.last_change = time.monotonic()
+
+    def _on_log_event(self, serial, event):
+        if event["type"] != "fps":
+            return
+        new_level = None
+        with self._lock:
+            state = self._states.get(serial)
+            if not state or state.restarting:
+                return
+            if time.monotonic() - state.last_change < self.cooldown:
+                return
+
+            fps = event["fps"]
+            skipped = event.get("skipped", 0)
+            if skipped and skipped >= (fps + skipped) * self.drop_ratio:
+                state.low_count += 1
+                state.high_count = 0
+            elif fps < self.static_fps:
+                # Ekran neredeyse duruyor: bu pencere bağlantı hakkında bilgi vermez
+                return
+            elif not skipped:
+                state.high_count += 1
+                state.low_count = 0
+            else:
+                # Ölü bölge: az sayıda atlanan kare, sayaçları sıfırla, seviyeyi koru
+                state.low_count = state.high_count = 0
+
+            if state.low_count >= self.down_after and state.level < len(self.ladder) - 1:
+                new_level = state.level + 1
+                if state.last_step_up:
+                    state.failed_up[state.level] = state.failed_up.get(state.level, 0) + 1
+                state.last_step_up = False
+            elif state.level > 0:
+                required = self.up_after * 2 ** state.failed_up.get(state.level - 1, 0)
+                if state.high_count >= required:
+                    new_level = state.level - 1
+                    state.last_step_up = True
+
+            if new_level is None:
+                return
+            state.level = new_level
+            state.low_count = state.high_count = 0
+            state.last_change = time.monotonic()
+            state.restarting = True
+            options = self._apply_level(state.options, new_level)
+
+        tracer.event("adaptive.level", f"Uyarlanabilir kalite ({serial}): {options['bitrate']} / {options['max_size']}",
+                     serial=serial, step=new_level)
+        ok, message = self.manager.restart(serial, **options)
+        if not ok:
+            # Oturum durduruldu ama yeniden kuyruğa alınamadı: "started" olayı
+            # hiç gelmeyecek, takip burada bırakılır
+            with self._lock:
+                if self._states.get(serial) is state:
+                    del self._states[serial]
+            tracer.event("adaptive.restart.failed", f"Uyarlanabilir kalite ({serial}): {message}",
+                         level="warning", serial=serial)
+            return
+        for callback in list(self._listeners):
+            callback(serial, options['bitrate'], options['max_size'])
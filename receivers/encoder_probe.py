@@ -0,0 +1,164 @@
+"""
+Per-device video encoder probe for MeCast.
+Lists the encoders a device offers (scrcpy --list-encoders), records a short
+headless capture with each hardware encoder at the same pinned bit rate and
+remembers the one that delivered the most frames, keyed by serial and build
+fingerprint so an OS update triggers a re-probe. Frames are counted in the
+recording with ffprobe; without it no ranking is stored. scrcpy only encodes
+frames when the screen changes, so the screen should be moving (e.g. a video
+playing) while the probe runs.
+"""
+
+import os
+import re
+import subprocess
+import tempfile
+import time
+from utils.device_props import device_properties
+from utils.json_cache import JsonCache
+from utils.tool_registry import tool_registry
+
+# Örnek: --video-codec=h264 --video-encoder='c2.qti.avc.encoder'  (hw) [vendor]
+ENCODER_LINE = re.compile(
+    r"--video-codec=(?P<codec>\w+)\s+--video-encoder='?(?P<encoder>[^'\s]+)'?(?P<rest>.*)")
+
+BENCHMARK_SECONDS = 5
+# Tüm kodlayıcılar aynı bit hızıyla karşılaştırılır
+BENCHMARK_BITRATE = "8M"
+
+
+def parse_encoder_list(output):
+    encoders = []
+    for line in output.splitlines():
+        match = ENCODER_LINE.search(line)
+        if match:
+            rest = match.group("rest")
+            encoders.append({
+                "codec": match.group("codec"),
+                "encoder": match.group("encoder"),
+                # Eski scrcpy sürümleri hw/sw bilgisi vermez, donanımsal kabul et
+                "hw": "(sw)" not in rest,
+            })
+    return encoders
+
+
+def list_encoders(serial):
+    try:
+        result = subprocess.run(
+            [tool_registry.command('scrcpy'), '--serial', serial, '--list-encoders'],
+            capture_output=True, text=True, timeout=30)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return []
+    return parse_encoder_list(result.stdout + result.stderr)
+
+
+def count_frames(path):
+    """Number of video packets in a recording (ffprobe), or None."""
+    try:
+        result = subprocess.run(
+            [tool_registry.command('ffprobe'), '-v', 'error', '-select_streams', 'v:0', '-count_packets',
+             '-show_entries', 'stream=nb_read_packets', '-of', 'csv=p=0', path],
+            capture_output=True, text=True, timeout=30)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    value = result.stdout.strip()
+    return int(value) if result.returncode == 0 and value.isdigit() else None
+
+
+def benchmark_encoder(serial, codec, encoder, duration=BENCHMARK_SECONDS, bitrate=BENCHMARK_BITRATE):
+    """
+    Record `duration` seconds without playback using the given encoder at a
+    fixed bit rate. Returns {'frames', 'fps', 'bytes'} or None if the encoder
+    failed or the recording could not be measured.
+    """
+    fd, path = tempfile.mkstemp(suffix=".mkv", prefix="mecast-bench-")
+    os.close(fd)
+    command = [
+        tool_registry.command('scrcpy'), '--serial', serial,
+        f'--video-codec={codec}', f'--video-encoder={encoder}', '--video-bit-rate', bitrate,
+        '--no-audio', '--no-control', '--no-playback',
+        f'--record={path}', f'--time-limit={duration}',
+    ]
+    try:
+        try:
+            result = subprocess.run(command, capture_output=True, timeout=duration + 15)
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return None
+        size = os.path.getsize(path)
+        if result.returncode != 0 or size == 0:
+            return None
+        frames = count_frames(path)
+        if frames is None:
+            return None
+        return {"frames": frames, "fps": frames / duration, "bytes": size}
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class EncoderCache(JsonCache):
+    """JSON cache of the winning encoder per (serial, build fingerprint)."""
+    FILE_NAME = "encoders.json"
+
+    def fingerprint(self, serial, refresh=False):
+        # Cihaz özellik önbelleğiyle paylaşılır, ayrıca getprop çağrılmaz
+        return device_properties.fingerprint(serial, refresh=refresh)
+
+    def lookup(self, serial):
+        """Cached {'codec', 'encoder', ...} for this device build, or None."""
+        with self._lock:
+            # Hiç test edilmemiş cihaz için adb'ye sormaya gerek yok
+            if not any(key.startswith(f"{serial}|") for key in self._load()):
+                return None
+        fingerprint = self.fingerprint(serial)
+        if not fingerprint:
+            return None
+        with self._lock:
+            return self._load().get(f"{serial}|{fingerprint}")
+
+    def store(self, serial, choice):
+        fingerprint = self.fingerprint(serial, refresh=True)
+        if not fingerprint:
+            return
+        with self._lock:
+            self._load()[f"{serial}|{fingerprint}"] = choice
+            self._save()
+
+
+encoder_cache = EncoderCache()
+
+
+def probe_device(serial, progress=None, cache=encoder_cache):
+    """
+    Benchmark every hardware encoder of the device and cache the winner.
+    progress(message) is called before each benchmark.
+    Returns the chosen {'codec', 'encoder', 'fps', 'results'} or None.
+    """
+    if not tool_registry.is_available("ffprobe"):
+        # Kare sayılamadan yapılan bir sıralama saklanmaz
+        if progress:
+            progress("ffprobe bulunamadı, kodlayıcı testi yapılamıyor.")
+        return None
+    encoders = [e for e in list_encoders(serial) if e["hw"]]
+    results = []
+    for entry in encoders:
+        if progress:
+            progress(f"{entry['codec']} / {entry['encoder']} test ediliyor...")
+        measurement = benchmark_encoder(serial, entry["codec"], entry["encoder"])
+        if measurement:
+            results.append(dict(entry, **measurement))
+
+    if not results:
+        return None
+    # Aynı bit hızı ve süre: en çok kare üreten kodlayıcı kazanır, eşitlikte küçük çıktı
+    best = max(results, key=lambda r: (r["frames"], -r["bytes"]))
+    choice = {
+        "codec": best["codec"],
+        "encoder": best["encoder"],
+        "fps": best["fps"],
+        "bitrate": BENCHMARK_BITRATE,
+        "measured_at": time.time(),
+        "results": results,
+    }
+    cache.store(serial, choice)
+    return choice
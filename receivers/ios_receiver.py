@@ -4,53 +4,120 @@ Handles iOS screen mirroring using uxplay (Linux) or uxplay-windows (Windows).
 """
 
 import subprocess
-import shutil
 import threading
 import time
 import platform
 import os
+import signal
+import socket
+from utils.log_pipeline import LogPipeline, UXPLAY_RULES
+from utils.system_utils import get_config_dir
+from utils.telemetry import telemetry
+from utils.tool_registry import tool_registry
+from utils.tracing import tracer
+
+AIRPLAY_PORT = 7000
+# uxplay -p n uses n, n+1 and n+2 (TCP and UDP)
+PORTS_PER_RECEIVER = 3
+MDNS_PORT = 5353
+RECEIVER_NAME = "MeCast"
+READY_TIMEOUT = 15
+PROBE_INTERVAL = 0.02
+EXIT_TIMEOUT = 5
+
+# Named uxplay tunings. -vsync no / -async no drop the audio-video timestamp
+# sync (lowest latency), -fps caps the frame rate the client is asked for,
+# -s sets the advertised display size and -a disables audio entirely.
+UXPLAY_PROFILES = {
+    "default": {
+        "label": "Varsayılan",
+        "description": "uxplay varsayılanları",
+        "args": [],
+    },
+    "low_latency": {
+        "label": "Düşük Gecikme",
+        "description": "Senkronizasyon kapalı, 60 FPS; görüntü olabildiğince çabuk gösterilir",
+        "args": ["-vsync", "no", "-async", "no", "-fps", "60"],
+    },
+    "low_cpu": {
+        "label": "Düşük CPU",
+        "description": "720p, 30 FPS, ses kapalı; zayıf bilgisayarlar için",
+        "args": ["-s", "1280x720@30", "-fps", "30", "-a"],
+    },
+    "quality": {
+        "label": "Kalite",
+        "description": "1080p 60 FPS, ses-görüntü senkronu açık",
+        "args": ["-s", "1920x1080@60", "-fps", "60", "-async"],
+    },
+}
+DEFAULT_PROFILE = "default"
+
+
+def process_command_line(pid):
+    """Command line (Linux/macOS) or image name (Windows) of a running pid, else None."""
+    if os.path.exists("/proc"):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                return f.read().replace(b"\0", b" ").decode(errors="replace")
+        except OSError:
+            return None
+    if platform.system().lower() == 'windows':
+        command = ["tasklist", "/FI", f"PID eq {pid}", "/NH", "/FO", "CSV"]
+    else:
+        command = ["ps", "-p", str(pid), "-o", "command="]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+    # tasklist prints an info line instead of a CSV row for unknown pids
+    return output if output and (command[0] == "ps" or f'"{pid}"' in output) else None
+
+
+def port_accepts_connections(port, host="127.0.0.1", timeout=0.2):
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def receiver_ports(port):
+    """All ports a uxplay started with -p port listens on."""
+    return list(range(port, port + PORTS_PER_RECEIVER))
+
 
 class IosReceiver:
-    def __init__(self):
+    def __init__(self, port=AIRPLAY_PORT, profile=DEFAULT_PROFILE, name=RECEIVER_NAME):
+        if profile not in UXPLAY_PROFILES:
+            raise ValueError(f"Unknown uxplay profile: {profile}")
         self.process = None
+        self.log = None
         self.running = False
+        self.port = port
+        self.name = name
+        self.profile = profile
+        self.state = "idle"  # idle, starting, ready, failed, stopped
+        self.startup_latency = None
+        self.ready_event = threading.Event()
         self.os_type = platform.system().lower()
 
     def is_installed(self):
         """Check if uxplay is installed and available."""
-        if self.os_type == 'linux':
-            return shutil.which("uxplay") is not None
-        elif self.os_type == 'windows':
-            # Check common installation paths on Windows
-            paths = [
-                os.path.expanduser("~\\uxplay-windows\\uxplay.exe"),
-                "C:\\Program Files\\uxplay\\uxplay.exe",
-                "C:\\Program Files (x86)\\uxplay\\uxplay.exe",
-                shutil.which("uxplay")  # Also check PATH
-            ]
-            return any(p and os.path.exists(p) for p in paths if p)
+        if self.os_type in ('linux', 'windows'):
+            return tool_registry.is_available("uxplay")
         return False
 
     def get_uxplay_path(self):
         """Get the path to uxplay executable."""
-        if self.os_type == 'linux':
-            return shutil.which("uxplay")
-        elif self.os_type == 'windows':
-            paths = [
-                os.path.expanduser("~\\uxplay-windows\\uxplay.exe"),
-                "C:\\Program Files\\uxplay\\uxplay.exe",
-                "C:\\Program Files (x86)\\uxplay\\uxplay.exe",
-            ]
-            for p in paths:
-                if os.path.exists(p):
-                    return p
-            return shutil.which("uxplay")
+        if self.os_type in ('linux', 'windows'):
+            return tool_registry.which("uxplay")
         return None
 
     def setup_firewall(self):
-        """Setup firewall rules for AirPlay."""
+        """Setup firewall rules for exactly this receiver's ports (plus mDNS)."""
         from utils.system_utils import open_firewall_ports
-        return open_firewall_ports()
+        ports = receiver_ports(self.port)
+        return open_firewall_ports(tcp_ports=ports, udp_ports=ports + [MDNS_PORT])
 
     def get_install_instructions(self):
         """Get installation instructions based on OS."""
@@ -73,17 +140,67 @@ class IosReceiver:
             }
         return {"type": "error", "message": "Desteklenmeyen işletim sistemi"}
 
+    @property
+    def telemetry_name(self):
+        return f"uxplay-{self.name}"
+
+    @property
+    def pidfile(self):
+        return os.path.join(get_config_dir(), f"uxplay-{self.port}.pid")
+
+    def _read_pidfile(self):
+        try:
+            with open(self.pidfile) as f:
+                return int(f.read().split()[0])
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _remove_pidfile(self, pid):
+        # Sadece bu örneğe ait kayıt silinir
+        if self._read_pidfile() == pid:
+            try:
+                os.remove(self.pidfile)
+            except OSError:
+                pass
+
+    def _is_our_uxplay(self, pid):
+        command_line = process_command_line(pid)
+        return bool(command_line) and "uxplay" in command_line.lower()
+
     def kill_existing(self):
-        """Kill any existing uxplay processes."""
-        if self.os_type == 'linux':
-            subprocess.run(["pkill", "-f", "uxplay"], capture_output=True)
-        elif self.os_type == 'windows':
-            subprocess.run(["taskkill", "/F", "/IM", "uxplay.exe"], 
-                         capture_output=True, creationflags=subprocess.CREATE_NO_WINDOW)
-        time.sleep(0.5)
+        """
+        Terminate a uxplay left behind by a previous MeCast run on this port
+        (recorded in the pidfile) and wait for it to exit. Other uxplay
+        processes on the system are left alone.
+        """
+        pid = self._read_pidfile()
+        if pid is None:
+            return
+        if self._is_our_uxplay(pid):
+            try:
+                os.kill(pid, signal.SIGTERM)
+                deadline = time.monotonic() + EXIT_TIMEOUT
+                # Çıkış ve portun serbest kalması beklenir (sabit uyku yok)
+                while ((self._is_our_uxplay(pid) or port_accepts_connections(self.port))
+                       and time.monotonic() < deadline):
+                    time.sleep(PROBE_INTERVAL)
+                if self._is_our_uxplay(pid) and hasattr(signal, "SIGKILL"):
+                    os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        self._remove_pidfile(pid)
 
-    def start(self):
-        """Start the uxplay process."""
+    def start(self, on_ready=None, on_failed=None, on_exit=None, prepare=True):
+        """
+        Start the uxplay process without blocking. The receiver becomes ready
+        once its RTSP port accepts TCP connections.
+        on_ready(latency): called with the measured time-to-ready (seconds).
+        on_failed(message): called if uxplay exits or times out before that.
+        on_exit(returncode): called if uxplay exits after being ready
+        (not when stop() was called).
+        prepare=False skips stale-process cleanup and firewall setup, for
+        restarts of a receiver that this process already prepared.
+        """
         if not self.is_installed():
             instructions = self.get_install_instructions()
             if instructions["type"] == "command":
@@ -99,29 +216,34 @@ class IosReceiver:
             return
 
         try:
-            # Kill any existing instances
-            self.kill_existing()
-            
-            # Setup firewall
-            success, msg = self.setup_firewall()
-            # We don't fail if firewall setup fails, just log it
+            if prepare:
+                # Kill any existing instances
+                self.kill_existing()
+                
+                # Setup firewall
+                success, msg = self.setup_firewall()
+                # We don't fail if firewall setup fails, just log it
             
             # Build command based on OS
             uxplay_path = self.get_uxplay_path()
             
-            if self.os_type == 'linux':
-                cmd = [uxplay_path, "-n", "MeCast", "-p", "7000"]
-            elif self.os_type == 'windows':
-                cmd = [uxplay_path, "-n", "MeCast", "-p", "7000"]
+            if self.os_type in ('linux', 'windows'):
+                cmd = [uxplay_path, "-n", self.name, "-p", str(self.port)]
+                cmd += UXPLAY_PROFILES[self.profile]["args"]
             else:
                 raise OSError("Desteklenmeyen işletim sistemi")
 
+            self.state = "starting"
+            self.startup_latency = None
+            self.ready_event.clear()
+            started_at = time.monotonic()
+
             # Start the process
             if self.os_type == 'windows':
                 self.process = subprocess.Popen(
                     cmd,
                     stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
                     text=True,
                     creationflags=subprocess.CREATE_NO_WINDOW
                 )
@@ -129,32 +251,92 @@ class IosReceiver:
                 self.process = subprocess.Popen(
                     cmd,
                     stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
                     text=True
                 )
             
+            with open(self.pidfile, "w") as f:
+                f.write(f"{self.process.pid}\n")
+            
+            # Drain output continuously; uxplay logs every connection. Each receiver
+            # gets its own logger and log file (uxplay-MeCast-2.log, ...)
+            self.log = LogPipeline(self.telemetry_name, rules=UXPLAY_RULES)
+            self.log.attach(self.process)
+            telemetry.track(self.telemetry_name, self.process, "uxplay")
+            
             self.running = True
             
-            # Start a thread to monitor the process
-            threading.Thread(target=self._monitor_process, daemon=True).start()
+            # Start threads to monitor the process and probe readiness
+            threading.Thread(target=self._monitor_process, args=(self.process, on_exit), daemon=True).start()
+            threading.Thread(target=self._probe_ready, args=(self.process, started_at, on_ready, on_failed),
+                             daemon=True).start()
             
         except Exception as e:
             self.running = False
+            self.state = "failed"
+            self.ready_event.set()
             raise e
 
+    def wait_until_ready(self, timeout=None):
+        """Block until uxplay is ready or has failed. Returns True if ready."""
+        self.ready_event.wait(timeout)
+        return self.state == "ready"
+
+    def _probe_ready(self, process, started_at, on_ready, on_failed):
+        """Poll the RTSP port until it accepts connections, the process exits or time runs out."""
+        deadline = started_at + READY_TIMEOUT
+        while self.state == "starting":
+            if process.poll() is not None:
+                self.log.join(timeout=1)
+                message = "uxplay başlatılamadı:\n" + "\n".join(self.log.tail())
+                break
+            if port_accepts_connections(self.port):
+                self.startup_latency = time.monotonic() - started_at
+                self.state = "ready"
+                self.ready_event.set()
+                tracer.event("uxplay.ready", f"uxplay hazır: port {self.port}, {self.startup_latency * 1000:.0f} ms",
+                             port=self.port, latency=self.startup_latency)
+                if on_ready:
+                    on_ready(self.startup_latency)
+                return
+            if time.monotonic() > deadline:
+                message = f"uxplay {READY_TIMEOUT} sn içinde port {self.port} üzerinde hazır olmadı"
+                break
+            time.sleep(PROBE_INTERVAL)
+        else:
+            # Hazır olmadan durduruldu
+            self.ready_event.set()
+            return
+
+        self.startup_latency = time.monotonic() - started_at
+        self.state = "failed"
+        self.ready_event.set()
+        if on_failed:
+            on_failed(message)
+
     def stop(self):
-        """Stop the uxplay process."""
+        """Stop the uxplay process and wait for it to exit."""
         if self.process and self.running:
-            self.process.terminate()
+            process = self.process
+            self.state = "stopped"
+            self.ready_event.set()
+            process.terminate()
             try:
-                self.process.wait(timeout=5)
+                process.wait(timeout=EXIT_TIMEOUT)
             except subprocess.TimeoutExpired:
-                self.process.kill()
+                process.kill()
+                process.wait()
+            self._remove_pidfile(process.pid)
             self.running = False
             self.process = None
 
-    def _monitor_process(self):
+    def _monitor_process(self, process, on_exit):
         """Monitor the subprocess and update state if it exits."""
-        if self.process:
-            self.process.wait()
+        returncode = process.wait()
+        self._remove_pidfile(process.pid)
+        if process is self.process:
             self.running = False
+            if self.state == "ready":
+                self.state = "stopped"
+                if on_exit:
+                    on_exit(returncode)
@@ -0,0 +1,121 @@
+"""
+Several iOS receivers side by side for MeCast.
+Each receiver gets a unique advertised name ("MeCast", "MeCast-2", ...) and
+its own block of uxplay ports. Blocks are allocated automatically: a block is
+skipped if another receiver of this pool reserved it or if any of its ports
+cannot be bound (something else is listening). Every receiver runs under its
+own supervisor and can be stopped on its own; the firewall is opened for
+exactly the allocated blocks.
+"""
+
+import glob
+import os
+import socket
+import threading
+from receivers.ios_receiver import (IosReceiver, AIRPLAY_PORT, RECEIVER_NAME, DEFAULT_PROFILE,
+                                    receiver_ports)
+from receivers.ios_supervisor import IosReceiverSupervisor
+from utils.system_utils import get_config_dir
+
+MAX_RECEIVERS = 8
+# Bloklar arası boşluk; uxplay'in port bloğunu komşu bloktan ayırır
+PORT_STRIDE = 10
+PORT_SEARCH_LIMIT = 100
+
+
+def port_free(port):
+    """True if the port can be bound for both TCP and UDP on all interfaces."""
+    for kind in (socket.SOCK_STREAM, socket.SOCK_DGRAM):
+        sock = socket.socket(socket.AF_INET, kind)
+        try:
+            sock.bind(("0.0.0.0", port))
+        except OSError:
+            return False
+        finally:
+            sock.close()
+    return True
+
+
+def receiver_name(index):
+    return RECEIVER_NAME if index == 1 else f"{RECEIVER_NAME}-{index}"
+
+
+class IosReceiverPool:
+    def __init__(self, base_port=AIRPLAY_PORT, max_receivers=MAX_RECEIVERS,
+                 port_stride=PORT_STRIDE, supervisor_factory=IosReceiverSupervisor):
+        self.base_port = base_port
+        self.max_receivers = max_receivers
+        self.port_stride = port_stride
+        self.supervisor_factory = supervisor_factory
+        self._supervisors = {}  # name -> supervisor
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """callback(name, event, message) for every supervisor event of the pool."""
+        self._listeners.append(callback)
+
+    def _notify(self, name, event, message):
+        for callback in list(self._listeners):
+            callback(name, event, message)
+
+    def stop_stale(self):
+        """Terminate uxplay instances recorded by earlier MeCast runs (any port)."""
+        for path in glob.glob(os.path.join(get_config_dir(), "uxplay-*.pid")):
+            port = os.path.basename(path)[len("uxplay-"):-len(".pid")]
+            if port.isdigit():
+                IosReceiver(port=int(port)).kill_existing()
+
+    def _allocate(self):
+        """(name, port) for a new receiver; caller holds the lock."""
+        used_names = set(self._supervisors)
+        index = 1
+        while receiver_name(index) in used_names:
+            index += 1
+
+        reserved = set()
+        for supervisor in self._supervisors.values():
+            reserved.update(receiver_ports(supervisor.receiver.port))
+        for i in range(PORT_SEARCH_LIMIT):
+            port = self.base_port + i * self.port_stride
+            ports = receiver_ports(port)
+            if reserved.intersection(ports):
+                continue
+            if all(port_free(p) for p in ports):
+                return receiver_name(index), port
+        raise RuntimeError("Boş AirPlay port bloğu bulunamadı")
+
+    def add(self, profile=DEFAULT_PROFILE):
+        """Allocate, start and return the supervisor of a new receiver."""
+        with self._lock:
+            if len(self._supervisors) >= self.max_receivers:
+                raise RuntimeError(f"En fazla {self.max_receivers} alıcı çalıştırılabilir")
+            name, port = self._allocate()
+            supervisor = self.supervisor_factory(IosReceiver(port=port, profile=profile, name=name))
+            self._supervisors[name] = supervisor
+        supervisor.add_listener(lambda event, message, n=name: self._notify(n, event, message))
+        try:
+            supervisor.start()
+        except Exception:
+            with self._lock:
+                self._supervisors.pop(name, None)
+            raise
+        return supervisor
+
+    def remove(self, name):
+        """Stop one receiver; the others keep running."""
+        with self._lock:
+            supervisor = self._supervisors.pop(name, None)
+        if supervisor:
+            supervisor.stop()
+
+    def stop_all(self):
+        with self._lock:
+            supervisors = list(self._supervisors.values())
+            self._supervisors.clear()
+        for supervisor in supervisors:
+            supervisor.stop()
+
+    def supervisors(self):
+        with self._lock:
+            return dict(self._supervisors)
@@ -0,0 +1,191 @@
+"""
+Supervisor for the iOS (uxplay) receiver.
+Restarts uxplay automatically when it crashes or fails to become ready,
+with exponential backoff (starting at a quarter of a second, so a receiver
+that died because a phone dropped off is back within about a second) and a
+crash-loop limit. State changes are reported as events and restart counts
+and downtime are kept as metrics. Every session is appended, together with
+its uxplay profile, to ios_sessions.jsonl so profiles can be compared.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from receivers.ios_receiver import IosReceiver
+from utils.system_utils import get_config_dir
+from utils.tracing import tracer
+
+
+def sessions_path():
+    return os.path.join(get_config_dir(), "ios_sessions.jsonl")
+
+
+def record_session(record, path=None):
+    """Append one finished session as a JSON line."""
+    try:
+        with open(path or sessions_path(), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        tracer.event("ios.session_log.error", f"Oturum kaydı yazılamadı: {e}", level="error")
+
+
+def load_sessions(path=None):
+    """All recorded sessions, oldest first."""
+    try:
+        with open(path or sessions_path(), encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return []
+
+
+class IosReceiverSupervisor:
+    def __init__(self, receiver=None, initial_backoff=0.25, max_backoff=8.0,
+                 crash_limit=5, crash_window=60.0, stable_after=30.0):
+        self.receiver = receiver or IosReceiver()
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.crash_limit = crash_limit
+        self.crash_window = crash_window
+        self.stable_after = stable_after
+        self.state = "idle"  # idle, starting, ready, restarting, gave_up, stopped
+        self.metrics = {
+            "starts": 0,
+            "restarts": 0,
+            "crashes": 0,
+            "downtime": 0.0,       # toplam kesinti (sn)
+            "last_downtime": None,
+            "last_ready_latency": None,
+        }
+        self._backoff = initial_backoff
+        self._crash_times = deque()
+        self._down_since = None
+        self._ready_at = None
+        self._timer = None
+        self._started_at = None  # duvar saati, oturum kaydı için
+        self._generation = 0  # eski denemelerin geç gelen olaylarını ayıklar
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """callback(event, message) for starting/ready/crashed/restarting/gave_up/stopped."""
+        self._listeners.append(callback)
+
+    def _notify(self, event, message=""):
+        for callback in list(self._listeners):
+            try:
+                callback(event, message)
+            except Exception as e:
+                tracer.event("ios.supervisor.listener.error", f"Supervisor dinleyici hatası: {e}", level="error")
+
+    def start(self):
+        """Start the receiver. Raises like IosReceiver.start (e.g. uxplay not installed)."""
+        with self._lock:
+            self.state = "idle"
+            if self._started_at is None:
+                self._started_at = time.time()
+            self._crash_times.clear()
+            self._backoff = self.initial_backoff
+            self._down_since = None
+        try:
+            self._launch()
+        except Exception:
+            with self._lock:
+                self.state = "idle"
+            raise
+
+    def _launch(self, prepare=True):
+        with self._lock:
+            if self.state == "stopped":
+                return
+            self._generation += 1
+            generation = self._generation
+            self.state = "starting"
+            self.metrics["starts"] += 1
+        self._notify("starting", f"uxplay başlatılıyor (port {self.receiver.port})")
+        self.receiver.start(
+            on_ready=lambda latency: self._on_ready(generation, latency),
+            on_failed=lambda message: self._on_crash(generation, message),
+            on_exit=lambda returncode: self._on_crash(generation, f"uxplay beklenmedik şekilde kapandı (kod {returncode})"),
+            prepare=prepare)
+
+    def _on_ready(self, generation, latency):
+        with self._lock:
+            if generation != self._generation or self.state != "starting":
+                return
+            self.state = "ready"
+            self._ready_at = time.monotonic()
+            self.metrics["last_ready_latency"] = latency
+            if self._down_since is not None:
+                downtime = self._ready_at - self._down_since
+                self.metrics["downtime"] += downtime
+                self.metrics["last_downtime"] = downtime
+                self._down_since = None
+        self._notify("ready", f"Alıcı hazır ({latency * 1000:.0f} ms)")
+
+    def _on_crash(self, generation, message):
+        now = time.monotonic()
+        with self._lock:
+            if generation != self._generation or self.state not in ("starting", "ready"):
+                return
+            self.metrics["crashes"] += 1
+            if self._down_since is None:
+                self._down_since = now
+            # Uzun süre sorunsuz çalıştıysa bekleme süresi sıfırlanır
+            if self._ready_at is not None and now - self._ready_at >= self.stable_after:
+                self._backoff = self.initial_backoff
+            self._ready_at = None
+            self._crash_times.append(now)
+            while self._crash_times and now - self._crash_times[0] > self.crash_window:
+                self._crash_times.popleft()
+            gave_up = len(self._crash_times) > self.crash_limit
+            delay = self._backoff
+            self.state = "gave_up" if gave_up else "restarting"
+            if not gave_up:
+                self._backoff = min(self._backoff * 2, self.max_backoff)
+                self.metrics["restarts"] += 1
+                self._timer = threading.Timer(delay, self._restart)
+                self._timer.daemon = True
+                self._timer.start()
+        self._notify("crashed", message)
+        if gave_up:
+            self.receiver.stop()
+            self._notify("gave_up", f"{self.crash_window:.0f} sn içinde {len(self._crash_times)} çökme, "
+                                    "yeniden başlatma durduruldu")
+        else:
+            self._notify("restarting", f"{delay:.2f} sn sonra yeniden başlatılıyor")
+
+    def _restart(self):
+        with self._lock:
+            if self.state != "restarting":
+                return
+        # Zaman aşımında uxplay hâlâ çalışıyor olabilir
+        self.receiver.stop()
+        try:
+            # Güvenlik duvarı ve eski işlem temizliği ilk başlatmada yapıldı;
+            # tekrarlamak (sudo) geri çekilme süresini aşabilir
+            self._launch(prepare=False)
+        except Exception as e:
+            with self._lock:
+                self.state = "gave_up"
+            self._notify("gave_up", str(e))
+
+    def stop(self):
+        with self._lock:
+            if self.state == "stopped":
+                return
+            self.state = "stopped"
+            self._generation += 1
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            started_at, self._started_at = self._started_at, None
+            metrics = dict(self.metrics)
+        self.receiver.stop()
+        if started_at is not None:
+            ended_at = time.time()
+            record_session(dict(metrics, profile=self.receiver.profile, port=self.receiver.port,
+                                started_at=started_at, ended_at=ended_at,
+                                duration=ended_at - started_at))
+        self._notify("stopped", "Alıcı durduruldu")
@@ -0,0 +1,53 @@
+"""
+Measured host cost of the scrcpy session presets.
+When a session is stopped, the CPU time and peak resident memory of its
+scrcpy process are read from /proc and folded into a running average per
+preset, kept in preset_costs.json. Operators see the numbers next to the
+presets; benchmarks/bench_presets.py fills them from a real device.
+"""
+
+from utils.json_cache import JsonCache
+from utils.telemetry import read_process
+
+# Daha kısa oturumlarda açılış maliyeti ortalamayı bozar
+MIN_MEASURE_SECONDS = 10
+# Ortalama son ~20 oturuma ağırlık verir
+MAX_WEIGHT = 20
+
+
+def process_usage(pid):
+    """(cpu_seconds, peak_rss_bytes) of a running process, or None without /proc."""
+    sample = read_process(pid)
+    if sample is None:
+        return None
+    return sample["cpu_seconds"], sample["peak_rss"]
+
+
+def cost_key(preset, record_only=False):
+    return f"{preset}+record_only" if record_only else preset
+
+
+class PresetCostCache(JsonCache):
+    FILE_NAME = "preset_costs.json"
+
+    def record(self, key, cpu_percent, peak_rss):
+        with self._lock:
+            entry = self._load().setdefault(key, {"sessions": 0, "cpu_percent": 0.0, "rss_mb": 0.0})
+            entry["sessions"] += 1
+            weight = min(entry["sessions"], MAX_WEIGHT)
+            entry["cpu_percent"] += (cpu_percent - entry["cpu_percent"]) / weight
+            entry["rss_mb"] += (peak_rss / 1024 ** 2 - entry["rss_mb"]) / weight
+            self._save()
+
+    def get(self, key):
+        """{'sessions', 'cpu_percent', 'rss_mb'} or None if never measured."""
+        with self._lock:
+            entry = self._load().get(key)
+            return dict(entry) if entry else None
+
+    def entries(self):
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._load().items()}
+
+
+preset_costs = PresetCostCache()
@@ -0,0 +1,232 @@
+"""
+Segmented session recording for MeCast.
+scrcpy records into a named pipe and ffmpeg cuts the stream into fixed
+duration Matroska segments without re-encoding (-c copy), so the session
+runs as one uninterrupted scrcpy process. Every finished segment is added to
+the recording's index.json (offset, duration, size), which lets a player seek
+across hours of capture by reading the small index files only. Once the
+recordings directory exceeds the disk budget the oldest segments are
+deleted. Without ffmpeg or named pipes (Windows) the session is recorded as
+a single segment.
+"""
+
+import bisect
+import glob
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+from utils.telemetry import telemetry
+from utils.tool_registry import tool_registry
+from utils.tracing import tracer
+
+SEGMENT_SECONDS = 300
+DEFAULT_BUDGET_GB = 20
+INDEX_NAME = "index.json"
+STREAM_NAME = "stream.mkv"
+FINISH_TIMEOUT = 10
+PROBE_INTERVAL = 0.05
+
+# ffmpeg segment list (csv): dosya,başlangıç,bitiş
+SEGMENT_LINE = re.compile(r"^(?P<file>[^,]+),(?P<start>[\d.]+),(?P<end>[\d.]+)$")
+
+# Dizinler arası bütçe temizliği ve indeks yazımları tek kilitle sıralanır
+_index_lock = threading.Lock()
+
+
+def record_dir():
+    """MECAST_RECORD_DIR or ~/Videos/MeCast (read on every call, not at import)."""
+    return os.environ.get("MECAST_RECORD_DIR") or os.path.join(os.path.expanduser("~"), "Videos", "MeCast")
+
+
+def disk_budget():
+    """MECAST_RECORD_BUDGET_GB in bytes; an invalid value falls back to the default."""
+    value = os.environ.get("MECAST_RECORD_BUDGET_GB")
+    if value:
+        try:
+            gigabytes = float(value)
+            if gigabytes > 0:
+                return int(gigabytes * 1024 ** 3)
+        except ValueError:
+            pass
+        tracer.event("recorder.config", f"Geçersiz MECAST_RECORD_BUDGET_GB={value!r}, "
+                     f"varsayılan {DEFAULT_BUDGET_GB} GB kullanılıyor", level="warning")
+    return DEFAULT_BUDGET_GB * 1024 ** 3
+
+
+def recording_directories(root=None):
+    root = root or record_dir()
+    return sorted(os.path.dirname(path) for path in glob.glob(os.path.join(root, "*", INDEX_NAME)))
+
+
+def load_index(directory):
+    try:
+        with open(os.path.join(directory, INDEX_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_index(directory, index):
+    path = os.path.join(directory, INDEX_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def locate(index, offset):
+    """(segment, offset inside it) for a position in seconds from the recording start, or None."""
+    segments = index["segments"]
+    i = bisect.bisect_right([s["start"] for s in segments], offset) - 1
+    if i < 0 or offset > segments[i]["end"]:
+        return None
+    return segments[i], offset - segments[i]["start"]
+
+
+def locate_time(timestamp, root=None):
+    """(directory, segment, offset) holding the wall-clock time `timestamp`, or None."""
+    for directory in recording_directories(root):
+        index = load_index(directory)
+        if index and index["segments"] and index["started_at"] <= timestamp:
+            found = locate(index, timestamp - index["started_at"])
+            if found:
+                return (directory,) + found
+    return None
+
+
+def enforce_budget(budget=None, root=None):
+    """Delete the oldest indexed segments until the recordings fit in `budget` bytes."""
+    budget = budget or disk_budget()
+    with _index_lock:
+        indexes = {d: load_index(d) for d in recording_directories(root)}
+        segments = []
+        for directory, index in indexes.items():
+            if index:
+                for segment in index["segments"]:
+                    segments.append((index["started_at"] + segment["start"], directory, segment))
+        total = sum(segment["bytes"] for _, _, segment in segments)
+        changed = set()
+        for _, directory, segment in sorted(segments, key=lambda s: s[0]):
+            if total <= budget:
+                break
+            try:
+                os.remove(os.path.join(directory, segment["file"]))
+            except OSError:
+                pass
+            indexes[directory]["segments"].remove(segment)
+            total -= segment["bytes"]
+            changed.add(directory)
+        for directory in changed:
+            save_index(directory, indexes[directory])
+    return total
+
+
+class SegmentedRecorder:
+    def __init__(self, name, segment_seconds=SEGMENT_SECONDS, budget=None, root=None):
+        self.name = name
+        self.segment_seconds = segment_seconds
+        self.budget = budget or disk_budget()
+        self.root = root or record_dir()
+        self.directory = None
+        self.target = None
+        self.process = None
+        self.index = None
+        self._reader = None
+        self._finish_lock = threading.Lock()
+
+    def can_segment(self):
+        return hasattr(os, "mkfifo") and tool_registry.is_available("ffmpeg")
+
+    def start(self):
+        """Create the recording directory and return the path scrcpy should --record to."""
+        started_at = time.time()
+        safe_name = re.sub(r"[^\w.-]", "_", self.name)
+        self.directory = os.path.join(
+            self.root, f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started_at))}-{safe_name}")
+        os.makedirs(self.directory, exist_ok=True)
+        self.index = {"name": self.name, "started_at": started_at,
+                      "segment_seconds": self.segment_seconds, "segments": []}
+        with _index_lock:
+            save_index(self.directory, self.index)
+
+        if not self.can_segment():
+            self.target = os.path.join(self.directory, "000000.mkv")
+            return self.target
+
+        self.target = os.path.join(self.directory, STREAM_NAME)
+        os.mkfifo(self.target)
+        command = [
+            tool_registry.command("ffmpeg"), "-hide_banner", "-loglevel", "error",
+            "-f", "matroska", "-i", self.target, "-map", "0", "-c", "copy",
+            "-f", "segment", "-segment_time", str(self.segment_seconds),
+            "-segment_format", "matroska", "-reset_timestamps", "1",
+            "-segment_list", "pipe:1", "-segment_list_type", "csv",
+            os.path.join(self.directory, "%06d.mkv"),
+        ]
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        stdin=subprocess.DEVNULL, text=True)
+        telemetry.track(f"ffmpeg-{self.name}", self.process, "ffmpeg")
+        self._reader = threading.Thread(target=self._read_segments, args=(self.process,), daemon=True)
+        self._reader.start()
+        return self.target
+
+    def _read_segments(self, process):
+        # ffmpeg her segment kapandığında listeye bir satır yazar
+        for line in process.stdout:
+            match = SEGMENT_LINE.match(line.strip())
+            if match:
+                self._add_segment(match.group("file"), float(match.group("start")), float(match.group("end")))
+
+    def _add_segment(self, file, start, end):
+        path = os.path.join(self.directory, file)
+        try:
+            size = os.path.getsize(path)
+            if not size:
+                os.remove(path)
+                return
+        except OSError:
+            return
+        with _index_lock:
+            # Bütçe temizliği eski segmentleri diskteki indeksten silmiş olabilir
+            self.index = load_index(self.directory) or self.index
+            self.index["segments"].append({"file": file, "start": start, "end": end, "bytes": size})
+            save_index(self.directory, self.index)
+        enforce_budget(self.budget, self.root)
+
+    def finish(self):
+        """Wait for the last segment after scrcpy has exited; safe to call more than once."""
+        with self._finish_lock:
+            if self.directory is None:
+                return
+            if self.process is not None:
+                deadline = time.monotonic() + FINISH_TIMEOUT
+                while self.process.poll() is None and time.monotonic() < deadline:
+                    # scrcpy boruya hiç yazmadan çıktıysa ffmpeg açılışta bekler;
+                    # anlık bir yazıcı açıp kapatmak ona EOF verir
+                    try:
+                        os.close(os.open(self.target, os.O_WRONLY | os.O_NONBLOCK))
+                    except OSError:
+                        pass
+                    time.sleep(PROBE_INTERVAL)
+                if self.process.poll() is None:
+                    self.process.kill()
+                    self.process.wait()
+                self._reader.join(timeout=FINISH_TIMEOUT)
+                self.process = None
+                try:
+                    os.remove(self.target)
+                except OSError:
+                    pass
+            elif os.path.exists(self.target):
+                self._add_segment(os.path.basename(self.target), 0.0, time.time() - self.index["started_at"])
+            if not self.index["segments"]:
+                # Hiç görüntü kaydedilmedi, boş kayıt dizini bırakılmaz
+                os.remove(os.path.join(self.directory, INDEX_NAME))
+                try:
+                    os.rmdir(self.directory)
+                except OSError:
+                    pass
+            self.directory = None
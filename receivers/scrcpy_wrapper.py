@@ -1,16 +1,80 @@
 import subprocess
 import threading
+import time
+from receivers.encoder_probe import encoder_cache
+from receivers.preset_costs import preset_costs, process_usage, cost_key, MIN_MEASURE_SECONDS
+from receivers.recorder import SegmentedRecorder, SEGMENT_SECONDS
+from utils.log_pipeline import LogPipeline, SCRCPY_RULES
+from utils.telemetry import telemetry
+from utils.tool_registry import tool_registry
+from utils.tracing import tracer
+
+# Oturum başına seçilebilen kaynak ön ayarları. --no-audio ses iletimini,
+# --no-control fare/klavye girişini ve pano eşitlemesini, --no-clipboard-autosync
+# sadece pano eşitlemesini kapatır; --no-mipmaps küçültülmüş pencerede GPU işini azaltır.
+# Ekransız çalışma "Sadece Kayıt" (record_only) seçeneğiyle yapılır.
+SCRCPY_PRESETS = {
+    "full": {
+        "label": "Tam",
+        "description": "Ses, kontrol ve pano eşitlemesi açık",
+        "args": [],
+    },
+    "no_audio": {
+        "label": "Sessiz",
+        "description": "Ses iletilmez; kontrol açık",
+        "args": ["--no-audio"],
+    },
+    "light": {
+        "label": "Hafif",
+        "description": "Ses ve pano eşitlemesi kapalı, kontrol açık",
+        "args": ["--no-audio", "--no-clipboard-autosync", "--no-mipmaps"],
+    },
+    "view_only": {
+        "label": "Sadece İzle",
+        "description": "Ses ve kontrol kapalı; sadece görüntü",
+        "args": ["--no-audio", "--no-control", "--no-mipmaps"],
+    },
+}
+DEFAULT_PRESET = "full"
 
 class ScrcpyWrapper:
     def __init__(self):
         self.process = None
+        self.log = None
+        self.recorder = None
+        self.preset = DEFAULT_PRESET
+        self.cost_key = None
+        self._usage_start = None  # (monotonic, cpu_seconds) hazır olunduğunda
+        self.state = "idle"  # idle, starting, ready, failed, stopped
+        self.startup_latency = None
+        self.ready_event = threading.Event()
+        self._stopper = None  # kaydı kapatan arka plan thread'i
 
-    def start_mirroring(self, serial, bitrate=None, max_size=None, stay_awake=True, new_display=None, turn_screen_off=False, fullscreen=False):
+    def start_mirroring(self, serial, bitrate=None, max_size=None, stay_awake=True, new_display=None, turn_screen_off=False, fullscreen=False,
+                        print_fps=False, video_codec=None, video_encoder=None, preset=DEFAULT_PRESET,
+                        record=False, record_only=False, segment_seconds=SEGMENT_SECONDS, on_ready=None, on_failed=None, on_exit=None, on_event=None):
         """
-        Belirtilen cihaz için scrcpy'yi başlatır.
+        Belirtilen cihaz için scrcpy'yi başlatır. Beklemeden döner; hazır olma
+        durumu scrcpy çıktısı arka planda okunarak tespit edilir.
         new_display: Örn "1920x1080/160" gibi bir çözünürlük/dpi stringi. DeX modu için kullanılır.
+        on_ready(latency): scrcpy cihazı/renderer'ı bildirdiğinde çağrılır.
+        on_failed(message): işlem hazır olmadan kapanırsa çağrılır.
+        on_exit(returncode): hazır olduktan sonra işlem kapanırsa çağrılır.
+        on_event(event): çıktıdan ayrıştırılan her yapısal olay (fps, error, ...).
+        video_codec/video_encoder verilmezse cihaz için önbellekteki test sonucu kullanılır.
+        preset: SCRCPY_PRESETS anahtarı; ses/kontrol/pano gibi maliyetli özellikleri kapatır.
+        record: oturum segment_seconds uzunluğunda parçalar halinde kaydedilir.
+        record_only: pencere açılmadan sadece kayıt yapılır (bilgisayar görüntüyü çözmez).
         """
-        command = ['scrcpy', '--serial', serial]
+        if preset not in SCRCPY_PRESETS:
+            return False, f"Bilinmeyen ön ayar: {preset}"
+
+        if video_codec is None and video_encoder is None:
+            cached = encoder_cache.lookup(serial)
+            if cached:
+                video_codec, video_encoder = cached['codec'], cached['encoder']
+
+        command = [tool_registry.command('scrcpy'), '--serial', serial]
 
         if new_display:
             # Argümanı tek bir string olarak --new-display=VALUE formatında geçiyoruz
@@ -36,36 +100,144 @@ class ScrcpyWrapper:
         if fullscreen:
             command.append('--fullscreen')
 
+        if video_codec:
+            command.append(f'--video-codec={video_codec}')
+        if video_encoder:
+            command.append(f'--video-encoder={video_encoder}')
+
+        if print_fps:
+            # Uyarlanabilir mod ölçülen kare hızını log akışından okur
+            command.append('--print-fps')
+
+        command.extend(SCRCPY_PRESETS[preset]["args"])
+        self.preset = preset
+        self.cost_key = cost_key(preset, record_only)
+        self._usage_start = None
+
+        self.recorder = None
+        if record or record_only:
+            self.recorder = SegmentedRecorder(serial, segment_seconds=segment_seconds)
+            try:
+                command.extend([f'--record={self.recorder.start()}', '--record-format=mkv'])
+            except OSError as e:
+                self.recorder = None
+                return False, f"Kayıt başlatılamadı: {e}"
+            if record_only:
+                command.append('--no-playback')
+
         try:
-            # Debug için komutu yazdır
-            print(f"Çalıştırılan komut: {' '.join(command)}")
+            # Çalıştırılan komut iz dosyasına yazılır (konsola sadece MECAST_TRACE_ECHO=1 ile)
+            tracer.event("scrcpy.command", f"Çalıştırılan komut: {' '.join(command)}", serial=serial, command=command)
             
             # scrcpy'yi ayrı bir işlem olarak başlat
+            self.state = "starting"
+            self.startup_latency = None
+            self.ready_event.clear()
+            started_at = time.monotonic()
             self.process = subprocess.Popen(
                 command,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True
             )
             
-            # Kısa bir süre bekle ve işlemin hemen kapanıp kapanmadığını kontrol et
-            try:
-                stdout, stderr = self.process.communicate(timeout=1)
-                if self.process.returncode != 0:
-                    return False, f"Scrcpy başlatılamadı:\n{stderr}"
-            except subprocess.TimeoutExpired:
-                # İşlem 1 saniye içinde kapanmadıysa muhtemelen başarıyla çalışıyordur
-                # Ancak stderr'i okumaya devam etmek için ayrı bir thread gerekebilir
-                # Şimdilik başarılı varsayıyoruz
-                pass
-
-            return True, "Yansıtma başlatıldı."
+            # Çıktı sürekli boşaltılır (pipe dolup scrcpy'yi durdurmasın)
+            self.log = LogPipeline(f"scrcpy-{serial}", rules=SCRCPY_RULES)
+            self.log.subscribe(lambda event: self._on_log_event(
+                event, started_at, on_ready, on_failed, on_exit, on_event))
+            self.log.attach(self.process)
+            telemetry.track(f"scrcpy-{serial}", self.process, "scrcpy")
+
+            return True, "Yansıtma başlatılıyor."
         except FileNotFoundError:
+            self._finish_recording()
             return False, "scrcpy bulunamadı. Lütfen yüklü olduğundan emin olun."
         except Exception as e:
+            self._finish_recording()
             return False, f"Hata oluştu: {str(e)}"
 
-    def stop_mirroring(self):
+    def wait_until_ready(self, timeout=None):
+        """Hazır olana veya başarısız olana kadar bekler. Hazırsa True döner."""
+        self.ready_event.wait(timeout)
+        return self.state == "ready"
+
+    def _on_log_event(self, event, started_at, on_ready, on_failed, on_exit, on_event):
+        """scrcpy çıktısındaki olaylardan hazır olma ve çıkış anını tespit eder."""
+        if event["type"] == "ready" and self.state == "starting":
+            self.startup_latency = time.monotonic() - started_at
+            self.state = "ready"
+            self.ready_event.set()
+            usage = process_usage(self.process.pid) if self.process else None
+            if usage:
+                self._usage_start = (time.monotonic(), usage[0])
+            if on_ready:
+                on_ready(self.startup_latency)
+        elif event["type"] == "exit":
+            # Son segment ffmpeg tarafından kapatılıp indekse eklenir
+            self._finish_recording()
+            if self.state == "starting":
+                self.state = "failed"
+                self.startup_latency = time.monotonic() - started_at
+                self.ready_event.set()
+                if on_failed:
+                    output = "\n".join(self.log.tail())
+                    on_failed(f"Scrcpy başlatılamadı:\n{output}")
+            elif self.state == "ready":
+                self.state = "stopped"
+                if on_exit:
+                    on_exit(event["returncode"])
+
+        if on_event:
+            on_event(event)
+
+    def stop_mirroring(self, wait=False):
+        """
+        scrcpy'yi sonlandırır ve hemen döner. Kayıt varsa scrcpy'nin çıkması ve
+        son segmentin yazılması arka planda beklenir; wait=True bunu da bekler.
+        """
         if self.process:
-            self.process.terminate()
+            # Kullanıcı durdurdu: okuyucu thread hata bildirmesin
+            self.state = "stopped"
+            self.ready_event.set()
+            process = self.process
             self.process = None
+            self._record_cost(process)
+            process.terminate()
+            if self.recorder:
+                # Bekleme 15 sn'ye kadar sürebilir, çağıran (GUI) thread bloklanmaz
+                self._stopper = threading.Thread(target=self._finish_after_exit,
+                                                 args=(process, self.recorder), daemon=True)
+                self._stopper.start()
+        if wait:
+            self.wait_until_stopped()
+
+    def wait_until_stopped(self, timeout=None):
+        """Block until a recording stopped by stop_mirroring has been finished."""
+        stopper = self._stopper
+        if stopper:
+            stopper.join(timeout)
+
+    @staticmethod
+    def _finish_after_exit(process, recorder):
+        # scrcpy'nin dosyayı kapatması ve ffmpeg'in son segmenti yazması beklenir
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        recorder.finish()
+
+    def _record_cost(self, process):
+        """Ön ayarın ölçülen CPU/RSS maliyetini kaydeder (sadece /proc olan sistemlerde)."""
+        if self._usage_start is None:
+            return
+        started_at, cpu_start = self._usage_start
+        self._usage_start = None
+        elapsed = time.monotonic() - started_at
+        usage = process_usage(process.pid)
+        if usage is None or elapsed < MIN_MEASURE_SECONDS:
+            return
+        preset_costs.record(self.cost_key, (usage[0] - cpu_start) / elapsed * 100, usage[1])
+
+    def _finish_recording(self):
+        if self.recorder:
+            self.recorder.finish()
@@ -0,0 +1,187 @@
+"""
+Mirroring session manager for MeCast.
+Runs one scrcpy session per device serial in parallel. Launches go through
+a single queue and are staggered so several devices starting at once do not
+pile up on the ADB server; the number of concurrent sessions is capped.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from receivers.scrcpy_wrapper import ScrcpyWrapper
+from utils.tracing import tracer
+
+
+class MirrorSessionManager:
+    DEFAULT_MAX_SESSIONS = 8
+    DEFAULT_LAUNCH_INTERVAL = 0.5  # seconds between two scrcpy launches
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS,
+                 launch_interval=DEFAULT_LAUNCH_INTERVAL, wrapper_factory=ScrcpyWrapper):
+        self.max_sessions = max_sessions
+        self.launch_interval = launch_interval
+        self.wrapper_factory = wrapper_factory
+        self.sessions = {}  # serial -> ScrcpyWrapper
+        self._pending = set()
+        self._listeners = []
+        self._log_listeners = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._last_launch = 0.0
+        # Son başlatmaların ölçülen açılış süreleri
+        self.launch_history = deque(maxlen=200)
+        threading.Thread(target=self._launch_loop, daemon=True).start()
+
+    def add_listener(self, callback):
+        """callback(serial, event, message); event: queued/starting/started/failed/stopped."""
+        self._listeners.append(callback)
+
+    def add_log_listener(self, callback):
+        """callback(serial, event) for structured events parsed from scrcpy output."""
+        self._log_listeners.append(callback)
+
+    def _notify_log(self, serial, event):
+        for callback in list(self._log_listeners):
+            try:
+                callback(serial, event)
+            except Exception as e:
+                tracer.event("session.log_listener.error", f"Oturum dinleyici hatası: {e}", level="error",
+                             serial=serial)
+
+    def _notify(self, serial, event, message=""):
+        for callback in list(self._listeners):
+            try:
+                callback(serial, event, message)
+            except Exception as e:
+                tracer.event("session.listener.error", f"Oturum dinleyici hatası: {e}", level="error", serial=serial)
+
+    def is_active(self, serial):
+        with self._lock:
+            return serial in self.sessions or serial in self._pending
+
+    def active_serials(self):
+        with self._lock:
+            return list(self.sessions)
+
+    def pending_serials(self):
+        """Queued sessions that have not been launched yet."""
+        with self._lock:
+            return list(self._pending)
+
+    def session_count(self):
+        """Running plus queued sessions."""
+        with self._lock:
+            return len(self.sessions) + len(self._pending)
+
+    def start(self, serial, **options):
+        """
+        Bir cihaz için oturumu kuyruğa alır. Seçenekler doğrudan
+        ScrcpyWrapper.start_mirroring'e iletilir.
+        Returns:
+            tuple: (kuyruğa alındı mı, mesaj)
+        """
+        with self._lock:
+            if serial in self.sessions or serial in self._pending:
+                return False, f"{serial} için oturum zaten açık."
+            if len(self.sessions) + len(self._pending) >= self.max_sessions:
+                return False, f"En fazla {self.max_sessions} eşzamanlı oturum açılabilir."
+            self._pending.add(serial)
+        self._notify(serial, "queued")
+        self._queue.put((serial, options))
+        return True, "Sıraya alındı."
+
+    def stop(self, serial, wait=False):
+        """Stop one session; wait=True also waits until its recording is finished."""
+        with self._lock:
+            wrapper = self.sessions.pop(serial, None)
+            was_pending = serial in self._pending
+            self._pending.discard(serial)
+        if wrapper:
+            wrapper.stop_mirroring(wait=wait)
+        if wrapper or was_pending:
+            self._notify(serial, "stopped")
+
+    def restart(self, serial, **options):
+        """Oturumu yeni seçeneklerle yeniden başlatır (kuyruk ve kademe kurallarıyla)."""
+        self.stop(serial)
+        return self.start(serial, **options)
+
+    def stop_all(self, wait=False):
+        with self._lock:
+            serials = list(self.sessions) + list(self._pending)
+        for serial in serials:
+            self.stop(serial, wait=wait)
+
+    def _launch_loop(self):
+        while True:
+            serial, options = self._queue.get()
+            wrapper = None
+            try:
+                # Başlatmaları kademelendir
+                wait = self._last_launch + self.launch_interval - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                wrapper = self.wrapper_factory()
+                self._launch(serial, wrapper, options)
+            except Exception as e:
+                # Tek bir başlatma hatası kuyruktaki diğer oturumları durdurmamalı
+                if wrapper is not None:
+                    wrapper.stop_mirroring()
+                self._on_failed(serial, wrapper, f"Oturum başlatılamadı: {e}")
+
+    def _launch(self, serial, wrapper, options):
+        with self._lock:
+            if serial not in self._pending:
+                return  # Başlamadan iptal edildi
+            # Geri çağrılar Popen döner dönmez gelebilir, önce kaydet
+            self._pending.discard(serial)
+            self.sessions[serial] = wrapper
+
+        # Hazır olmayı beklemeden dön: oturumlar paralel açılır
+        self._notify(serial, "starting")
+        success, message = wrapper.start_mirroring(
+            serial,
+            on_ready=lambda latency, s=serial, w=wrapper: self._on_ready(s, w, latency),
+            on_failed=lambda msg, s=serial, w=wrapper: self._on_failed(s, w, msg),
+            on_exit=lambda code, s=serial, w=wrapper: self._on_exit(s, w),
+            on_event=lambda event, s=serial: self._notify_log(s, event),
+            **options
+        )
+        self._last_launch = time.monotonic()
+        if not success:
+            self._on_failed(serial, wrapper, message)
+            return
+        with self._lock:
+            cancelled = self.sessions.get(serial) is not wrapper
+        if cancelled:
+            # stop() oturumu scrcpy daha çalışmadan kaldırdı; işlem sahipsiz kalmasın
+            wrapper.stop_mirroring()
+
+    def _remove(self, serial, wrapper):
+        with self._lock:
+            if wrapper is None:
+                # Sarmalayıcı oluşturulamadı: oturum hâlâ kuyruktaysa oradan düşer
+                if serial not in self._pending:
+                    return False
+                self._pending.discard(serial)
+                return True
+            if self.sessions.get(serial) is not wrapper:
+                return False  # stop() ile zaten kaldırıldı
+            del self.sessions[serial]
+            return True
+
+    def _on_ready(self, serial, wrapper, latency):
+        self.launch_history.append({"serial": serial, "latency": latency, "success": True})
+        self._notify(serial, "started", f"{latency * 1000:.0f} ms")
+
+    def _on_failed(self, serial, wrapper, message):
+        latency = wrapper.startup_latency if wrapper else None
+        self.launch_history.append({"serial": serial, "latency": latency, "success": False})
+        if self._remove(serial, wrapper):
+            self._notify(serial, "failed", message)
+
+    def _on_exit(self, serial, wrapper):
+        """Pencere kapatıldığında veya scrcpy çöktüğünde oturumu kaldırır."""
+        if self._remove(serial, wrapper):
+            self._notify(serial, "stopped")
@@ -0,0 +1,147 @@
+"""
+Tests for the native ADB host-protocol client against a local fake ADB
+server that speaks the OKAY/FAIL + length-prefixed smart-socket protocol.
+Run with: python -m pytest tests
+"""
+
+import os
+import queue
+import socket
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.adb_client import AdbClient, AdbProtocolError, DeviceTracker  # noqa: E402
+
+DEVICES_L = ("R58M12ABCDE          device product:beyond1lte model:SM_G973F device:beyond1 transport_id:1\n"
+             "192.168.1.20:5555    offline transport_id:2\n")
+
+
+def message(text):
+    payload = text.encode("utf-8")
+    return b"%04x" % len(payload) + payload
+
+
+class FakeAdbServer:
+    """
+    Accepts one connection at a time and hands it to `handler(conn, service)`
+    after reading the length-prefixed request.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.services = []
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(4)
+        self.port = self._sock.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with conn:
+                length = int(self._recv_exact(conn, 4), 16)
+                service = self._recv_exact(conn, length).decode("utf-8")
+                self.services.append(service)
+                self.handler(conn, service)
+
+    @staticmethod
+    def _recv_exact(conn, size):
+        data = b""
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("client closed the connection")
+            data += chunk
+        return data
+
+    def close(self):
+        self._sock.close()
+
+
+class AdbClientTest(unittest.TestCase):
+    def serve(self, handler):
+        server = FakeAdbServer(handler)
+        self.addCleanup(server.close)
+        return server, AdbClient(port=server.port)
+
+    def test_devices_parses_devices_l(self):
+        server, client = self.serve(lambda conn, service: conn.sendall(b"OKAY" + message(DEVICES_L)))
+        devices = client.devices()
+        self.assertEqual(server.services, ["host:devices-l"])
+        self.assertEqual(devices, [
+            {"serial": "R58M12ABCDE", "status": "device", "model": "SM_G973F"},
+            {"serial": "192.168.1.20:5555", "status": "offline", "model": "Unknown"},
+        ])
+
+    def test_fail_reply_raises(self):
+        _, client = self.serve(lambda conn, service: conn.sendall(b"FAIL" + message("unknown host service")))
+        with self.assertRaises(AdbProtocolError) as ctx:
+            client.devices()
+        self.assertIn("unknown host service", str(ctx.exception))
+
+
+class DeviceTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.updates = queue.Queue()
+        self.errors = queue.Queue()
+
+    def start_tracker(self, handler):
+        server = FakeAdbServer(handler)
+        self.addCleanup(server.close)
+        tracker = DeviceTracker(self.updates.put, client=AdbClient(port=server.port),
+                                reconnect_delay=0.05, error_callback=self.errors.put)
+        tracker.start()
+        self.addCleanup(tracker.stop)
+        return server, tracker
+
+    def next_update(self):
+        return self.updates.get(timeout=2)
+
+    def test_incremental_track_update(self):
+        release = threading.Event()
+
+        def handler(conn, service):
+            conn.sendall(b"OKAY" + message(""))
+            conn.sendall(message("R58M12ABCDE          device model:SM_G973F\n"))
+            release.wait(2)
+
+        server, _ = self.start_tracker(handler)
+        self.assertEqual(self.next_update(), [])
+        self.assertEqual(self.next_update(),
+                         [{"serial": "R58M12ABCDE", "status": "device", "model": "SM_G973F"}])
+        self.assertEqual(server.services, ["host:track-devices-l"])
+        release.set()
+
+    def test_dropped_connection_clears_list_and_reconnects(self):
+        connections = []
+
+        def handler(conn, service):
+            connections.append(service)
+            conn.sendall(b"OKAY" + message("R58M12ABCDE          device model:SM_G973F\n"))
+            if len(connections) == 1:
+                # Sunucu mesajın ortasında bağlantıyı keser
+                conn.sendall(b"00")
+                return
+            threading.Event().wait(2)
+
+        self.start_tracker(handler)
+        self.assertEqual(len(self.next_update()), 1)
+        # Kopan bağlantı: hata bildirilir ve liste sıfırlanır
+        self.assertIn("ADB bağlantısı koptu", self.errors.get(timeout=2))
+        self.assertEqual(self.next_update(), [])
+        # Yeniden bağlanınca güncel liste tekrar gelir
+        self.assertEqual(len(self.next_update()), 1)
+        self.assertEqual(connections, ["host:track-devices-l"] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
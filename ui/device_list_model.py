@@ -0,0 +1,111 @@
+"""
+Device list model and background watcher for MeCast.
+The watcher receives pushed device lists off the GUI thread; the model
+applies them as minimal row inserts/updates/removals so views keep their
+selection and never rebuild the whole list.
+"""
+
+import threading
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, QObject, Qt, pyqtSignal
+from utils.adb_client import DeviceTracker
+from utils.adb_manager import AdbManager
+
+SerialRole = Qt.ItemDataRole.UserRole + 1
+ModelRole = Qt.ItemDataRole.UserRole + 2
+StatusRole = Qt.ItemDataRole.UserRole + 3
+
+
+class DeviceListModel(QAbstractListModel):
+    """Diffing list model keyed by device serial."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._devices = []
+        self._rows = {}  # serial -> row
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._devices)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._devices):
+            return None
+        device = self._devices[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{device['model']} ({device['serial']}) - {device['status']}"
+        if role == SerialRole:
+            return device['serial']
+        if role == ModelRole:
+            return device['model']
+        if role == StatusRole:
+            return device['status']
+        return None
+
+    def device_at(self, row):
+        return dict(self._devices[row])
+
+    def row_for_serial(self, serial):
+        return self._rows.get(serial, -1)
+
+    def update_devices(self, devices):
+        """Apply a fresh device list, touching only the rows that changed."""
+        incoming = {d['serial']: d for d in devices}
+
+        # Kaldırılanlar: sondan başa, ardışık satırları tek seferde sil
+        row = len(self._devices) - 1
+        while row >= 0:
+            if self._devices[row]['serial'] in incoming:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and self._devices[row]['serial'] not in incoming:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, last)
+            del self._devices[row + 1:last + 1]
+            self.endRemoveRows()
+
+        self._rows = {d['serial']: i for i, d in enumerate(self._devices)}
+
+        # Değişenler
+        for i, current in enumerate(self._devices):
+            new = incoming[current['serial']]
+            if new['status'] != current['status'] or new['model'] != current['model']:
+                self._devices[i] = dict(new)
+                index = self.index(i)
+                self.dataChanged.emit(index, index)
+
+        # Yeniler: sona eklenir, mevcut satırların sırası korunur
+        added = [dict(d) for serial, d in incoming.items() if serial not in self._rows]
+        if added:
+            first = len(self._devices)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            self._devices.extend(added)
+            for i, d in enumerate(added, start=first):
+                self._rows[d['serial']] = i
+            self.endInsertRows()
+
+
+class DeviceWatcher(QObject):
+    """
+    Wraps DeviceTracker for the UI. Tracker callbacks run on a background
+    thread; signals are delivered to GUI-thread slots via queued connections.
+    """
+    devices_changed = pyqtSignal(list)
+    error = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tracker = DeviceTracker(self.devices_changed.emit,
+                                     error_callback=self.error.emit)
+
+    def start(self):
+        self.tracker.start()
+
+    def stop(self):
+        self.tracker.stop()
+
+    def refresh(self):
+        """One-shot refresh without blocking the caller's thread."""
+        threading.Thread(target=lambda: self.devices_changed.emit(AdbManager.get_devices()),
+                         daemon=True).start()
@@ -2,7 +2,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QComboBox,
                              QCheckBox, QDialogButtonBox, QFormLayout, QSpinBox)
 
 class DexConfigDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, properties=None):
         super().__init__(parent)
         self.setWindowTitle("DeX Modu Ayarları")
         self.setModal(True)
@@ -24,6 +24,10 @@ class DexConfigDialog(QDialog):
         self.dpi_spin.setSingleStep(10)
         form_layout.addRow("DPI (Ölçek):", self.dpi_spin)
         
+        # Önbellekteki cihaz bilgisi varsa varsayılanları cihaza göre doldur
+        if properties:
+            self.apply_device_properties(properties)
+        
         # Seçenekler
         self.fullscreen_cb = QCheckBox("Tam Ekran Başlat")
         layout.addWidget(self.fullscreen_cb)
@@ -36,6 +40,18 @@ class DexConfigDialog(QDialog):
         buttons.rejected.connect(self.reject)
         layout.addWidget(buttons)
         
+    def apply_device_properties(self, properties):
+        if "width" in properties and "height" in properties:
+            # Harici ekran yataydır: uzun kenar genişlik olur
+            long_edge = max(properties["width"], properties["height"])
+            short_edge = min(properties["width"], properties["height"])
+            native = f"{long_edge}x{short_edge}"
+            if self.res_combo.findText(native) < 0:
+                self.res_combo.insertItem(0, native)
+            self.res_combo.setCurrentText(native)
+        if "density" in properties:
+            self.dpi_spin.setValue(properties["density"])
+
     def get_settings(self):
         return {
             "resolution": self.res_combo.currentText(),
@@ -0,0 +1,185 @@
+"""
+iOS Session Dialog for MeCast.
+Non-modal window shown while the supervised uxplay receivers run: one panel
+per receiver with live state, restart count, downtime and uxplay's CPU and
+memory use and its own stop button, plus a button to add another receiver.
+"""
+
+import threading
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
+                             QLabel, QTextEdit, QGroupBox, QMessageBox)
+from PyQt6.QtCore import pyqtSignal
+from receivers.ios_receiver import UXPLAY_PROFILES
+from utils.telemetry import telemetry
+
+STATE_LABELS = {
+    "idle": "⏸️ Bekliyor",
+    "starting": "⏳ Başlatılıyor...",
+    "ready": "✅ Hazır - iOS cihazınızdan Ekran Yansıtma > '{name}' seçin",
+    "restarting": "🔄 Yeniden başlatılıyor...",
+    "gave_up": "❌ Alıcı tekrar tekrar çöktü, durduruldu",
+    "stopped": "⏹️ Durduruldu",
+}
+
+
+class IosReceiverPanel(QGroupBox):
+    """State, metrics and controls of a single supervised receiver."""
+
+    def __init__(self, name, supervisor, pool, run_in_background, parent=None):
+        receiver = supervisor.receiver
+        super().__init__(f"{name} (port {receiver.port}-{receiver.port + 2})", parent)
+        self.name = name
+        self.supervisor = supervisor
+        self.pool = pool
+        self.run_in_background = run_in_background
+        self.telemetry_sample = None
+        self.init_ui()
+        self.update_status()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.state_label = QLabel()
+        self.state_label.setWordWrap(True)
+        self.state_label.setStyleSheet("font-size: 14px; font-weight: bold;")
+        layout.addWidget(self.state_label)
+
+        self.metrics_label = QLabel()
+        self.metrics_label.setStyleSheet("color: gray;")
+        layout.addWidget(self.metrics_label)
+
+        self.event_log = QTextEdit()
+        self.event_log.setReadOnly(True)
+        self.event_log.setMaximumHeight(90)
+        layout.addWidget(self.event_log)
+
+        buttons_layout = QHBoxLayout()
+        self.btn_restart = QPushButton("Yeniden Başlat")
+        self.btn_restart.clicked.connect(self.restart_receiver)
+        self.btn_restart.setEnabled(False)
+        buttons_layout.addWidget(self.btn_restart)
+
+        self.btn_stop = QPushButton("Durdur")
+        self.btn_stop.clicked.connect(self.stop_receiver)
+        buttons_layout.addWidget(self.btn_stop)
+        layout.addLayout(buttons_layout)
+
+    def on_event(self, event, message):
+        """Log the event and refresh state/metrics."""
+        if message:
+            self.event_log.append(message)
+        self.update_status()
+
+    def update_status(self):
+        state = self.supervisor.state
+        self.state_label.setText(STATE_LABELS.get(state, state).format(name=self.name))
+        self.btn_restart.setEnabled(state == "gave_up")
+        self.btn_stop.setEnabled(state != "stopped")
+
+        metrics = self.supervisor.metrics
+        profile = UXPLAY_PROFILES[self.supervisor.receiver.profile]["label"]
+        parts = [f"Profil: {profile}",
+                 f"Yeniden başlatma: {metrics['restarts']}",
+                 f"Toplam kesinti: {metrics['downtime']:.1f} sn"]
+        if metrics["last_ready_latency"] is not None:
+            parts.append(f"Hazır olma: {metrics['last_ready_latency'] * 1000:.0f} ms")
+        if self.telemetry_sample and state == "ready":
+            parts.append(f"%{self.telemetry_sample['cpu_percent']:.0f} CPU, "
+                         f"{self.telemetry_sample['rss'] / 1024 ** 2:.0f} MB")
+        self.metrics_label.setText(" · ".join(parts))
+
+    def on_telemetry(self, latest):
+        self.telemetry_sample = latest.get(self.supervisor.receiver.telemetry_name)
+        self.update_status()
+
+    def restart_receiver(self):
+        """Manual restart after the crash-loop limit was hit."""
+        # Eski işlem temizliği ve güvenlik duvarı (sudo) arayüzü dondurmasın
+        self.btn_restart.setEnabled(False)
+        self.run_in_background(self.name, self.supervisor.start)
+
+    def stop_receiver(self):
+        # Sadece bu alıcı durur, diğerleri çalışmaya devam eder; uxplay'in
+        # kapanması beklenirken arayüz donmasın
+        self.btn_stop.setEnabled(False)
+        self.run_in_background(self.name, lambda: self.pool.remove(self.name))
+
+
+class IosSessionDialog(QDialog):
+    # Supervisor events arrive on worker threads; queued onto the GUI thread
+    supervisor_event = pyqtSignal(str, str, str)
+    telemetry_updated = pyqtSignal(dict)
+
+    def __init__(self, pool, profile, parent=None):
+        super().__init__(parent)
+        self.pool = pool
+        self.profile = profile
+        self.panels = {}
+        self.setWindowTitle("MeCast - iOS Mirroring")
+        self.setModal(False)
+        self.resize(480, 360)
+
+        self.init_ui()
+        self.supervisor_event.connect(self.on_supervisor_event)
+        pool.add_listener(self.supervisor_event.emit)
+        self.telemetry_updated.connect(self.on_telemetry_updated)
+        self._telemetry_listener = self.telemetry_updated.emit
+        telemetry.add_listener(self._telemetry_listener)
+        # Closing the window (X or Esc) stops every receiver
+        self.finished.connect(self.pool.stop_all)
+        self.finished.connect(lambda: telemetry.remove_listener(self._telemetry_listener))
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.panels_layout = QVBoxLayout()
+        layout.addLayout(self.panels_layout)
+        layout.addStretch()
+
+        buttons_layout = QHBoxLayout()
+        self.btn_add = QPushButton("Alıcı Ekle")
+        self.btn_add.setToolTip("Ayrı bir ad ve port bloğuyla yeni bir AirPlay alıcısı başlatır")
+        self.btn_add.clicked.connect(self.add_receiver)
+        buttons_layout.addWidget(self.btn_add)
+
+        self.btn_close = QPushButton("Tümünü Durdur")
+        self.btn_close.clicked.connect(self.reject)
+        buttons_layout.addWidget(self.btn_close)
+        layout.addLayout(buttons_layout)
+
+    def add_receiver(self):
+        # Port taraması, eski işlem temizliği ve güvenlik duvarı arka planda
+        self.run_in_background("", lambda: self.pool.add(self.profile))
+
+    def run_in_background(self, name, action):
+        """Run a blocking pool/supervisor call off the GUI thread; a failure
+        comes back as an "error" event through supervisor_event."""
+        def run():
+            try:
+                action()
+            except Exception as e:
+                self.supervisor_event.emit(name, "error", f"Hata: {e}")
+        threading.Thread(target=run, daemon=True).start()
+
+    def on_supervisor_event(self, name, event, message):
+        panel = self.panels.get(name)
+        if event == "error" and panel is None:
+            # Alıcı hiç oluşturulamadı (ör. sınır dolu, boş port bloğu yok)
+            QMessageBox.warning(self, "Uyarı", message)
+            return
+        supervisor = self.pool.supervisors().get(name)
+        if panel is not None and supervisor is not None and panel.supervisor is not supervisor:
+            # Ad, durdurulmuş bir alıcıdan yeni alıcıya geçti
+            panel.deleteLater()
+            panel = None
+        if panel is None:
+            if supervisor is None:
+                return
+            panel = IosReceiverPanel(name, supervisor, self.pool, self.run_in_background, self)
+            self.panels[name] = panel
+            self.panels_layout.addWidget(panel)
+        panel.on_event(event, message)
+
+    def on_telemetry_updated(self, latest):
+        for panel in self.panels.values():
+            panel.on_telemetry(latest)
@@ -4,7 +4,8 @@ Handles dependency checks and setup instructions for iOS mirroring.
 """
 
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
-                             QLabel, QMessageBox, QTextEdit, QProgressBar)
+                             QLabel, QMessageBox, QTextEdit, QProgressBar, QComboBox,
+                             QSpinBox)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont
 import platform
@@ -17,7 +18,7 @@ class FirewallSetupThread(QThread):
     def run(self):
         try:
             from utils.system_utils import open_firewall_ports
-            success, message = open_firewall_ports()
+            success, message = open_firewall_ports(force=True)
             self.finished.emit(success, message)
         except Exception as e:
             self.finished.emit(False, str(e))
@@ -29,6 +30,8 @@ class IosSetupDialog(QDialog):
         self.setWindowTitle("MeCast - iOS Kurulumu")
         self.setFixedSize(550, 400)
         self.setup_complete = False
+        self.selected_profile = None
+        self.selected_count = 1
         
         self.init_ui()
         self.check_dependencies()
@@ -51,6 +54,25 @@ class IosSetupDialog(QDialog):
         self.status_text.setObjectName("status_area")
         layout.addWidget(self.status_text)
 
+        # Receiver profile
+        from receivers.ios_receiver import UXPLAY_PROFILES, DEFAULT_PROFILE
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("Profil:"))
+        self.profile_combo = QComboBox()
+        for key, profile in UXPLAY_PROFILES.items():
+            self.profile_combo.addItem(profile["label"], key)
+            self.profile_combo.setItemData(self.profile_combo.count() - 1, profile["description"],
+                                           Qt.ItemDataRole.ToolTipRole)
+        self.profile_combo.setCurrentIndex(self.profile_combo.findData(DEFAULT_PROFILE))
+        profile_layout.addWidget(self.profile_combo, 1)
+        profile_layout.addWidget(QLabel("Alıcı sayısı:"))
+        self.count_spin = QSpinBox()
+        from receivers.ios_receiver_pool import MAX_RECEIVERS
+        self.count_spin.setRange(1, MAX_RECEIVERS)
+        self.count_spin.setToolTip("Aynı anda yansıtma yapabilecek iOS cihazı sayısı")
+        profile_layout.addWidget(self.count_spin)
+        layout.addLayout(profile_layout)
+
         # Progress bar
         self.progress = QProgressBar()
         self.progress.setVisible(False)
@@ -139,7 +161,9 @@ class IosSetupDialog(QDialog):
             self.log("ℹ️ Manuel olarak portları açmanız gerekebilir.")
 
     def start_mirroring(self):
-        """Start iOS mirroring."""
+        """Start iOS mirroring with the selected profile."""
+        self.selected_profile = self.profile_combo.currentData()
+        self.selected_count = self.count_spin.value()
         self.accept()
 
     def apply_styles(self):
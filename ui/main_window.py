@@ -1,30 +1,98 @@
 import sys
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QLabel, QPushButton, QListWidget, QMessageBox, 
-                             QComboBox, QGroupBox, QCheckBox)
-from PyQt6.QtCore import QTimer, Qt
+                             QLabel, QPushButton, QListView, QMessageBox, 
+                             QComboBox, QGroupBox, QCheckBox, QSpinBox,
+                             QAbstractItemView, QFileDialog)
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from utils.adb_manager import AdbManager
-from receivers.scrcpy_wrapper import ScrcpyWrapper
+from ui.device_list_model import DeviceListModel, DeviceWatcher, SerialRole
+from receivers.session_manager import MirrorSessionManager
+from receivers.adaptive_controller import AdaptiveBitrateController
+from receivers.encoder_probe import probe_device
+from receivers.preset_costs import preset_costs, cost_key
+from receivers.scrcpy_wrapper import SCRCPY_PRESETS, DEFAULT_PRESET
+from utils.known_devices import known_devices, reconnect_all
+from utils.device_props import device_properties
+from utils.telemetry import telemetry, summarize_by_kind
 from ui.dex_config_dialog import DexConfigDialog
-from ui.qr_dialog import QrDialog
+
+class EncoderProbeThread(QThread):
+    """Seçili cihazların kodlayıcılarını arka planda test eder."""
+    progress = pyqtSignal(str)
+    finished_probe = pyqtSignal(str)
+
+    def __init__(self, serials):
+        super().__init__()
+        self.serials = serials
+
+    def run(self):
+        summary = []
+        for serial in self.serials:
+            choice = probe_device(serial, progress=lambda msg, s=serial: self.progress.emit(f"{s}: {msg}"))
+            if choice:
+                summary.append(f"{serial}: {choice['codec']} / {choice['encoder']} "
+                               f"({choice['fps']:.0f} fps @ {choice['bitrate']})")
+            else:
+                summary.append(f"{serial}: çalışan kodlayıcı bulunamadı")
+        self.finished_probe.emit("\n".join(summary))
+
+# Sabit çözünürlük seçenekleri; seçili cihazın doğal çözünürlüğü sona eklenir
+RESOLUTION_ITEMS = ["Varsayılan", "720", "1080"]
+
+class ReconnectThread(QThread):
+    """Daha önce eşleşmiş kablosuz cihazlara açılışta paralel olarak yeniden bağlanır."""
+    finished_reconnect = pyqtSignal(int, int)
+
+    def run(self):
+        total = len(known_devices.entries())
+        if total:
+            self.finished_reconnect.emit(reconnect_all(), total)
 
 class MainWindow(QMainWindow):
+    session_event = pyqtSignal(str, str, str)
+    session_log_event = pyqtSignal(str, dict)
+    quality_changed = pyqtSignal(str, str, int)
+    device_props_ready = pyqtSignal(str)
+    telemetry_updated = pyqtSignal(dict)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("MeCast - Telefon Yansıtıcı")
         self.setMinimumSize(500, 400)
         
         self.adb_manager = AdbManager()
-        self.scrcpy = ScrcpyWrapper()
+        self.sessions = MirrorSessionManager()
+        self.adaptive = AdaptiveBitrateController(self.sessions)
         
         self.init_ui()
         
-        # Cihazları periyodik olarak kontrol et
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh_devices)
-        self.timer.start(2000) # 2 saniyede bir
+        # Oturum olayları başlatma thread'inden gelir, GUI thread'ine kuyrukla
+        self.session_event.connect(self.on_session_event)
+        self.sessions.add_listener(self.session_event.emit)
+        self.session_log_event.connect(self.on_session_log_event)
+        self.sessions.add_log_listener(self.session_log_event.emit)
+        self.quality_changed.connect(self.on_quality_changed)
+        self.adaptive.add_listener(self.quality_changed.emit)
+        self.device_props_ready.connect(self.on_device_props_ready)
+        # Örnekleyici thread'inden gelen ölçümler durum çubuğunda gösterilir
+        self.telemetry_updated.connect(self.on_telemetry_updated)
+        # Aynı nesne closeEvent'te kaldırılır (her erişimde yeni bağlı sinyal oluşur)
+        self._telemetry_listener = self.telemetry_updated.emit
+        telemetry.add_listener(self._telemetry_listener)
         
-        self.refresh_devices()
+        # Cihaz değişiklikleri ADB sunucusundan anlık olarak itilir (polling yok).
+        # Watcher arka planda çalışır, sinyaller GUI thread'ine kuyruklanır.
+        self.device_watcher = DeviceWatcher(self)
+        self.device_watcher.devices_changed.connect(self.update_device_list)
+        self.device_watcher.error.connect(self.statusBar().showMessage)
+        
+        if self.adb_manager.is_adb_installed():
+            self.device_watcher.start()
+            self.reconnect_thread = ReconnectThread(self)
+            self.reconnect_thread.finished_reconnect.connect(self.on_reconnect_finished)
+            self.reconnect_thread.start()
+        else:
+            self.statusBar().showMessage("Hata: ADB yüklü değil!")
 
     def init_ui(self):
         central_widget = QWidget()
@@ -41,9 +109,19 @@ class MainWindow(QMainWindow):
         device_group = QGroupBox("Bağlı Cihazlar")
         device_layout = QVBoxLayout()
         
-        self.device_list = QListWidget()
+        self.device_model = DeviceListModel(self)
+        self.device_list = QListView()
+        self.device_list.setModel(self.device_model)
+        self.device_list.setUniformItemSizes(True)
+        self.device_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.device_list.selectionModel().currentChanged.connect(self.show_device_info)
         device_layout.addWidget(self.device_list)
         
+        # Seçili cihazın önbellekteki bilgileri (ekran, Android sürümü)
+        self.device_info_label = QLabel("")
+        self.device_info_label.setStyleSheet("color: gray;")
+        device_layout.addWidget(self.device_info_label)
+        
         refresh_btn = QPushButton("Listeyi Yenile")
         refresh_btn.clicked.connect(self.refresh_devices)
         device_layout.addWidget(refresh_btn)
@@ -52,6 +130,11 @@ class MainWindow(QMainWindow):
         qr_btn.clicked.connect(self.open_qr_dialog)
         device_layout.addWidget(qr_btn)
         
+        self.probe_btn = QPushButton("Kodlayıcı Testi")
+        self.probe_btn.setToolTip("Cihazın kodlayıcılarını dener, en hızlısını sonraki oturumlar için hatırlar")
+        self.probe_btn.clicked.connect(self.probe_encoders)
+        device_layout.addWidget(self.probe_btn)
+        
         device_group.setLayout(device_layout)
         layout.addWidget(device_group)
         
@@ -61,17 +144,44 @@ class MainWindow(QMainWindow):
         
         settings_layout.addWidget(QLabel("Bitrate:"))
         self.bitrate_combo = QComboBox()
-        self.bitrate_combo.addItems(["Varsayılan", "2M", "4M", "8M", "16M"])
+        self.bitrate_combo.addItems(["Varsayılan", "Uyarlanabilir", "2M", "4M", "8M", "16M"])
+        self.bitrate_combo.setItemData(1, "Wi-Fi'de ölçülen FPS'e göre bitrate ve çözünürlüğü ayarlar",
+                                       Qt.ItemDataRole.ToolTipRole)
         settings_layout.addWidget(self.bitrate_combo)
         
         settings_layout.addWidget(QLabel("Çözünürlük:"))
         self.res_combo = QComboBox()
-        self.res_combo.addItems(["Varsayılan", "720", "1080"])
+        self.res_combo.addItems(RESOLUTION_ITEMS)
         settings_layout.addWidget(self.res_combo)
         
+        settings_layout.addWidget(QLabel("Ön Ayar:"))
+        self.preset_combo = QComboBox()
+        for key, preset in SCRCPY_PRESETS.items():
+            self.preset_combo.addItem(preset["label"], key)
+        self.preset_combo.setCurrentIndex(self.preset_combo.findData(DEFAULT_PRESET))
+        self.preset_combo.currentIndexChanged.connect(self.update_preset_costs)
+        settings_layout.addWidget(self.preset_combo)
+        
         self.screen_off_check = QCheckBox("Ekranı Kapat")
         settings_layout.addWidget(self.screen_off_check)
         
+        self.record_check = QCheckBox("Kaydet")
+        self.record_check.setToolTip("Oturumu parçalar halinde kaydeder; disk bütçesi dolunca en eski parçalar silinir")
+        settings_layout.addWidget(self.record_check)
+        
+        self.record_only_check = QCheckBox("Sadece Kayıt")
+        self.record_only_check.setToolTip("Pencere açmadan kaydeder; bilgisayar görüntüyü çözüp çizmez")
+        settings_layout.addWidget(self.record_only_check)
+        self.record_only_check.toggled.connect(self.update_preset_costs)
+        self.update_preset_costs()
+        
+        settings_layout.addWidget(QLabel("Maks. Oturum:"))
+        self.max_sessions_spin = QSpinBox()
+        self.max_sessions_spin.setRange(1, 64)
+        self.max_sessions_spin.setValue(self.sessions.max_sessions)
+        self.max_sessions_spin.valueChanged.connect(self.set_max_sessions)
+        settings_layout.addWidget(self.max_sessions_spin)
+        
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
         
@@ -97,50 +207,149 @@ class MainWindow(QMainWindow):
         layout.addLayout(btn_layout)
         
         # Durum Çubuğu
+        self.telemetry_label = QLabel()
+        self.telemetry_label.setStyleSheet("color: gray;")
+        self.statusBar().addPermanentWidget(self.telemetry_label)
+        self.telemetry_btn = QPushButton("Telemetri")
+        self.telemetry_btn.setFlat(True)
+        self.telemetry_btn.setToolTip("Alt işlemlerin CPU/bellek/G-Ç ölçümlerini JSON veya Prometheus olarak kaydeder")
+        self.telemetry_btn.clicked.connect(self.export_telemetry)
+        self.telemetry_btn.setEnabled(telemetry.enabled)
+        self.statusBar().addPermanentWidget(self.telemetry_btn)
         self.statusBar().showMessage("Hazır")
 
     def refresh_devices(self):
-        if not self.adb_manager.is_adb_installed():
-            self.statusBar().showMessage("Hata: ADB yüklü değil!")
-            return
+        self.device_watcher.refresh()
 
-        devices = self.adb_manager.get_devices()
-        current_row = self.device_list.currentRow()
-        
-        self.device_list.clear()
-        for device in devices:
-            item_text = f"{device['model']} ({device['serial']}) - {device['status']}"
-            self.device_list.addItem(item_text)
+    def update_device_list(self, devices):
+        # Model sadece değişen satırları günceller; seçim satırla birlikte korunur
+        self.device_model.update_devices(devices)
+        # Yeni görülen cihazların özellikleri arka planda tek adb çağrısıyla okunur
+        device_properties.prefetch([d['serial'] for d in devices if d['status'] == 'device'],
+                                   on_ready=self.device_props_ready.emit)
             
-        if self.device_list.count() > 0:
-            if current_row >= 0 and current_row < self.device_list.count():
-                self.device_list.setCurrentRow(current_row)
-            else:
-                self.device_list.setCurrentRow(0)
+        if self.device_model.rowCount() > 0 and not self.device_list.currentIndex().isValid():
+            self.device_list.setCurrentIndex(self.device_model.index(0))
         
         self.statusBar().showMessage(f"{len(devices)} cihaz bulundu.")
 
+    def on_device_props_ready(self, serial):
+        if self.device_list.currentIndex().data(SerialRole) == serial:
+            self.show_device_info(self.device_list.currentIndex())
+
+    def show_device_info(self, index, previous=None):
+        # Sadece önbellek okunur, adb çağrılmaz
+        props = device_properties.get(index.data(SerialRole)) if index.isValid() else None
+        
+        # Önceki cihazın doğal çözünürlük seçeneğini kaldır
+        while self.res_combo.count() > len(RESOLUTION_ITEMS):
+            self.res_combo.removeItem(self.res_combo.count() - 1)
+        
+        if not props:
+            self.device_info_label.setText("")
+            return
+        
+        parts = []
+        if "release" in props:
+            parts.append(f"Android {props['release']} (SDK {props.get('sdk', '?')})")
+        if "width" in props and "height" in props:
+            native = str(max(props["width"], props["height"]))
+            parts.append(f"{props['width']}x{props['height']}")
+            if self.res_combo.findText(native) < 0:
+                self.res_combo.addItem(native)
+                self.res_combo.setItemData(self.res_combo.count() - 1, "Cihazın doğal çözünürlüğü",
+                                           Qt.ItemDataRole.ToolTipRole)
+        if "density" in props:
+            parts.append(f"{props['density']} dpi")
+        self.device_info_label.setText(" · ".join(parts))
+
+    def on_reconnect_finished(self, connected, total):
+        self.statusBar().showMessage(f"Kayıtlı kablosuz cihazlar: {connected}/{total} yeniden bağlandı.")
+
     def open_qr_dialog(self):
+        # zeroconf/qrcode sadece QR eşleştirme açıldığında yüklenir
+        from ui.qr_dialog import QrDialog
         dialog = QrDialog(self)
         dialog.exec()
         self.refresh_devices()
 
-    def start_mirroring(self, dex_mode=False):
-        current_item = self.device_list.currentItem()
-        if not current_item:
+    def selected_serials(self):
+        indexes = self.device_list.selectionModel().selectedIndexes()
+        if not indexes and self.device_list.currentIndex().isValid():
+            indexes = [self.device_list.currentIndex()]
+        return [index.data(SerialRole) for index in sorted(indexes, key=lambda i: i.row())]
+
+    def probe_encoders(self):
+        serials = self.selected_serials()
+        if not serials:
             QMessageBox.warning(self, "Uyarı", "Lütfen bir cihaz seçin.")
             return
-            
-        # Seçili metinden seri numarasını ayıkla (basitçe parantez içini al)
-        text = current_item.text()
+        self.probe_btn.setEnabled(False)
+        self.probe_thread = EncoderProbeThread(serials)
+        self.probe_thread.progress.connect(self.statusBar().showMessage)
+        self.probe_thread.finished_probe.connect(self.on_probe_finished)
+        self.probe_thread.start()
+
+    def on_probe_finished(self, summary):
+        self.probe_btn.setEnabled(True)
+        self.statusBar().showMessage("Kodlayıcı testi tamamlandı.")
+        QMessageBox.information(self, "Kodlayıcı Testi", summary)
+
+    def update_preset_costs(self):
+        """Ön ayar ipuçlarında ölçülen scrcpy CPU/RSS maliyetini gösterir."""
+        record_only = self.record_only_check.isChecked()
+        for i in range(self.preset_combo.count()):
+            key = self.preset_combo.itemData(i)
+            cost = preset_costs.get(cost_key(key, record_only))
+            if cost:
+                measured = (f"Ölçülen: %{cost['cpu_percent']:.0f} CPU, {cost['rss_mb']:.0f} MB RSS "
+                            f"({cost['sessions']} oturum)")
+            else:
+                measured = "Henüz ölçülmedi"
+            self.preset_combo.setItemData(i, f"{SCRCPY_PRESETS[key]['description']}\n{measured}",
+                                          Qt.ItemDataRole.ToolTipRole)
+        self.preset_combo.setToolTip(self.preset_combo.currentData(Qt.ItemDataRole.ToolTipRole))
+
+    def on_telemetry_updated(self, latest):
+        parts = []
+        for kind, total in summarize_by_kind(latest).items():
+            count = f" ×{total['count']}" if total["count"] > 1 else ""
+            parts.append(f"{kind}{count}: %{total['cpu_percent']:.0f} CPU · {total['rss'] / 1024 ** 2:.0f} MB"
+                         f" · işlem G/Ç {total['io_read_rate'] / 1024 ** 2:.1f} MB/s")
+        if not parts:
+            # Çalışan işlem yok: biten son oturumun özeti gösterilir
+            finished = telemetry.finished()
+            if finished:
+                last = finished[-1]
+                parts.append(f"Son: {last['name']} ({last['seconds']:.0f} sn): ort. %{last['cpu_percent']:.0f} CPU"
+                             f" · tepe {last['peak_rss'] / 1024 ** 2:.0f} MB")
+        self.telemetry_label.setText(" | ".join(parts))
+
+    def export_telemetry(self):
+        path, selected = QFileDialog.getSaveFileName(self, "Telemetriyi Kaydet", "mecast-telemetry.json",
+                                                     "JSON (*.json);;Prometheus (*.prom)")
+        if not path:
+            return
+        if not path.endswith((".json", ".prom")):
+            path += ".prom" if selected.startswith("Prometheus") else ".json"
         try:
-            serial = text.split('(')[1].split(')')[0]
-        except IndexError:
-            QMessageBox.critical(self, "Hata", "Seri numarası alınamadı.")
+            telemetry.export(path)
+            self.statusBar().showMessage(f"Telemetri kaydedildi: {path}")
+        except OSError as e:
+            QMessageBox.warning(self, "Uyarı", f"Telemetri kaydedilemedi: {e}")
+
+    def set_max_sessions(self, value):
+        self.sessions.max_sessions = value
+
+    def start_mirroring(self, dex_mode=False):
+        serials = self.selected_serials()
+        if not serials:
+            QMessageBox.warning(self, "Uyarı", "Lütfen bir cihaz seçin.")
             return
 
         bitrate = self.bitrate_combo.currentText()
-        if bitrate == "Varsayılan":
+        adaptive = bitrate == "Uyarlanabilir"
+        if bitrate in ("Varsayılan", "Uyarlanabilir"):
             bitrate = None
             
         max_size = self.res_combo.currentText()
@@ -154,7 +363,7 @@ class MainWindow(QMainWindow):
         turn_screen_off = self.screen_off_check.isChecked()
 
         if dex_mode:
-            dialog = DexConfigDialog(self)
+            dialog = DexConfigDialog(self, properties=device_properties.get(serials[0]))
             if dialog.exec():
                 settings = dialog.get_settings()
                 # Çözünürlük ve DPI birleştiriliyor: 1920x1080/160
@@ -163,27 +372,66 @@ class MainWindow(QMainWindow):
             else:
                 return # Kullanıcı iptal etti
 
-        success, message = self.scrcpy.start_mirroring(
-            serial, 
-            bitrate, 
-            max_size, 
-            new_display=new_display,
-            turn_screen_off=turn_screen_off,
-            fullscreen=fullscreen
-        )
-        
-        if success:
-            mode_text = "DeX Modu" if dex_mode else "Yansıtma"
-            self.statusBar().showMessage(f"{mode_text} başlatıldı: {serial}")
-            self.start_btn.setEnabled(False)
-            self.dex_btn.setEnabled(False)
-            self.stop_btn.setEnabled(True)
+        options = {
+            "bitrate": bitrate,
+            "max_size": max_size,
+            "new_display": new_display,
+            "turn_screen_off": turn_screen_off,
+            "fullscreen": fullscreen,
+            "preset": self.preset_combo.currentData(),
+            "record": self.record_check.isChecked(),
+            "record_only": self.record_only_check.isChecked()
+        }
+
+        errors = []
+        for serial in serials:
+            session_options = options
+            if adaptive:
+                # Sadece Wi-Fi cihazları uyarlanır, USB'de seçenekler aynen kalır
+                session_options = self.adaptive.session_options(serial, options)
+            # Başlatmalar yöneticide sıraya alınır ve kademeli olarak çalıştırılır
+            queued, message = self.sessions.start(serial, **session_options)
+            if not queued:
+                if adaptive:
+                    self.adaptive.untrack(serial)
+                errors.append(message)
+        
+        if errors:
+            QMessageBox.warning(self, "Uyarı", "\n".join(errors))
+
+    def stop_mirroring(self):
+        # Seçili cihazlardan oturumu olanları durdur, hiçbiri yoksa hepsini
+        serials = [s for s in self.selected_serials() if self.sessions.is_active(s)]
+        if serials:
+            for serial in serials:
+                self.sessions.stop(serial)
         else:
+            self.sessions.stop_all()
+
+    def on_session_event(self, serial, event, message):
+        if event in ("queued", "starting"):
+            self.statusBar().showMessage(f"Başlatılıyor: {serial}")
+        elif event == "started":
+            self.statusBar().showMessage(f"Yansıtma başlatıldı: {serial} ({message})")
+        elif event == "stopped":
+            self.statusBar().showMessage(f"Yansıtma durduruldu: {serial}")
+            # Durdurulan oturumun ölçümü ön ayar maliyetlerine eklenmiş olabilir
+            self.update_preset_costs()
+        elif event == "failed":
             QMessageBox.critical(self, "Hata", message)
+        self.stop_btn.setEnabled(self.sessions.session_count() > 0)
 
-    def stop_mirroring(self):
-        self.scrcpy.stop_mirroring()
-        self.statusBar().showMessage("Yansıtma durduruldu.")
-        self.start_btn.setEnabled(True)
-        self.dex_btn.setEnabled(True)
-        self.stop_btn.setEnabled(False)
+    def on_session_log_event(self, serial, event):
+        if event["type"] == "error":
+            self.statusBar().showMessage(f"{serial}: {event['line']}")
+
+    def on_quality_changed(self, serial, bitrate, max_size):
+        self.statusBar().showMessage(f"Kalite ayarlandı ({serial}): {bitrate}, {max_size}p")
+
+    def closeEvent(self, event):
+        telemetry.remove_listener(self._telemetry_listener)
+        self.device_watcher.stop()
+        # Bağlantı denemeleri kısa zaman aşımlıdır, thread'in bitmesini bekle
+        if getattr(self, "reconnect_thread", None):
+            self.reconnect_thread.wait()
+        event.accept()
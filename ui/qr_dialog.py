@@ -3,9 +3,9 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QPushButton,
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from utils.qr_manager import QrManager
+from utils.tracing import tracer
 
 class QrWorker(QThread):
-    qr_ready = pyqtSignal(object)
     pairing_success = pyqtSignal(str)
     pairing_error = pyqtSignal(str)
 
@@ -15,30 +15,18 @@ class QrWorker(QThread):
 
     def run(self):
         try:
-            print("QrWorker: Başlıyor...")
-            # QR içeriğini oluştur
-            data = self.qr_manager.generate_qr_content()
-            print("QrWorker: QR içerik üretildi.")
-            
-            img = self.qr_manager.get_qr_image(data)
-            print("QrWorker: QR resim üretildi.")
-            
-            self.qr_ready.emit(img)
-            print("QrWorker: QR sinyali gönderildi.")
-            
-            # Eşleştirmeyi bekle
-            print("QrWorker: Eşleştirme bekleniyor...")
+            # Eşleştirmeyi bekle (QR görüntüsü QrManager'da önceden hazırlandı);
+            # aşama süreleri qr.pairing span'i altında izlenir
             success, msg = self.qr_manager.wait_for_pairing()
-            print(f"QrWorker: Eşleştirme bitti. Durum: {success}, Mesaj: {msg}")
-            
+
             if success:
                 self.pairing_success.emit(msg)
             else:
                 self.pairing_error.emit(msg)
         except Exception as e:
             import traceback
-            traceback.print_exc()
-            print(f"QrWorker Hata: {e}")
+            tracer.event("qr.worker.error", f"QrWorker Hata: {e}", level="error",
+                         traceback=traceback.format_exc())
             self.pairing_error.emit(str(e))
 
 class QrDialog(QDialog):
@@ -52,6 +40,7 @@ class QrDialog(QDialog):
         self.worker = None
         
         self.init_ui()
+        self.show_qr(self.qr_manager.qr_image)
         self.start_pairing_process()
 
     def init_ui(self):
@@ -82,14 +71,13 @@ class QrDialog(QDialog):
 
     def start_pairing_process(self):
         self.worker = QrWorker(self.qr_manager)
-        self.worker.qr_ready.connect(self.show_qr)
         self.worker.pairing_success.connect(self.on_success)
         self.worker.pairing_error.connect(self.on_error)
         self.worker.start()
 
     def show_qr(self, img):
-        pixmap = QPixmap.fromImage(img)
-        self.qr_label.setPixmap(pixmap.scaled(300, 300, Qt.AspectRatioMode.KeepAspectRatio))
+        # Görüntü zaten hedef boyutta, yeniden ölçekleme yok
+        self.qr_label.setPixmap(QPixmap.fromImage(img))
         self.qr_label.setText("")
         self.status_label.setText("QR Kodu Taratın...")
 
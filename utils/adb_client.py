@@ -0,0 +1,188 @@
+"""
+Native ADB host-protocol client for MeCast.
+Talks to the ADB server socket directly instead of spawning `adb` processes,
+and keeps a push-based subscription to device changes (host:track-devices-l).
+"""
+
+import socket
+import subprocess
+import threading
+from utils.tool_registry import tool_registry
+from utils.tracing import tracer
+
+ADB_HOST = "127.0.0.1"
+ADB_PORT = 5037
+
+
+class AdbProtocolError(Exception):
+    """Raised when the ADB server answers with FAIL or an unexpected reply."""
+
+
+def parse_device_lines(text):
+    """
+    `adb devices -l` / host:devices-l çıktısını ayrıştırır.
+    Returns:
+        list: [{'serial': '123456', 'status': 'device', 'model': 'Pixel_6'}]
+    """
+    devices = []
+    for line in text.splitlines():
+        # Örnek satır: "SERIAL_NO device product:model model:Pixel_6 device:oriole transport_id:1"
+        parts = line.split()
+        if len(parts) < 2 or line.startswith("List of devices"):
+            continue
+
+        model = "Unknown"
+        for part in parts[2:]:
+            if part.startswith("model:"):
+                model = part.split(":", 1)[1]
+
+        devices.append({
+            'serial': parts[0],
+            'status': parts[1],
+            'model': model
+        })
+    return devices
+
+
+class AdbClient:
+    """Minimal client for the ADB server's smart-socket host protocol."""
+
+    def __init__(self, host=ADB_HOST, port=ADB_PORT, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+    def _connect(self):
+        return socket.create_connection((self.host, self.port), timeout=self.timeout)
+
+    @staticmethod
+    def _recv_exact(sock, size):
+        data = b""
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("ADB server closed the connection")
+            data += chunk
+        return data
+
+    def _read_message(self, sock):
+        """Read one length-prefixed (4 hex digits) message."""
+        length = int(self._recv_exact(sock, 4), 16)
+        return self._recv_exact(sock, length).decode("utf-8", errors="replace")
+
+    def _request(self, sock, service):
+        """Send a host service request and check the OKAY/FAIL status."""
+        payload = service.encode("utf-8")
+        sock.sendall(b"%04x" % len(payload) + payload)
+        status = self._recv_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise AdbProtocolError(self._read_message(sock))
+        raise AdbProtocolError(f"Unexpected ADB status: {status!r}")
+
+    def _query(self, service):
+        with self._connect() as sock:
+            self._request(sock, service)
+            return self._read_message(sock)
+
+    def version(self):
+        """Return the ADB server's protocol version number."""
+        return int(self._query("host:version"), 16)
+
+    def devices(self):
+        """One-shot device list (equivalent of `adb devices -l`)."""
+        return parse_device_lines(self._query("host:devices-l"))
+
+    def track_devices(self, stop_event=None, on_socket=None):
+        """
+        Subscribe to host:track-devices-l and yield the full device list
+        every time the server pushes a change. The first yield is the
+        current state. Blocks between updates.
+        """
+        sock = self._connect()
+        if on_socket:
+            on_socket(sock)
+        try:
+            self._request(sock, "host:track-devices-l")
+            # Updates may be minutes apart, only the handshake has a timeout
+            sock.settimeout(None)
+            while not (stop_event and stop_event.is_set()):
+                yield parse_device_lines(self._read_message(sock))
+        finally:
+            sock.close()
+
+
+class DeviceTracker:
+    """
+    Background thread that keeps a track-devices subscription open and
+    calls `callback(devices)` on every change. Reconnects (and starts the
+    ADB server once) if the server goes away.
+    """
+
+    def __init__(self, callback, client=None, reconnect_delay=1.0, error_callback=None):
+        self.callback = callback
+        self.error_callback = error_callback
+        self.client = client or AdbClient()
+        self.reconnect_delay = reconnect_delay
+        self._stop_event = threading.Event()
+        self._sock = None
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        sock = self._sock
+        if sock:
+            # recv() üzerinde bekleyen thread'i uyandır
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _set_socket(self, sock):
+        self._sock = sock
+
+    def _run(self):
+        server_started = False
+        while not self._stop_event.is_set():
+            try:
+                for devices in self.client.track_devices(self._stop_event, self._set_socket):
+                    self.callback(devices)
+            except ConnectionRefusedError:
+                if not server_started:
+                    server_started = True
+                    if self._start_server():
+                        continue
+                self._report("ADB sunucusuna bağlanılamadı.")
+            except (OSError, AdbProtocolError, ValueError) as e:
+                if self._stop_event.is_set():
+                    break
+                self._report(f"ADB bağlantısı koptu: {e}")
+                # Sunucu yeniden başlatılmış olabilir, cihaz listesini sıfırla
+                self.callback([])
+            finally:
+                self._sock = None
+            self._stop_event.wait(self.reconnect_delay)
+
+    def _start_server(self):
+        try:
+            result = subprocess.run([tool_registry.command('adb'), 'start-server'], capture_output=True, timeout=10)
+            return result.returncode == 0
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return False
+
+    def _report(self, message):
+        if self.error_callback:
+            self.error_callback(message)
+        else:
+            tracer.event("adb.track", message, level="error")
@@ -1,56 +1,149 @@
+import contextvars
 import subprocess
 import re
+import threading
+import time
+from utils.adb_client import AdbClient, AdbProtocolError, parse_device_lines
+from utils.tool_registry import tool_registry
+from utils.tracing import tracer
+
+# Happy-eyeballs: denemeler arasındaki gecikme (RFC 8305 "Connection Attempt Delay")
+ATTEMPT_STAGGER = 0.25
+
+def format_endpoint(address, port):
+    """IPv6 adresleri köşeli parantezle yazılır: [fe80::1]:5555"""
+    return f"[{address}]:{port}" if ":" in address else f"{address}:{port}"
+
+def order_addresses(addresses):
+    """Adres ailelerini dönüşümlü sıralar, IPv4 önce (yerel ağda daha güvenilir)."""
+    v4 = [a for a in addresses if ":" not in a]
+    v6 = [a for a in addresses if ":" in a]
+    ordered = []
+    for i in range(max(len(v4), len(v6))):
+        ordered.extend(group[i] for group in (v4, v6) if i < len(group))
+    return ordered
 
 class AdbManager:
     @staticmethod
     def get_devices():
         """
         Bağlı ADB cihazlarını listeler.
+        Önce ADB sunucusuna doğrudan soket üzerinden sorar; sunucu çalışmıyorsa
+        `adb devices -l` ile (sunucuyu da başlatarak) yedek yola düşer.
         Returns:
             list: Cihaz seri numaraları ve durumlarını içeren sözlük listesi.
                   Örnek: [{'serial': '123456', 'status': 'device', 'model': 'Pixel_6'}]
         """
+        try:
+            return AdbClient().devices()
+        except (OSError, AdbProtocolError, ValueError):
+            pass
+
         try:
             # adb devices -l komutunu çalıştır (timeout eklendi)
-            result = subprocess.run(['adb', 'devices', '-l'], capture_output=True, text=True, timeout=5)
-            output = result.stdout.strip().split('\n')
-            
-            devices = []
-            # İlk satır genellikle "List of devices attached" olur, onu atla
-            for line in output[1:]:
-                if not line.strip():
-                    continue
-                
-                # Örnek satır: "SERIAL_NO device product:model model:Pixel_6 device:oriole transport_id:1"
-                parts = line.split()
-                if len(parts) >= 2:
-                    serial = parts[0]
-                    status = parts[1]
-                    
-                    model = "Unknown"
-                    for part in parts:
-                        if part.startswith("model:"):
-                            model = part.split(":")[1]
-                    
-                    devices.append({
-                        'serial': serial,
-                        'status': status,
-                        'model': model
-                    })
-            return devices
+            result = subprocess.run([tool_registry.command('adb'), 'devices', '-l'], capture_output=True, text=True, timeout=5)
+            return parse_device_lines(result.stdout)
         except FileNotFoundError:
             return []
         except subprocess.TimeoutExpired:
-            print("ADB zaman aşımına uğradı.")
+            tracer.event("adb.devices.timeout", "ADB zaman aşımına uğradı.", level="error")
             return []
         except Exception as e:
-            print(f"ADB Hatası: {e}")
+            tracer.event("adb.devices.error", f"ADB Hatası: {e}", level="error")
             return []
 
+    @staticmethod
+    def race(args_for_endpoint, addresses, port, is_success, timeout=10, stagger=ATTEMPT_STAGGER):
+        """
+        Aynı adb komutunu tüm adreslere karşı yarıştırır (happy-eyeballs):
+        denemeler `stagger` aralıkla başlar, ilk başarılı olan kazanır ve
+        diğerleri öldürülür. Toplam süre `timeout` ile sınırlıdır. Her adres
+        denemesi çağıranın span'i altında bir "adb.attempt" span'i olarak kaydedilir.
+        Returns:
+            tuple: (başarılı mı, kazanan adres veya None, çıktı)
+        """
+        addresses = order_addresses(addresses)
+        if not addresses:
+            return False, None, "Adres yok"
+
+        done = threading.Event()
+        cond = threading.Condition()
+        processes = []
+        outputs = []
+        result = {"finished": 0}
+        deadline = time.monotonic() + timeout
+
+        def run_attempt(address, span):
+            cmd = [tool_registry.command('adb')] + args_for_endpoint(format_endpoint(address, port))
+            with cond:
+                if done.is_set():
+                    return None
+                try:
+                    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+                except OSError as e:
+                    span.end("error", error=str(e))
+                    return f"{address}: {e}"
+                processes.append(process)
+            try:
+                output, _ = process.communicate(timeout=max(0.1, deadline - time.monotonic()))
+                return output
+            except subprocess.TimeoutExpired:
+                process.kill()
+                span.end("timeout")
+                return f"{address}: zaman aşımı"
+            except (OSError, ValueError) as e:
+                span.end("error", error=str(e))
+                return f"{address}: {e}"
+
+        def attempt(index, address):
+            with tracer.span("adb.attempt", address=address, index=index) as span:
+                # Önceki deneme başarılı olursa sonrakiler hiç başlamaz
+                output = None if done.wait(index * stagger) else run_attempt(address, span)
+                with cond:
+                    result["finished"] += 1
+                    if output is None:
+                        span.end("skipped")
+                    else:
+                        outputs.append(output.strip())
+                        if not done.is_set() and is_success(output):
+                            result["address"] = address
+                            done.set()
+                            span.end("ok")
+                        else:
+                            # Kazanan tarafından öldürülen deneme iptal sayılır
+                            span.end("cancelled" if done.is_set() else "failed", output=output.strip())
+                    cond.notify_all()
+
+        for i, address in enumerate(addresses):
+            # Denemeler çağıranın span'inin altına yazılsın diye bağlam kopyalanır
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(attempt, i, address), daemon=True).start()
+
+        with cond:
+            cond.wait_for(lambda: done.is_set() or result["finished"] == len(addresses),
+                          timeout=max(0, deadline - time.monotonic()) + 0.5)
+            # Kazanan belli: diğer denemeleri iptal et
+            done.set()
+            for process in processes:
+                if process.poll() is None:
+                    process.kill()
+            output = "\n".join(outputs)
+        if "address" in result:
+            return True, result["address"], output
+        return False, None, output
+
+    @staticmethod
+    def pair(addresses, port, password, timeout=15):
+        """`adb pair` tüm adreslere paralel olarak denenir."""
+        return AdbManager.race(lambda endpoint: ['pair', endpoint, password], addresses, port,
+                               lambda out: "Successfully paired" in out, timeout=timeout)
+
+    @staticmethod
+    def connect(addresses, port, timeout=5):
+        """`adb connect` tüm adreslere paralel olarak denenir."""
+        return AdbManager.race(lambda endpoint: ['connect', endpoint], addresses, port,
+                               lambda out: "connected to" in out and "failed" not in out, timeout=timeout)
+
     @staticmethod
     def is_adb_installed():
-        try:
-            subprocess.run(['adb', '--version'], capture_output=True)
-            return True
-        except FileNotFoundError:
-            return False
+        return tool_registry.is_available('adb')
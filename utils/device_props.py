@@ -0,0 +1,134 @@
+"""
+Per-device property cache for MeCast.
+Display size, density, Android version, SDK level and build fingerprint
+are collected with a single batched `adb shell` round-trip per device and
+cached by serial (in memory and in device_props.json). A cached entry is
+replaced when a refresh reports a different build fingerprint, so dialogs
+can be pre-filled from the cache without starting any subprocess.
+"""
+
+import re
+import subprocess
+import threading
+from utils.json_cache import JsonCache
+from utils.tool_registry import tool_registry
+from utils.tracing import tracer
+
+# Tek kabuk çağrısında toplanan değerler; her biri bir işaretçi satırıyla ayrılır
+PROPERTY_COMMANDS = [
+    ("size", "wm size"),
+    ("density", "wm density"),
+    ("release", "getprop ro.build.version.release"),
+    ("sdk", "getprop ro.build.version.sdk"),
+    ("fingerprint", "getprop ro.build.fingerprint"),
+]
+MARKER = "__mecast_prop__"
+
+SIZE_LINE = re.compile(r"(Physical|Override) size:\s*(\d+)x(\d+)")
+DENSITY_LINE = re.compile(r"(Physical|Override) density:\s*(\d+)")
+
+
+def batch_command():
+    return "; ".join(f"echo {MARKER}{key}; {command}" for key, command in PROPERTY_COMMANDS)
+
+
+def parse_properties(output):
+    """Split the batched shell output into a property dict (missing values are left out)."""
+    sections = {}
+    key = None
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith(MARKER):
+            key = line[len(MARKER):]
+            sections[key] = []
+        elif key and line:
+            sections[key].append(line)
+
+    props = {}
+    # Override (wm size 1280x720 vb.) varsa cihazın gerçekte kullandığı değer odur
+    sizes = dict((m.group(1), (int(m.group(2)), int(m.group(3))))
+                 for m in map(SIZE_LINE.search, sections.get("size", [])) if m)
+    size = sizes.get("Override") or sizes.get("Physical")
+    if size:
+        props["width"], props["height"] = size
+    densities = dict((m.group(1), int(m.group(2)))
+                     for m in map(DENSITY_LINE.search, sections.get("density", [])) if m)
+    density = densities.get("Override") or densities.get("Physical")
+    if density:
+        props["density"] = density
+    for key in ("release", "fingerprint"):
+        if sections.get(key):
+            props[key] = sections[key][0]
+    if sections.get("sdk") and sections["sdk"][0].isdigit():
+        props["sdk"] = int(sections["sdk"][0])
+    return props
+
+
+def query_properties(serial, timeout=10):
+    """One `adb shell` round-trip; returns the property dict or None."""
+    try:
+        result = subprocess.run([tool_registry.command('adb'), '-s', serial, 'shell', batch_command()],
+                                capture_output=True, text=True, timeout=timeout)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    props = parse_properties(result.stdout)
+    return props if props.get("fingerprint") else None
+
+
+class DevicePropertyCache(JsonCache):
+    """Serial -> property dict, refreshed at most once per run for each device."""
+    FILE_NAME = "device_props.json"
+
+    def __init__(self, path=None, query=query_properties):
+        super().__init__(path)
+        self._query = query
+        self._verified = set()  # Bu çalıştırmada adb'den doğrulanan seri numaraları
+        self._pending = set()
+
+    def get(self, serial):
+        """Cached properties (possibly from a previous run), never touches adb."""
+        with self._lock:
+            entry = self._load().get(serial)
+            return dict(entry) if entry else None
+
+    def refresh(self, serial, on_ready=None):
+        """
+        Query the device and update the cache; returns the properties or None.
+        on_ready(serial) is called after a successful refresh.
+        """
+        props = self._query(serial)
+        with self._lock:
+            self._pending.discard(serial)
+            if not props:
+                return None
+            self._verified.add(serial)
+            entries = self._load()
+            if entries.get(serial) != props:
+                if entries.get(serial, {}).get("fingerprint") not in (None, props["fingerprint"]):
+                    tracer.event("device.props.changed", f"{serial}: yeni yazılım sürümü, özellikler yenilendi",
+                                 serial=serial)
+                entries[serial] = props
+                self._save()
+        if on_ready:
+            on_ready(serial)
+        return dict(props)
+
+    def prefetch(self, serials, on_ready=None):
+        """Refresh devices not yet verified in this run, in background threads."""
+        with self._lock:
+            todo = [s for s in serials if s not in self._verified and s not in self._pending]
+            self._pending.update(todo)
+        for serial in todo:
+            threading.Thread(target=self.refresh, args=(serial, on_ready), daemon=True).start()
+
+    def fingerprint(self, serial, refresh=False):
+        with self._lock:
+            if not refresh and serial in self._verified:
+                return self._load()[serial]["fingerprint"]
+        props = self.refresh(serial)
+        return props["fingerprint"] if props else None
+
+
+device_properties = DevicePropertyCache()
@@ -0,0 +1,41 @@
+"""
+Base class for MeCast's small persistent JSON caches.
+The file lives in the per-user config directory unless a path is given, is
+read lazily on first use and rewritten atomically (temp file + os.replace).
+Subclasses set FILE_NAME and hold self._lock around _load()/_save().
+"""
+
+import json
+import os
+import threading
+from utils.system_utils import get_config_dir
+
+
+class JsonCache:
+    FILE_NAME = None
+
+    def __init__(self, path=None):
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries = None
+
+    @property
+    def path(self):
+        if self._path is None:
+            self._path = os.path.join(get_config_dir(), self.FILE_NAME)
+        return self._path
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_path, self.path)
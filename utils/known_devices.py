@@ -0,0 +1,134 @@
+"""
+Persistent cache of wireless (adb-tls-connect) endpoints for MeCast.
+Every device that connects successfully through the QR flow is remembered
+by its mDNS service name. At startup all remembered devices are reconnected
+in parallel with short timeouts; a device that no longer answers on its
+stored endpoint (wireless debugging picks a new port after a reboot) is
+re-resolved over mDNS and retried once.
+"""
+
+import contextvars
+import threading
+import time
+from utils.adb_manager import AdbManager
+from utils.json_cache import JsonCache
+from utils.tracing import tracer
+
+RECONNECT_TIMEOUT = 3
+RESOLVE_TIMEOUT = 3
+
+
+def service_prefix(name):
+    """'adb-R58M12-AbCdEf._adb-tls-connect._tcp.local.' -> 'adb-R58M12-'"""
+    instance = name.split("._", 1)[0]
+    return instance.rsplit("-", 1)[0] + "-" if "-" in instance else instance
+
+
+class KnownDeviceCache(JsonCache):
+    """JSON cache of {service name: {'addresses', 'port', 'last_seen'}}."""
+    FILE_NAME = "known_devices.json"
+
+    def entries(self):
+        with self._lock:
+            return dict(self._load())
+
+    def remember(self, name, addresses, port):
+        with self._lock:
+            entries = self._load()
+            # Aynı cihaz yeni bir servis adıyla yayın yapıyorsa eski kaydı bırak
+            prefix = service_prefix(name)
+            for stale in [n for n in entries if n != name and service_prefix(n) == prefix]:
+                del entries[stale]
+            entries[name] = {"addresses": list(addresses), "port": port, "last_seen": time.time()}
+            self._save()
+
+    def forget(self, name):
+        with self._lock:
+            if self._load().pop(name, None) is not None:
+                self._save()
+
+
+known_devices = KnownDeviceCache()
+
+
+def resolve(name, timeout=RESOLVE_TIMEOUT):
+    """
+    Look the device up over mDNS again. Tries the exact service name first,
+    then any currently advertised service of the same device.
+    Returns (name, addresses, port) or None.
+    """
+    from zeroconf import IPVersion
+    from utils.zeroconf_service import zeroconf_service, CONNECT_SERVICE
+
+    zeroconf_service.warm_up(CONNECT_SERVICE)
+    zc = zeroconf_service.zeroconf
+    candidates = [name] + [n for n in zeroconf_service.known_services(CONNECT_SERVICE)
+                           if n != name and service_prefix(n) == service_prefix(name)]
+    for candidate in candidates:
+        info = zc.get_service_info(CONNECT_SERVICE, candidate, timeout=int(timeout * 1000))
+        if info and info.port:
+            addresses = [a.exploded for a in info.ip_addresses_by_version(IPVersion.All)]
+            if addresses:
+                return candidate, addresses, info.port
+    return None
+
+
+def reconnect_device(name, entry, cache=known_devices, timeout=RECONNECT_TIMEOUT):
+    """Reconnect one cached device, re-resolving over mDNS if the stored endpoint fails."""
+    with tracer.span("adb.reconnect", device=name) as span:
+        success, address, _ = AdbManager.connect(entry["addresses"], entry["port"], timeout=timeout)
+        if success:
+            cache.remember(name, entry["addresses"], entry["port"])
+            span.end("ok", address=address)
+            return True, address
+
+        with tracer.span("mdns.resolve", service="connect", instance=name) as resolve_span:
+            try:
+                resolved = resolve(name)
+            except Exception as e:
+                tracer.event("mdns.error", f"mDNS çözümleme hatası ({name}): {e}", level="error")
+                resolved = None
+            resolve_span.end("ok" if resolved else "not_found")
+        if not resolved:
+            span.end("unreachable")
+            return False, None
+        new_name, addresses, port = resolved
+        if new_name == name and port == entry["port"] and set(addresses) == set(entry["addresses"]):
+            span.end("unreachable")
+            return False, None
+        success, address, _ = AdbManager.connect(addresses, port, timeout=timeout)
+        if success:
+            if new_name != name:
+                cache.forget(name)
+            cache.remember(new_name, addresses, port)
+        span.end("ok" if success else "failed", address=address, moved=True)
+        return success, address
+
+
+def reconnect_all(cache=known_devices, timeout=RECONNECT_TIMEOUT, on_result=None):
+    """
+    Reconnect every cached device in parallel and wait for all attempts.
+    on_result(name, success, address) is called as each attempt finishes.
+    Returns the number of devices that came back.
+    """
+    entries = cache.entries()
+    results = {}
+
+    def worker(name, entry):
+        try:
+            success, address = reconnect_device(name, entry, cache, timeout)
+        except Exception as e:
+            tracer.event("adb.reconnect.error", f"Yeniden bağlanma hatası ({name}): {e}", level="error")
+            success, address = False, None
+        results[name] = success
+        if on_result:
+            on_result(name, success, address)
+
+    # Her iş parçacığı çağıranın açık span'ini üst olarak görür
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(worker,) + item, daemon=True)
+               for item in entries.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(1 for success in results.values() if success)
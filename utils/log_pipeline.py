@@ -0,0 +1,143 @@
+"""
+Streaming log pipeline for MeCast's child processes (scrcpy, uxplay).
+Every child's output is drained continuously so its pipe never fills up,
+kept in a bounded per-session ring buffer, optionally rotated to disk, and
+matched against known line patterns to produce structured events.
+"""
+
+import logging
+import logging.handlers
+import os
+import re
+import threading
+import time
+from collections import deque
+from utils.tracing import tracer
+
+# Set MECAST_LOG_DIR to also keep rotated log files of every child process
+LOG_DIR = os.environ.get("MECAST_LOG_DIR")
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# (pattern, event type); named groups become event fields
+COMMON_RULES = [
+    (re.compile(r"\b(ERROR|FATAL|error:)", re.IGNORECASE), "error"),
+]
+
+SCRCPY_RULES = COMMON_RULES + [
+    # "INFO: 58 fps (+4 frames skipped)": atlanan kareler sadece varsa yazılır
+    (re.compile(r"INFO: (?P<fps>\d+) fps(?: \(\+(?P<skipped>\d+) frames skipped\))?"), "fps"),
+    (re.compile(r"INFO: (?:Renderer|Texture|Device|Recording started)"), "ready"),
+]
+
+UXPLAY_RULES = COMMON_RULES + [
+    (re.compile(r"Accepted IPv[46] client on socket"), "client_connected"),
+    (re.compile(r"Connection closed for socket|connection closed", re.IGNORECASE), "client_disconnected"),
+    (re.compile(r"[Ss]tarting mirroring|Begin streaming"), "mirroring_started"),
+]
+
+
+def parse_line(line, rules):
+    """Return the first structured event matching `line`, or None."""
+    for pattern, event_type in rules:
+        match = pattern.search(line)
+        if match:
+            event = {"type": event_type, "line": line, "time": time.time()}
+            for key, value in match.groupdict().items():
+                if value is not None:
+                    event[key] = int(value) if value.isdigit() else value
+            return event
+    return None
+
+
+class LogPipeline:
+    def __init__(self, name, rules=COMMON_RULES, max_lines=500, log_dir=LOG_DIR):
+        self.name = name
+        self.rules = rules
+        self.buffer = deque(maxlen=max_lines)
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._threads = []
+        self._logger = self._create_file_logger(log_dir) if log_dir else None
+
+    def _create_file_logger(self, log_dir):
+        safe_name = re.sub(r"[^\w.-]", "_", self.name)
+        os.makedirs(log_dir, exist_ok=True)
+        logger = logging.getLogger(f"mecast.child.{safe_name}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        if not logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(
+                os.path.join(log_dir, f"{safe_name}.log"),
+                maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+        return logger
+
+    def subscribe(self, callback):
+        """callback(event) for every structured event; event['type'] == 'exit' at the end."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def lines(self):
+        """Snapshot of the buffered output lines (oldest first)."""
+        with self._lock:
+            return list(self.buffer)
+
+    def tail(self, count=20):
+        return self.lines()[-count:]
+
+    def attach(self, process):
+        """Drain the process's stdout (and stderr if piped separately) until exit."""
+        streams = [s for s in (process.stdout, process.stderr) if s is not None]
+        readers = []
+        for stream in streams:
+            thread = threading.Thread(target=self._drain, args=(stream,), daemon=True)
+            thread.start()
+            readers.append(thread)
+        watcher = threading.Thread(target=self._wait_exit, args=(process, readers), daemon=True)
+        watcher.start()
+        self._threads = readers + [watcher]
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _drain(self, stream):
+        try:
+            for line in stream:
+                if isinstance(line, bytes):
+                    line = line.decode("utf-8", errors="replace")
+                self.feed(line.rstrip("\r\n"))
+        except (OSError, ValueError):
+            pass  # Akış kapatıldı
+
+    def _wait_exit(self, process, readers):
+        returncode = process.wait()
+        # Kalan çıktı işlenmeden çıkış olayı gönderilmesin
+        for thread in readers:
+            thread.join()
+        self._publish({"type": "exit", "returncode": returncode, "time": time.time(), "line": ""})
+
+    def feed(self, line):
+        with self._lock:
+            self.buffer.append(line)
+        if self._logger:
+            self._logger.info(line)
+        event = parse_line(line, self.rules)
+        if event:
+            self._publish(event)
+
+    def _publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                tracer.event("log.subscriber.error", f"Log olayı işlenemedi ({self.name}): {e}", level="error")
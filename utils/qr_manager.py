@@ -1,19 +1,34 @@
+import itertools
 import socket
 import secrets
 import string
-import qrcode
-import io
-import subprocess
 import threading
-from PyQt6.QtGui import QImage
-from zeroconf import Zeroconf, ServiceInfo, ServiceBrowser, ServiceListener, IPVersion
+from zeroconf import Zeroconf, ServiceListener, IPVersion
+from utils.adb_manager import AdbManager
+from utils.known_devices import known_devices
+from utils.tracing import tracer
+from utils.zeroconf_service import zeroconf_service, PAIRING_SERVICE, CONNECT_SERVICE
+
+# adb pair/connect denemelerinin üst süre sınırı (saniye)
+PAIR_TIMEOUT = 15
+CONNECT_TIMEOUT = 5
+
+def run_in_background(target, *args):
+    """Zeroconf geri çağrı thread'i asla bloklanmasın: işi ayrı thread'e devret."""
+    threading.Thread(target=target, args=args, daemon=True).start()
 
 class PairingListener(ServiceListener):
-    def __init__(self, service_name, password, callback):
+    def __init__(self, service_name, password, callback, parent=None):
         self.service_name = service_name
         self.password = password
         self.callback = callback
         self.paired = False
+        self._in_progress = set()
+        self._lock = threading.Lock()
+        # Her aşama, eşleştirme kök span'inin altında ölçülür
+        self.parent = parent
+        self.discovery = tracer.span("mdns.discover", parent=parent, service="pairing")
+        self._attempts = itertools.count(1)
 
     def add_service(self, zc: Zeroconf, type_: str, name: str) -> None:
         if self.paired:
@@ -22,13 +37,32 @@ class PairingListener(ServiceListener):
         # Sadece bizim servis ismimizle başlayanları kabul et
         # Servis ismi genellikle "MeCast-XXXX._adb-tls-pairing._tcp.local." formatındadır
         if not name.startswith(self.service_name):
-            print(f"Servis yoksayıldı (İsim uyuşmuyor): {name} != {self.service_name}")
+            tracer.event("mdns.ignored", f"Servis yoksayıldı (İsim uyuşmuyor): {name} != {self.service_name}",
+                         service="pairing", instance=name)
             return
-            
-        info = zc.get_service_info(type_, name)
-        if info:
-            print(f"Servis bulundu: {name}, Info: {info}")
-            self.pair(info)
+        
+        self.discovery.end("found", instance=name)
+        with self._lock:
+            if name in self._in_progress:
+                return
+            self._in_progress.add(name)
+        run_in_background(self._resolve_and_pair, zc, type_, name)
+
+    def _resolve_and_pair(self, zc, type_, name):
+        attempt = next(self._attempts)
+        try:
+            with tracer.span("mdns.resolve", parent=self.parent, service="pairing",
+                             instance=name, attempt=attempt) as span:
+                info = zc.get_service_info(type_, name)
+                if not info:
+                    span.end("not_found")
+            if info:
+                self.pair(info, attempt)
+        except Exception as e:
+            tracer.event("mdns.resolve.error", f"mDNS çözümleme hatası ({name}): {e}", level="error")
+        finally:
+            with self._lock:
+                self._in_progress.discard(name)
 
     def update_service(self, zc: Zeroconf, type_: str, name: str) -> None:
         pass
@@ -36,46 +70,65 @@ class PairingListener(ServiceListener):
     def remove_service(self, zc: Zeroconf, type_: str, name: str) -> None:
         pass
 
-    def pair(self, info):
+    def pair(self, info, attempt=1):
         try:
-            # IP adresini al
-            addresses = info.ip_addresses_by_version(IPVersion.All)
-            if not addresses:
-                print("IP adresi bulunamadı.")
-                return
-            
-            ip_address = addresses[0].exploded
+            # Yayınlanan tüm IP adresleri paralel denenir
+            addresses = [a.exploded for a in info.ip_addresses_by_version(IPVersion.All)]
             port = info.port
             
-            print(f"Eşleştirme deneniyor: {ip_address}:{port} şifre: {self.password}")
-            
-            cmd = ["adb", "pair", f"{ip_address}:{port}", self.password]
-            process = subprocess.run(cmd, capture_output=True, text=True)
-            
-            stdout = process.stdout
-            stderr = process.stderr
-            print(f"ADB Çıktısı: {stdout}")
-            print(f"ADB Hata: {stderr}")
+            # Şifre iz dosyasına yazılmaz
+            with tracer.span("adb.pair", parent=self.parent, addresses=addresses,
+                             port=port, attempt=attempt) as span:
+                if not addresses:
+                    tracer.event("adb.pair.no_address", "IP adresi bulunamadı.")
+                    span.end("no_address")
+                    return
+                
+                success, ip_address, output = AdbManager.pair(addresses, port, self.password, timeout=PAIR_TIMEOUT)
+                span.end("ok" if success else "failed", address=ip_address, output=output)
             
-            if "Successfully paired" in stdout:
+            if success:
                 self.paired = True
                 self.callback(True, f"Başarıyla eşleşti: {ip_address}")
             else:
-                print("Eşleştirme başarısız, bekleniyor...")
+                tracer.event("adb.pair.failed", f"Eşleştirme başarısız, bekleniyor... ({output})")
                 
         except Exception as e:
-            print(f"Eşleştirme hatası: {e}")
+            tracer.event("adb.pair.error", f"Eşleştirme hatası: {e}", level="error")
 
 class ConnectionListener(ServiceListener):
-    def __init__(self, callback):
+    def __init__(self, callback, parent=None):
         self.callback = callback
         self.connected_ips = set()
+        self._in_progress = set()
+        self._lock = threading.Lock()
+        self.parent = parent
+        self.discovery = tracer.span("mdns.discover", parent=parent, service="connect")
+        self._attempts = itertools.count(1)
 
     def add_service(self, zc: Zeroconf, type_: str, name: str) -> None:
-        info = zc.get_service_info(type_, name)
-        if info:
-            print(f"Bağlantı servisi bulundu: {name}, Info: {info}")
-            self.connect(info)
+        self.discovery.end("found", instance=name)
+        with self._lock:
+            if name in self._in_progress:
+                return
+            self._in_progress.add(name)
+        run_in_background(self._resolve_and_connect, zc, type_, name)
+
+    def _resolve_and_connect(self, zc, type_, name):
+        attempt = next(self._attempts)
+        try:
+            with tracer.span("mdns.resolve", parent=self.parent, service="connect",
+                             instance=name, attempt=attempt) as span:
+                info = zc.get_service_info(type_, name)
+                if not info:
+                    span.end("not_found")
+            if info:
+                self.connect(info, attempt)
+        except Exception as e:
+            tracer.event("mdns.resolve.error", f"mDNS çözümleme hatası ({name}): {e}", level="error")
+        finally:
+            with self._lock:
+                self._in_progress.discard(name)
 
     def update_service(self, zc: Zeroconf, type_: str, name: str) -> None:
         pass
@@ -83,40 +136,47 @@ class ConnectionListener(ServiceListener):
     def remove_service(self, zc: Zeroconf, type_: str, name: str) -> None:
         pass
 
-    def connect(self, info):
+    def connect(self, info, attempt=1):
         try:
-            addresses = info.ip_addresses_by_version(IPVersion.All)
+            addresses = [a.exploded for a in info.ip_addresses_by_version(IPVersion.All)]
             if not addresses:
                 return
             
-            ip_address = addresses[0].exploded
             port = info.port
             
-            if ip_address in self.connected_ips:
+            if self.connected_ips.intersection(addresses):
                 return
 
-            print(f"Bağlantı deneniyor: {ip_address}:{port}")
-            
-            cmd = ["adb", "connect", f"{ip_address}:{port}"]
-            process = subprocess.run(cmd, capture_output=True, text=True)
-            
-            stdout = process.stdout.strip()
-            print(f"ADB Connect Çıktısı: {stdout}")
+            with tracer.span("adb.connect", parent=self.parent, addresses=addresses,
+                             port=port, attempt=attempt) as span:
+                success, ip_address, output = AdbManager.connect(addresses, port, timeout=CONNECT_TIMEOUT)
+                span.end("ok" if success else "failed", address=ip_address, output=output)
             
-            if "connected to" in stdout:
-                self.connected_ips.add(ip_address)
+            if success:
+                self.connected_ips.update(addresses)
+                # Uygulama yeniden açıldığında otomatik bağlanmak için sakla
+                known_devices.remember(info.name, addresses, port)
                 self.callback(True, f"Cihaz bağlandı: {ip_address}")
                 
         except Exception as e:
-            print(f"Bağlantı hatası: {e}")
+            tracer.event("adb.connect.error", f"Bağlantı hatası: {e}", level="error")
+
+# QR görüntüsünün kenar uzunluğu (piksel); modül başına tam sayı piksel kullanılır
+QR_IMAGE_SIZE = 300
 
 class QrManager:
-    def __init__(self):
-        self.zeroconf = Zeroconf()
+    def __init__(self, render_image=True):
+        # Uygulama genelinde paylaşılan, sıcak tutulan mDNS servisi
+        self.zeroconf_service = zeroconf_service
         self.password = self._generate_password()
         self.service_name = f"MeCast-{secrets.token_hex(2)}"
-        self.pairing_browser = None
-        self.connection_browser = None
+        self.pairing_listener = None
+        self.connection_listener = None
+        
+        # İçerik ve görüntü önceden hazırlanır, diyalog açılır açılmaz gösterilir
+        self.qr_content = self.generate_qr_content()
+        # Arayüzsüz (daemon) kullanımda sadece içerik üretilir, Qt yüklenmez
+        self.qr_image = self.get_qr_image(self.qr_content) if render_image else None
 
     def _generate_password(self):
         alphabet = string.ascii_letters + string.digits
@@ -127,33 +187,52 @@ class QrManager:
         ADB Wi-Fi eşleştirme için QR içeriğini üretir.
         Format: WIFI:T:ADB;S:name;P:password;;
         """
-        print("QR içerik üretiliyor...")
         # QR Data Formatı: WIFI:T:ADB;S:name;P:password;;
         qr_data = f"WIFI:T:ADB;S:{self.service_name};P:{self.password};;"
         return qr_data
 
-    def get_qr_image(self, data):
-        qr = qrcode.QRCode(version=1, box_size=10, border=4)
+    def get_qr_image(self, data, size=QR_IMAGE_SIZE):
+        """
+        QR modül matrisini doğrudan gri tonlamalı bir QImage tamponuna çizer
+        (PIL ve PNG kodlama/çözme yok). Modül boyutu `size`a sığan en büyük
+        tam sayıdır, böylece ölçekleme gerekmez ve kenarlar keskin kalır.
+        """
+        import qrcode
+        from PyQt6.QtGui import QImage
+        qr = qrcode.QRCode(version=1, border=4)
         qr.add_data(data)
         qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
+        matrix = qr.get_matrix()  # Kenar boşluğu (border) dahil
+        
+        modules = len(matrix)
+        scale = max(1, size // modules)
+        width = modules * scale
+        # QImage satırları 4 bayt hizalı olmalı
+        stride = (width + 3) & ~3
+        padding = b"\xff" * (stride - width)
+        black, white = b"\x00" * scale, b"\xff" * scale
+        
+        rows = []
+        for row in matrix:
+            line = b"".join(black if module else white for module in row) + padding
+            rows.append(line * scale)
+        buffer = b"".join(rows)
         
-        # PIL Image -> QImage conversion via buffer
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        qimg = QImage.fromData(buffer.getvalue())
-        return qimg
+        # copy(): QImage harici tamponu sahiplenmez, verinin ömrünü bağımsız kıl
+        return QImage(buffer, width, width, stride, QImage.Format.Format_Grayscale8).copy()
 
-    def wait_for_pairing(self):
+    def wait_for_pairing(self, timeout=60):
         """
-        Eşleştirme isteğini bekler.
+        Eşleştirme isteğini en fazla `timeout` saniye bekler.
         """
         self.pairing_event = threading.Event()
         self.pairing_result = (False, "Zaman aşımı")
+        # Kök span: keşif, çözümleme, pair ve connect aşamaları bunun altında
+        root = tracer.span("qr.pairing", service=self.service_name, timeout=timeout)
         
         def pairing_callback(success, msg):
             if success:
-                print(f"Eşleştirme başarılı ({msg}), bağlantı bekleniyor...")
+                tracer.event("qr.paired", f"Eşleştirme başarılı ({msg}), bağlantı bekleniyor...", parent=root)
                 # Eşleşme başarılı olsa bile hemen dönme, bağlantıyı bekle
                 # Ama UI'a bilgi vermek için belki bir sinyal? 
                 # Şimdilik basit tutalım: Eşleşme olunca bağlantıyı da bekleyelim.
@@ -166,21 +245,28 @@ class QrManager:
                 self.pairing_result = (True, msg)
                 self.pairing_event.set()
             
-        pairing_listener = PairingListener(self.service_name, self.password, pairing_callback)
-        self.pairing_browser = ServiceBrowser(self.zeroconf, "_adb-tls-pairing._tcp.local.", pairing_listener)
+        # Tarayıcılar açık kalır; dinleyiciler sadece bağlanıp ayrılır
+        self.pairing_listener = PairingListener(self.service_name, self.password, pairing_callback, parent=root)
+        self.zeroconf_service.add_listener(PAIRING_SERVICE, self.pairing_listener)
         
-        connection_listener = ConnectionListener(connection_callback)
-        self.connection_browser = ServiceBrowser(self.zeroconf, "_adb-tls-connect._tcp.local.", connection_listener)
+        self.connection_listener = ConnectionListener(connection_callback, parent=root)
+        self.zeroconf_service.add_listener(CONNECT_SERVICE, self.connection_listener)
         
-        print("Servisler aranıyor (Pairing & Connect)...")
-        self.pairing_event.wait(timeout=60)
+        completed = self.pairing_event.wait(timeout=timeout)
         
         self.close()
+        success, message = self.pairing_result
+        root.end("ok" if success else ("failed" if completed else "timeout"), message=message)
         return self.pairing_result
         
     def close(self):
-        if self.pairing_browser:
-            self.pairing_browser.cancel()
-        if self.connection_browser:
-            self.connection_browser.cancel()
-        self.zeroconf.close()
+        # Paylaşılan Zeroconf kapatılmaz, kayıt önbelleği sonraki eşleştirmelerde kullanılır
+        if self.pairing_listener:
+            self.zeroconf_service.remove_listener(PAIRING_SERVICE, self.pairing_listener)
+            # Servis hiç görülmediyse keşif aşaması sonuçsuz kapanır
+            self.pairing_listener.discovery.end("not_found")
+            self.pairing_listener = None
+        if self.connection_listener:
+            self.zeroconf_service.remove_listener(CONNECT_SERVICE, self.connection_listener)
+            self.connection_listener.discovery.end("not_found")
+            self.connection_listener = None
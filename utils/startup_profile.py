@@ -0,0 +1,99 @@
+"""
+Startup profiling helpers for MeCast.
+`main.py --profile-imports` re-runs the app under `python -X importtime`
+and prints a per-module import cost breakdown; `main.py --startup-check`
+measures the cold start until DeviceSelectionDialog is on screen and fails
+when it exceeds the budget or when a lazily-loaded dependency was imported.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Cold-start budget from interpreter start to DeviceSelectionDialog being shown
+STARTUP_BUDGET_MS = float(os.environ.get("MECAST_STARTUP_BUDGET_MS", "1000"))
+
+# Must not be imported before the user actually needs them
+DEFERRED_MODULES = ["zeroconf", "qrcode", "PIL", "ui.main_window", "ui.qr_dialog", "utils.qr_manager"]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(output):
+    """Parse `-X importtime` stderr into [(module, self_us, cumulative_us, depth)]."""
+    entries = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def profile_imports(main_script, top=25):
+    """Run a startup check under -X importtime and print the import breakdown."""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", main_script, "--startup-check"],
+        capture_output=True, text=True, env=env)
+    entries = parse_importtime(result.stderr)
+    if not entries:
+        print(result.stderr)
+        return 1
+
+    total_us = sum(e[1] for e in entries)
+    packages = {}
+    for module, self_us, _, _ in entries:
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    print(f"Toplam import süresi: {total_us / 1000:.1f} ms ({len(entries)} modül)\n")
+    print(f"{'paket':<28}{'self (ms)':>12}{'pay':>8}")
+    for package, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        print(f"{package:<28}{self_us / 1000:>12.1f}{self_us / total_us:>8.1%}")
+
+    print(f"\n{'modül':<44}{'self (ms)':>12}{'kümülatif (ms)':>16}")
+    for module, self_us, cumulative_us, _ in sorted(entries, key=lambda e: -e[1])[:top]:
+        print(f"{module:<44}{self_us / 1000:>12.1f}{cumulative_us / 1000:>16.1f}")
+
+    print()
+    print(result.stdout.strip())
+    return result.returncode
+
+
+def process_uptime_ms(fallback_start):
+    """Milliseconds since the interpreter process started (Linux), else since fallback_start."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return (uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000
+    except (OSError, ValueError, IndexError):
+        return (time.perf_counter() - fallback_start) * 1000
+
+
+def check_startup_budget(app, dialog, fallback_start, budget_ms=STARTUP_BUDGET_MS):
+    """Show the dialog, measure time-to-visible, and return a process exit code."""
+    from PyQt6.QtCore import QTimer
+
+    measured = {}
+
+    def on_shown():
+        measured["ms"] = process_uptime_ms(fallback_start)
+        app.quit()
+
+    dialog.show()
+    # İlk olay döngüsü turu: pencere çizilmiş ve görünür durumda
+    QTimer.singleShot(0, on_shown)
+    app.exec()
+
+    elapsed = measured.get("ms", process_uptime_ms(fallback_start))
+    loaded = [m for m in DEFERRED_MODULES if m in sys.modules]
+    print(f"DeviceSelectionDialog: {elapsed:.0f} ms (bütçe {budget_ms:.0f} ms)")
+    if loaded:
+        print(f"Erken yüklenen modüller: {', '.join(loaded)}")
+    return 0 if elapsed <= budget_ms and not loaded else 1
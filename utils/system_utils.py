@@ -7,6 +7,10 @@ import subprocess
 import shutil
 import platform
 import os
+import re
+import tempfile
+import threading
+from utils.tool_registry import tool_registry
 
 def get_os():
     """Return 'linux', 'windows', or 'darwin' (macOS)."""
@@ -19,31 +23,159 @@ def get_os():
         return 'darwin'
     return 'unknown'
 
+
+def get_config_dir():
+    """Return (and create) MeCast's per-user config/cache directory."""
+    if get_os() == 'windows':
+        base = os.environ.get("APPDATA", os.path.expanduser("~"))
+        path = os.path.join(base, "MeCast")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))
+        path = os.path.join(base, "mecast")
+    os.makedirs(path, exist_ok=True)
+    return path
+
 # ============== Firewall Management ==============
 
-def open_firewall_ports_linux():
-    """Open required ports for AirPlay on Linux using ufw or iptables."""
-    ports_tcp = [7000, 7001, 7002]
-    ports_udp = [7000, 7001, 7002, 5353]  # 5353 for mDNS
-    
+AIRPLAY_TCP_PORTS = [7000, 7001, 7002]
+AIRPLAY_UDP_PORTS = [7000, 7001, 7002, 5353]  # 5353 for mDNS
+
+# iptables/ufw multiport accepts at most 15 ports per rule
+MULTIPORT_LIMIT = 15
+RULE_COMMENT = "MeCast"
+
+# sudo never prompts (-n): without cached credentials the call fails at once
+# instead of blocking on a password prompt or a missing TTY
+SUDO = ["sudo", "-n"]
+SUDO_TIMEOUT = 15
+
+# (tcp ports, udp ports) -> (success, message); rules are checked once per process,
+# failures included, so receiver restarts do not repeat the sudo calls
+_firewall_results = {}
+_firewall_lock = threading.Lock()
+
+
+def parse_port_spec(spec):
+    """'7000,7001:7003' (ufw/iptables) or '7000-7003' (netsh) -> set of ports."""
+    ports = set()
+    for part in spec.split(","):
+        part = part.strip()
+        bounds = re.split(r"[:\-]", part)
+        if not all(b.isdigit() for b in bounds):
+            continue
+        low, high = int(bounds[0]), int(bounds[-1])
+        ports.update(range(low, high + 1))
+    return ports
+
+
+def format_port_spec(ports, range_sep=":"):
+    """Sorted ports -> compact spec with ranges: [7000, 7001, 7002, 7100] -> '7000:7002,7100'."""
+    parts = []
+    for port in sorted(set(ports)):
+        if parts and port == parts[-1][1] + 1:
+            parts[-1][1] = port
+        else:
+            parts.append([port, port])
+    return ",".join(str(a) if a == b else f"{a}{range_sep}{b}" for a, b in parts)
+
+
+def parse_ufw_status(output):
+    """Return ({'tcp': ports, 'udp': ports}, active) from `ufw status` output."""
+    allowed = {"tcp": set(), "udp": set()}
+    active = "inactive" not in output.lower()
+    for line in output.splitlines():
+        tokens = line.split()
+        if len(tokens) < 3 or "ALLOW" not in tokens[1:3]:
+            continue
+        # Sadece kaynağı kısıtlanmamış kurallar sayılır
+        if "Anywhere" not in tokens[2:]:
+            continue
+        spec, _, proto = tokens[0].partition("/")
+        ports = parse_port_spec(spec)
+        for name in ([proto] if proto else ["tcp", "udp"]):
+            if name in allowed:
+                allowed[name].update(ports)
+    return allowed, active
+
+
+def parse_iptables_rules(output):
+    """
+    Return ({'tcp': ports, 'udp': ports}, needed) from `iptables -S INPUT`.
+    needed is False when the chain accepts everything anyway.
+    """
+    allowed = {"tcp": set(), "udp": set()}
+    policy_accept = False
+    blocking = False
+    for line in output.splitlines():
+        tokens = line.split()
+        if tokens[:2] == ["-P", "INPUT"]:
+            policy_accept = tokens[2:3] == ["ACCEPT"]
+            continue
+        if tokens[:1] != ["-A"]:
+            continue
+        target = tokens[tokens.index("-j") + 1] if "-j" in tokens[:-1] else None
+        if target in ("DROP", "REJECT"):
+            blocking = True
+        if target != "ACCEPT" or "-s" in tokens or "-i" in tokens:
+            continue
+        proto = tokens[tokens.index("-p") + 1] if "-p" in tokens[:-1] else None
+        for flag in ("--dport", "--dports"):
+            if flag in tokens[:-1] and proto in allowed:
+                allowed[proto].update(parse_port_spec(tokens[tokens.index(flag) + 1]))
+    return allowed, not (policy_accept and not blocking)
+
+
+def build_iptables_restore(missing):
+    """iptables-restore --noflush input adding one multiport rule per protocol (and chunk)."""
+    lines = ["*filter"]
+    for proto in ("tcp", "udp"):
+        ports = sorted(missing[proto])
+        for i in range(0, len(ports), MULTIPORT_LIMIT):
+            chunk = format_port_spec(ports[i:i + MULTIPORT_LIMIT])
+            lines.append(f"-A INPUT -p {proto} -m multiport --dports {chunk} "
+                         f"-m comment --comment {RULE_COMMENT} -j ACCEPT")
+    lines.append("COMMIT")
+    return "\n".join(lines) + "\n"
+
+
+def _missing_ports(tcp_ports, udp_ports, allowed):
+    return {"tcp": set(tcp_ports) - allowed["tcp"], "udp": set(udp_ports) - allowed["udp"]}
+
+
+def _sudo(args, **kwargs):
+    return subprocess.run(SUDO + args, capture_output=True, text=True, timeout=SUDO_TIMEOUT, **kwargs)
+
+
+def open_firewall_ports_linux(tcp_ports=AIRPLAY_TCP_PORTS, udp_ports=AIRPLAY_UDP_PORTS):
+    """
+    Open the given ports on Linux using ufw or iptables.
+    The current rules are read once and only the missing ones are added,
+    in a single sudo invocation.
+    """
     # Check if ufw is available
     if shutil.which("ufw"):
         try:
-            # Check if ufw is active
-            result = subprocess.run(["ufw", "status"], capture_output=True, text=True)
-            if "inactive" in result.stdout.lower():
+            result = _sudo(["ufw", "status"])
+            if result.returncode != 0:
+                # Kurallar okunamadıysa hepsini eksik sayıp yeniden sudo denenmez
+                return False, f"Failed to read ufw status: {result.stderr.strip()}"
+            allowed, active = parse_ufw_status(result.stdout)
+            if not active:
                 return True, "Firewall (ufw) inactive - no changes needed"
             
-            # Open TCP ports
-            for port in ports_tcp:
-                subprocess.run(["sudo", "ufw", "allow", f"{port}/tcp"], 
-                             capture_output=True, check=False)
-            
-            # Open UDP ports
-            for port in ports_udp:
-                subprocess.run(["sudo", "ufw", "allow", f"{port}/udp"], 
-                             capture_output=True, check=False)
+            missing = _missing_ports(tcp_ports, udp_ports, allowed)
+            commands = []
+            for proto, ports in missing.items():
+                ports = sorted(ports)
+                for i in range(0, len(ports), MULTIPORT_LIMIT):
+                    commands.append(f"ufw allow proto {proto} to any port "
+                                    f"{format_port_spec(ports[i:i + MULTIPORT_LIMIT])}")
+            if not commands:
+                return True, "Firewall ports already open (ufw)"
             
+            result = _sudo(["sh", "-c", " && ".join(commands)])
+            if result.returncode != 0:
+                return False, f"Failed to configure ufw: {result.stderr.strip()}"
             return True, "Firewall ports opened successfully (ufw)"
         except Exception as e:
             return False, f"Failed to configure ufw: {str(e)}"
@@ -51,16 +183,21 @@ def open_firewall_ports_linux():
     # Fall back to iptables
     elif shutil.which("iptables"):
         try:
-            for port in ports_tcp:
-                subprocess.run(["sudo", "iptables", "-A", "INPUT", "-p", "tcp", 
-                              "--dport", str(port), "-j", "ACCEPT"], 
-                             capture_output=True, check=False)
+            result = _sudo(["iptables", "-S", "INPUT"])
+            if result.returncode != 0:
+                return False, f"Failed to read iptables rules: {result.stderr.strip()}"
+            allowed, needed = parse_iptables_rules(result.stdout)
+            if not needed:
+                return True, "Firewall (iptables) accepts all input - no changes needed"
             
-            for port in ports_udp:
-                subprocess.run(["sudo", "iptables", "-A", "INPUT", "-p", "udp", 
-                              "--dport", str(port), "-j", "ACCEPT"], 
-                             capture_output=True, check=False)
+            missing = _missing_ports(tcp_ports, udp_ports, allowed)
+            if not missing["tcp"] and not missing["udp"]:
+                return True, "Firewall ports already open (iptables)"
             
+            # Tek işlemde (atomik) uygulanır, mevcut kurallar silinmez
+            result = _sudo(["iptables-restore", "--noflush"], input=build_iptables_restore(missing))
+            if result.returncode != 0:
+                return False, f"Failed to configure iptables: {result.stderr.strip()}"
             return True, "Firewall ports opened successfully (iptables)"
         except Exception as e:
             return False, f"Failed to configure iptables: {str(e)}"
@@ -68,51 +205,75 @@ def open_firewall_ports_linux():
     return False, "No supported firewall found (ufw or iptables)"
 
 
-def open_firewall_ports_windows():
-    """Open required ports for AirPlay on Windows using netsh."""
-    ports = [7000, 7001, 7002, 5353]
-    
+def windows_rule_name(proto, port):
+    return f"MeCast_{proto.upper()}_{port}"
+
+
+def open_firewall_ports_windows(tcp_ports=AIRPLAY_TCP_PORTS, udp_ports=AIRPLAY_UDP_PORTS):
+    """
+    Open the given ports on Windows using netsh.
+    Existing MeCast rules are listed once; the missing ones are added by a
+    single `netsh -f` script run.
+    """
     try:
-        # Create firewall rules
-        for port in ports:
-            # TCP rule
-            subprocess.run([
-                "netsh", "advfirewall", "firewall", "add", "rule",
-                f"name=MeCast_TCP_{port}",
-                "dir=in", "action=allow", "protocol=tcp",
-                f"localport={port}"
-            ], capture_output=True, check=False)
-            
-            # UDP rule
-            subprocess.run([
-                "netsh", "advfirewall", "firewall", "add", "rule",
-                f"name=MeCast_UDP_{port}",
-                "dir=in", "action=allow", "protocol=udp",
-                f"localport={port}"
-            ], capture_output=True, check=False)
+        # Kural adları dilden bağımsızdır, çıktıda adlarına göre aranır
+        result = subprocess.run(["netsh", "advfirewall", "firewall", "show", "rule", "name=all", "dir=in"],
+                                capture_output=True, text=True, errors="replace", check=False)
+        existing = set(re.findall(r"MeCast_(?:TCP|UDP)_\d+", result.stdout))
+        
+        script = []
+        for proto, ports in (("tcp", tcp_ports), ("udp", udp_ports)):
+            for port in ports:
+                name = windows_rule_name(proto, port)
+                if name not in existing:
+                    script.append(f"advfirewall firewall add rule name={name} dir=in action=allow "
+                                  f"protocol={proto} localport={port}")
+        if not script:
+            return True, "Firewall rules already present"
         
+        fd, path = tempfile.mkstemp(suffix=".txt", prefix="mecast-netsh-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write("\n".join(script) + "\n")
+            result = subprocess.run(["netsh", "-f", path], capture_output=True, text=True, check=False)
+        finally:
+            os.remove(path)
+        if result.returncode != 0:
+            return False, f"Failed to configure Windows Firewall: {result.stdout.strip()}"
         return True, "Firewall rules added successfully"
     except Exception as e:
         return False, f"Failed to configure Windows Firewall: {str(e)}"
 
 
-def open_firewall_ports():
-    """Open required firewall ports for the current OS."""
-    os_type = get_os()
-    
-    if os_type == 'linux':
-        return open_firewall_ports_linux()
-    elif os_type == 'windows':
-        return open_firewall_ports_windows()
-    else:
-        return False, f"Unsupported OS: {os_type}"
+def open_firewall_ports(tcp_ports=AIRPLAY_TCP_PORTS, udp_ports=AIRPLAY_UDP_PORTS, force=False):
+    """
+    Open required firewall ports for the current OS.
+    The result, success or failure, is cached per port set for the rest of
+    the session, so later sessions cost no firewall work at all
+    (force=True checks again).
+    """
+    key = (tuple(sorted(tcp_ports)), tuple(sorted(udp_ports)))
+    with _firewall_lock:
+        if not force and key in _firewall_results:
+            return _firewall_results[key]
+        
+        os_type = get_os()
+        if os_type == 'linux':
+            result = open_firewall_ports_linux(tcp_ports, udp_ports)
+        elif os_type == 'windows':
+            result = open_firewall_ports_windows(tcp_ports, udp_ports)
+        else:
+            return False, f"Unsupported OS: {os_type}"
+        
+        _firewall_results[key] = result
+        return result
 
 
 # ============== Dependency Checks ==============
 
 def check_uxplay_linux():
     """Check if uxplay is installed on Linux."""
-    return shutil.which("uxplay") is not None
+    return tool_registry.is_available("uxplay")
 
 
 def get_uxplay_install_instructions_linux():
@@ -168,13 +329,8 @@ def check_ios_dependencies():
         }
     elif os_type == 'windows':
         bonjour_installed = check_bonjour_windows()
-        # Check if uxplay.exe exists in common locations
-        uxplay_paths = [
-            os.path.expanduser("~\\uxplay-windows\\uxplay.exe"),
-            "C:\\Program Files\\uxplay\\uxplay.exe",
-            "C:\\Program Files (x86)\\uxplay\\uxplay.exe"
-        ]
-        uxplay_installed = any(os.path.exists(p) for p in uxplay_paths)
+        # Common install locations and PATH are checked by the registry
+        uxplay_installed = tool_registry.is_available("uxplay")
         
         return {
             "os": "windows",
@@ -0,0 +1,305 @@
+"""
+Resource telemetry for MeCast's child processes (scrcpy, uxplay, ffmpeg).
+A single sampler thread reads /proc/<pid> of every tracked child once per
+interval: CPU %, resident and peak memory, thread count, open sockets and
+process I/O throughput. Samples are kept in a fixed-size ring buffer per
+process and can be exported as JSON or Prometheus text; the series of a
+process that has exited is kept for a while (FINISHED_TTL, at most
+FINISHED_SERIES series) so a session can still be inspected after it ended.
+The thread only runs while at least one child is tracked, so an idle MeCast
+does not wake up; on systems without /proc tracking is a no-op.
+
+Process I/O comes from /proc/<pid>/io rchar/wchar, i.e. bytes moved through
+read and write calls on files, pipes and sockets alike. It is not network
+traffic, which Linux does not report per pid.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from utils.tracing import tracer
+
+SAMPLE_INTERVAL = 1.0
+RING_SIZE = 600  # 1 sn aralıkla son 10 dakika
+# Çıkmış işlemlerin serileri bu kadar süre / bu kadar seri tutulur
+FINISHED_TTL = 3600
+FINISHED_SERIES = 20
+
+
+def default_prom_file():
+    """MECAST_TELEMETRY_PROM (read on every call, not at import): Prometheus
+    textfile collector file rewritten after every sampling round, optional."""
+    return os.environ.get("MECAST_TELEMETRY_PROM")
+
+
+PROMETHEUS_METRICS = [
+    # (metrik adı, örnek alanı, tür, açıklama)
+    ("mecast_process_cpu_percent", "cpu_percent", "gauge", "CPU usage of one core in percent"),
+    ("mecast_process_rss_bytes", "rss", "gauge", "Resident set size"),
+    ("mecast_process_peak_rss_bytes", "peak_rss", "gauge", "Peak resident set size"),
+    ("mecast_process_threads", "threads", "gauge", "Number of threads"),
+    ("mecast_process_sockets", "sockets", "gauge", "Open sockets"),
+    ("mecast_process_io_read_bytes_total", "io_read", "counter",
+     "Process I/O: bytes read from files, pipes and sockets (not network traffic)"),
+    ("mecast_process_io_write_bytes_total", "io_write", "counter",
+     "Process I/O: bytes written to files, pipes and sockets (not network traffic)"),
+]
+
+
+def read_process(pid):
+    """
+    Raw counters of a running process from /proc, or None if it is gone or
+    /proc is unavailable: cpu_seconds, rss, peak_rss, threads, io_read,
+    io_write, sockets.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # comm alanı boşluk içerebilir; sayılar son parantezden sonra başlar
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+    except (OSError, IndexError, ValueError):
+        return None
+    if "VmRSS" not in status:
+        return None  # Zombi: çıkmış ama henüz beklenmemiş
+    ticks = os.sysconf("SC_CLK_TCK")
+    sample = {
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks,
+        "rss": int(status["VmRSS"].split()[0]) * 1024,
+        "peak_rss": int(status.get("VmHWM", "0 kB").split()[0]) * 1024,
+        "threads": int(status.get("Threads", "0")),
+        "io_read": None,
+        "io_write": None,
+        "sockets": None,
+    }
+    try:
+        with open(f"/proc/{pid}/io") as f:
+            io = dict(line.split(":", 1) for line in f if ":" in line)
+        sample["io_read"] = int(io["rchar"])
+        sample["io_write"] = int(io["wchar"])
+    except (OSError, KeyError, ValueError):
+        pass  # Başka kullanıcının işlemi veya io desteklemeyen çekirdek
+    try:
+        fd_dir = f"/proc/{pid}/fd"
+        sample["sockets"] = sum(1 for fd in os.listdir(fd_dir)
+                                if os.readlink(os.path.join(fd_dir, fd)).startswith("socket:"))
+    except OSError:
+        pass
+    return sample
+
+
+def summarize_by_kind(latest):
+    """Totals per process kind: {kind: {'count', 'cpu_percent', 'rss', 'io_read_rate'}}."""
+    totals = {}
+    for sample in latest.values():
+        total = totals.setdefault(sample["kind"], {"count": 0, "cpu_percent": 0.0, "rss": 0, "io_read_rate": 0.0})
+        total["count"] += 1
+        total["cpu_percent"] += sample["cpu_percent"] or 0.0
+        total["rss"] += sample["rss"]
+        total["io_read_rate"] += sample["io_read_rate"] or 0.0
+    return totals
+
+
+class _Tracked:
+    def __init__(self, name, kind, process, size):
+        self.name = name
+        self.kind = kind
+        self.process = process
+        self.samples = deque(maxlen=size)
+        self.previous = None  # (monotonic, raw counters)
+        self.ended_at = None  # duvar saati, işlem çıktığında
+
+
+class TelemetrySampler:
+    def __init__(self, interval=SAMPLE_INTERVAL, ring_size=RING_SIZE, prom_file=None,
+                 finished_ttl=FINISHED_TTL, finished_series=FINISHED_SERIES):
+        self.interval = interval
+        self.ring_size = ring_size
+        self._prom_file = prom_file
+        self.finished_ttl = finished_ttl
+        self.finished_series = finished_series
+        self.enabled = os.path.exists("/proc/self/stat")
+        self._tracked = {}  # name -> _Tracked
+        self._finished = OrderedDict()  # "name@YYYYmmdd-HHMMSS" -> _Tracked, eskiden yeniye
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._listeners = []
+
+    @property
+    def prom_file(self):
+        return self._prom_file or default_prom_file()
+
+    def add_listener(self, callback):
+        """callback(latest) after every sampling round; latest maps name -> last sample."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def track(self, name, process, kind):
+        """Sample `process` (a Popen) under `name` until it exits; replaces an older entry."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if name in self._tracked:
+                self._retire(self._tracked[name])
+            self._tracked[name] = _Tracked(name, kind, process, self.ring_size)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+
+    def untrack(self, name):
+        with self._lock:
+            entry = self._tracked.pop(name, None)
+            if entry:
+                self._retire(entry)
+
+    def _retire(self, entry):
+        """Keep the series of a process that is no longer tracked (lock held)."""
+        entry.ended_at = time.time()
+        if entry.samples:
+            key = f"{entry.name}@{time.strftime('%Y%m%d-%H%M%S', time.localtime(entry.ended_at))}"
+            self._finished[key] = entry
+            self._finished.move_to_end(key)
+        self._prune_finished()
+
+    def _prune_finished(self):
+        cutoff = time.time() - self.finished_ttl
+        while self._finished:
+            key, entry = next(iter(self._finished.items()))
+            if len(self._finished) <= self.finished_series and entry.ended_at >= cutoff:
+                break
+            del self._finished[key]
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._tracked:
+                    self._thread = None
+                    return
+                entries = list(self._tracked.values())
+            latest = {}
+            for entry in entries:
+                sample = self._sample(entry)
+                if sample is None:
+                    with self._lock:
+                        if self._tracked.get(entry.name) is entry:
+                            del self._tracked[entry.name]
+                            self._retire(entry)
+                elif sample["cpu_percent"] is not None:
+                    latest[entry.name] = sample
+            prom_file = self.prom_file
+            if prom_file:
+                self._write_prom_file(prom_file)
+            for callback in list(self._listeners):
+                try:
+                    callback(latest)
+                except Exception as e:
+                    tracer.event("telemetry.listener.error", f"Telemetri dinleyici hatası: {e}", level="error")
+            with self._lock:
+                self._wakeup.wait(self.interval)
+
+    def _sample(self, entry):
+        """Next sample of one process with rates computed from the previous counters."""
+        if entry.process.poll() is not None:
+            return None
+        raw = read_process(entry.process.pid)
+        if raw is None:
+            return None
+        now = time.monotonic()
+        sample = {"time": time.time(), "name": entry.name, "kind": entry.kind, "pid": entry.process.pid,
+                  "rss": raw["rss"], "peak_rss": raw["peak_rss"], "threads": raw["threads"],
+                  "sockets": raw["sockets"], "io_read": raw["io_read"], "io_write": raw["io_write"],
+                  "cpu_percent": None, "io_read_rate": None, "io_write_rate": None}
+        if entry.previous:
+            then, previous = entry.previous
+            elapsed = now - then
+            if elapsed > 0:
+                sample["cpu_percent"] = (raw["cpu_seconds"] - previous["cpu_seconds"]) / elapsed * 100
+                if raw["io_read"] is not None and previous["io_read"] is not None:
+                    sample["io_read_rate"] = (raw["io_read"] - previous["io_read"]) / elapsed
+                    sample["io_write_rate"] = (raw["io_write"] - previous["io_write"]) / elapsed
+        entry.previous = (now, raw)
+        # İlk örnek sadece referanstır, CPU oranı ikinci örnekten itibaren bilinir
+        if sample["cpu_percent"] is not None:
+            with self._lock:
+                entry.samples.append(sample)
+        return sample
+
+    def latest(self):
+        """Most recent sample of every tracked process."""
+        with self._lock:
+            return {name: entry.samples[-1] for name, entry in self._tracked.items() if entry.samples}
+
+    def history(self, name=None):
+        """
+        Ring buffer contents: a list for one process, or name -> list for all.
+        Exited processes appear as "name@YYYYmmdd-HHMMSS"; asking for the plain
+        name of a process that is no longer running returns its last series.
+        """
+        with self._lock:
+            self._prune_finished()
+            if name is not None:
+                entry = self._tracked.get(name) or self._finished.get(name)
+                if entry is None:
+                    finished = [e for e in self._finished.values() if e.name == name]
+                    entry = finished[-1] if finished else None
+                return list(entry.samples) if entry else []
+            series = {key: list(entry.samples) for key, entry in self._finished.items()}
+            series.update((n, list(entry.samples)) for n, entry in self._tracked.items())
+            return series
+
+    def finished(self):
+        """Summaries of the kept series of exited processes, newest last."""
+        with self._lock:
+            self._prune_finished()
+            entries = list(self._finished.items())
+        summaries = []
+        for key, entry in entries:
+            samples = list(entry.samples)
+            summaries.append({
+                "key": key, "name": entry.name, "kind": entry.kind, "ended_at": entry.ended_at,
+                "seconds": samples[-1]["time"] - samples[0]["time"],
+                "cpu_percent": sum(s["cpu_percent"] for s in samples) / len(samples),
+                "peak_rss": max(s["peak_rss"] for s in samples),
+            })
+        return summaries
+
+    def to_json(self, name=None):
+        return json.dumps(self.history(name), indent=2)
+
+    def to_prometheus(self):
+        """Latest samples in the Prometheus text exposition format."""
+        latest = self.latest()
+        lines = []
+        for metric, field, kind, help_text in PROMETHEUS_METRICS:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for sample in latest.values():
+                value = sample[field]
+                if value is not None:
+                    labels = f'name="{sample["name"]}",kind="{sample["kind"]}",pid="{sample["pid"]}"'
+                    lines.append(f"{metric}{{{labels}}} {value if isinstance(value, int) else f'{value:.3f}'}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write the ring buffers (.json) or the latest samples (.prom / anything else)."""
+        content = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _write_prom_file(self, path):
+        try:
+            self.export(path)
+        except OSError as e:
+            tracer.event("telemetry.export.error", f"Telemetri dosyası yazılamadı: {e}", level="error")
+
+
+telemetry = TelemetrySampler()
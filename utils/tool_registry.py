@@ -0,0 +1,133 @@
+"""
+Memoized registry of the external tools MeCast drives (adb, scrcpy, uxplay, ffmpeg, ffprobe).
+Each binary's path and version are resolved once and reused until PATH or
+the binary's mtime changes. The mtime is re-checked at most once per
+REVALIDATE_INTERVAL, so hot paths get a plain dictionary lookup.
+"""
+
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+
+# Windows'ta uxplay genellikle PATH dışında bu konumlardan birine kurulur
+UXPLAY_WINDOWS_PATHS = [
+    os.path.expanduser("~\\uxplay-windows\\uxplay.exe"),
+    "C:\\Program Files\\uxplay\\uxplay.exe",
+    "C:\\Program Files (x86)\\uxplay\\uxplay.exe",
+]
+
+# Arguments that make each tool print its version
+VERSION_ARGS = {
+    "adb": ["--version"],
+    "scrcpy": ["--version"],
+    "uxplay": ["-h"],
+    "ffmpeg": ["-version"],
+    "ffprobe": ["-version"],
+}
+
+
+class _ToolEntry:
+    def __init__(self, path, mtime, env_path):
+        self.path = path
+        self.mtime = mtime
+        self.env_path = env_path
+        self.checked_at = time.monotonic()
+        self.version = None
+        self.version_resolved = False
+
+
+class ToolRegistry:
+    REVALIDATE_INTERVAL = 30.0
+
+    def __init__(self):
+        self._entries = {}
+        self._candidates = {}
+        self._lock = threading.Lock()
+
+    def add_candidates(self, name, paths):
+        """Register fixed install locations checked before PATH."""
+        with self._lock:
+            self._candidates[name] = list(paths)
+            self._entries.pop(name, None)
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def which(self, name):
+        """Return the absolute path of `name`, or None if it is not installed."""
+        return self._entry(name).path
+
+    def is_available(self, name):
+        return self.which(name) is not None
+
+    def command(self, name):
+        """Executable to pass to subprocess: the resolved path, or the bare name."""
+        return self.which(name) or name
+
+    def version(self, name):
+        """Return the first line of the tool's version output (resolved once)."""
+        entry = self._entry(name)
+        if entry.path is None:
+            return None
+        with self._lock:
+            if entry.version_resolved:
+                return entry.version
+        version = self._read_version(name, entry.path)
+        with self._lock:
+            entry.version = version
+            entry.version_resolved = True
+        return version
+
+    def _entry(self, name):
+        env_path = os.environ.get("PATH", "")
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry and entry.env_path == env_path:
+                if now - entry.checked_at < self.REVALIDATE_INTERVAL:
+                    return entry
+                if entry.path and self._mtime(entry.path) == entry.mtime:
+                    entry.checked_at = now
+                    return entry
+
+            path = self._resolve(name)
+            entry = _ToolEntry(path, self._mtime(path) if path else None, env_path)
+            self._entries[name] = entry
+            return entry
+
+    def _resolve(self, name):
+        for candidate in self._candidates.get(name, []):
+            if os.path.exists(candidate):
+                return candidate
+        return shutil.which(name)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def _read_version(name, path):
+        try:
+            result = subprocess.run([path] + VERSION_ARGS.get(name, ["--version"]),
+                                    capture_output=True, text=True, timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        for line in (result.stdout + result.stderr).splitlines():
+            if line.strip():
+                return line.strip()
+        return None
+
+
+tool_registry = ToolRegistry()
+if platform.system().lower() == "windows":
+    tool_registry.add_candidates("uxplay", UXPLAY_WINDOWS_PATHS)
@@ -0,0 +1,277 @@
+"""
+Lightweight tracing for MeCast.
+A span times one stage (mDNS discovery, get_service_info, adb pair, adb
+connect, one address attempt, ...) and ends with an outcome such as "ok",
+"failed" or "timeout". Spans nest through a context variable; code that hands
+work to other threads passes the parent explicitly or runs the thread in a
+copied context. Finished spans and events are folded into per-stage
+duration histograms and handed to a background writer thread, which appends
+them to a local JSON-lines trace file through one open handle, so traced
+code never waits for the disk.
+
+Events replace ad-hoc prints: they are recorded in the trace and only echoed
+to the console when MECAST_TRACE_ECHO=1 is set (or tracer.echo is True).
+
+    python -m utils.tracing [trace.jsonl]      # duration histograms per stage
+"""
+
+import atexit
+import bisect
+import contextvars
+import itertools
+import json
+import os
+import queue
+import secrets
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from utils.system_utils import get_config_dir
+
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+# Süre kovaları (saniye); son kova bunların üstündeki her şeyi sayar
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+MAX_DURATIONS = 1000
+# Disk yetişemezse bundan sonraki kayıtlar bellekte birikmez, atılır
+MAX_PENDING_RECORDS = 10000
+
+_current_span = contextvars.ContextVar("mecast_span", default=None)
+
+
+def default_trace_path():
+    return os.environ.get("MECAST_TRACE_FILE") or os.path.join(get_config_dir(), "trace.jsonl")
+
+
+class Span:
+    def __init__(self, tracer, name, parent, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.id = tracer.next_id()
+        self.trace = parent.trace if parent else secrets.token_hex(8)
+        self.parent = parent.id if parent else None
+        self.attrs = attrs
+        self.start = time.time()
+        self.outcome = None
+        self.duration = None
+        self._started = time.monotonic()
+        self._token = None
+
+    @property
+    def ended(self):
+        return self.outcome is not None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self, outcome="ok", **attrs):
+        """Finish the span; later calls are ignored, so the first outcome wins."""
+        if self.ended:
+            return
+        self.duration = time.monotonic() - self._started
+        self.outcome = outcome
+        self.attrs.update(attrs)
+        self.tracer._finish(self)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.end("error", error=str(exc))
+        else:
+            self.end()
+        return False
+
+    def to_record(self):
+        return {"type": "span", "name": self.name, "trace": self.trace, "id": self.id, "parent": self.parent,
+                "start": self.start, "duration": self.duration, "outcome": self.outcome, "attrs": self.attrs}
+
+
+def summarize(records):
+    """Per span name: count, outcome counts, bucket counts, p50/p95/max (seconds)."""
+    durations = {}
+    outcomes = {}
+    for record in records:
+        if record.get("type") != "span":
+            continue
+        durations.setdefault(record["name"], []).append(record["duration"])
+        counts = outcomes.setdefault(record["name"], {})
+        counts[record["outcome"]] = counts.get(record["outcome"], 0) + 1
+    summary = {}
+    for name, values in durations.items():
+        buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for value in values:
+            buckets[bisect.bisect_left(HISTOGRAM_BUCKETS, value)] += 1
+        ordered = sorted(values)
+        summary[name] = {
+            "count": len(values),
+            "outcomes": outcomes[name],
+            "buckets": buckets,
+            "p50": statistics.median(ordered),
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+        }
+    return summary
+
+
+def format_summary(summary):
+    """Text table of summarize() output with one histogram row per stage."""
+    labels = [f"≤{b:g}s" for b in HISTOGRAM_BUCKETS] + [f">{HISTOGRAM_BUCKETS[-1]:g}s"]
+    lines = []
+    for name in sorted(summary):
+        stage = summary[name]
+        outcomes = ", ".join(f"{k}={v}" for k, v in sorted(stage["outcomes"].items()))
+        lines.append(f"{name}  n={stage['count']}  p50={stage['p50'] * 1000:.0f} ms  "
+                     f"p95={stage['p95'] * 1000:.0f} ms  max={stage['max'] * 1000:.0f} ms  ({outcomes})")
+        peak = max(stage["buckets"])
+        for label, count in zip(labels, stage["buckets"]):
+            if count:
+                lines.append(f"  {label:>7} {count:>5} {'#' * max(1, round(count / peak * 40))}")
+    return "\n".join(lines)
+
+
+def load_trace(path=None):
+    records = []
+    path = path or default_trace_path()
+    for candidate in (path + ".1", path):
+        try:
+            with open(candidate, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        pass  # Yarım yazılmış son satır
+        except OSError:
+            pass
+    return records
+
+
+class Tracer:
+    def __init__(self, path=None, echo=None):
+        self._path = path
+        self.echo = os.environ.get("MECAST_TRACE_ECHO") == "1" if echo is None else echo
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._durations = {}  # name -> deque of recent durations
+        self._outcomes = {}
+        self._queue = queue.Queue(maxsize=MAX_PENDING_RECORDS)
+        self._writer = None
+        self.dropped = 0
+
+    @property
+    def path(self):
+        if self._path is None:
+            self._path = default_trace_path()
+        return self._path
+
+    def next_id(self):
+        return next(self._ids)
+
+    def span(self, name, parent=None, **attrs):
+        """Start a span; use it as a context manager or call end() yourself."""
+        return Span(self, name, parent or _current_span.get(), attrs)
+
+    def event(self, name, message=None, level="info", parent=None, **attrs):
+        """Record a point-in-time event under the current (or given) span; the message is echoed if echo is on."""
+        parent = parent or _current_span.get()
+        record = {"type": "event", "name": name, "level": level, "time": time.time(),
+                  "trace": parent.trace if parent else None, "parent": parent.id if parent else None,
+                  "message": message, "attrs": attrs}
+        if self.echo and message:
+            print(message, file=sys.stderr if level == "error" else sys.stdout)
+        self._write(record)
+
+    def _finish(self, span):
+        with self._lock:
+            self._durations.setdefault(span.name, deque(maxlen=MAX_DURATIONS)).append(span.duration)
+            counts = self._outcomes.setdefault(span.name, {})
+            counts[span.outcome] = counts.get(span.outcome, 0) + 1
+        self._write(span.to_record())
+
+    def histograms(self):
+        """summarize() over the spans finished in this process."""
+        with self._lock:
+            records = [{"type": "span", "name": name, "duration": d, "outcome": None}
+                       for name, values in self._durations.items() for d in values]
+            outcomes = {name: dict(counts) for name, counts in self._outcomes.items()}
+        summary = summarize(records)
+        for name, stage in summary.items():
+            stage["outcomes"] = outcomes.get(name, {})
+        return summary
+
+    def _write(self, record):
+        """Queue a record for the writer thread; never blocks the caller."""
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        f = None
+        while True:
+            records = [self._queue.get()]
+            # Birikenler tek seferde yazılır, dosya her toplu yazımda bir kez flush edilir
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in records
+            try:
+                if f is None:
+                    f = open(self.path, "a", encoding="utf-8")
+                if f.tell() > TRACE_MAX_BYTES:
+                    f.close()
+                    f = None
+                    os.replace(self.path, self.path + ".1")
+                    f = open(self.path, "a", encoding="utf-8")
+                for record in records:
+                    if record is not None:
+                        f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+            except OSError:
+                # İz dosyası yazılamazsa uygulama etkilenmez; sonraki kayıtta yeniden denenir
+                if f is not None:
+                    f.close()
+                    f = None
+            if stop:
+                if f is not None:
+                    f.close()
+                return
+
+    def close(self, timeout=2.0):
+        """Write out queued records and stop the writer thread (called at exit)."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        writer.join(timeout)
+
+
+tracer = Tracer()
+atexit.register(tracer.close)
+
+
+def main(argv):
+    records = load_trace(argv[0] if argv else None)
+    if not records:
+        print("İz kaydı bulunamadı.")
+        return 1
+    print(format_summary(summarize(records)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
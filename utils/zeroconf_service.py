@@ -0,0 +1,116 @@
+"""
+Process-wide mDNS service for MeCast.
+One long-lived Zeroconf instance is shared by every pairing/connect flow.
+Each service type gets a single browser that stays warm after its first
+use; listeners attach and detach without tearing anything down, and a new
+listener is immediately told about services that are already known, so
+repeat pairings reuse the record cache instead of paying an mDNS cold start.
+zeroconf itself is imported on first use only.
+"""
+
+import threading
+
+PAIRING_SERVICE = "_adb-tls-pairing._tcp.local."
+CONNECT_SERVICE = "_adb-tls-connect._tcp.local."
+
+
+class _FanoutListener:
+    """Single listener per browser that forwards events to attached listeners."""
+
+    def __init__(self):
+        self.known = set()
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def add_service(self, zc, type_, name):
+        with self.lock:
+            self.known.add(name)
+            listeners = list(self.listeners)
+        for listener in listeners:
+            listener.add_service(zc, type_, name)
+
+    def update_service(self, zc, type_, name):
+        with self.lock:
+            self.known.add(name)
+            listeners = list(self.listeners)
+        for listener in listeners:
+            listener.update_service(zc, type_, name)
+
+    def remove_service(self, zc, type_, name):
+        with self.lock:
+            self.known.discard(name)
+            listeners = list(self.listeners)
+        for listener in listeners:
+            listener.remove_service(zc, type_, name)
+
+
+class ZeroconfService:
+    def __init__(self):
+        self._zeroconf = None
+        self._browsers = {}  # service type -> (ServiceBrowser, _FanoutListener)
+        self._lock = threading.Lock()
+
+    @property
+    def zeroconf(self):
+        with self._lock:
+            if self._zeroconf is None:
+                from zeroconf import Zeroconf
+                self._zeroconf = Zeroconf()
+            return self._zeroconf
+
+    def _fanout(self, type_):
+        zc = self.zeroconf
+        with self._lock:
+            if type_ not in self._browsers:
+                from zeroconf import ServiceBrowser
+                fanout = _FanoutListener()
+                self._browsers[type_] = (ServiceBrowser(zc, type_, fanout), fanout)
+            return self._browsers[type_][1]
+
+    def warm_up(self, *types):
+        """Start browsing the given service types ahead of time."""
+        for type_ in types:
+            self._fanout(type_)
+
+    def add_listener(self, type_, listener):
+        """
+        Attach a listener to the (warm) browser for `type_`. Services already
+        known are replayed to it right away.
+        """
+        fanout = self._fanout(type_)
+        with fanout.lock:
+            fanout.listeners.append(listener)
+            known = list(fanout.known)
+        for name in known:
+            listener.add_service(self.zeroconf, type_, name)
+
+    def remove_listener(self, type_, listener):
+        with self._lock:
+            entry = self._browsers.get(type_)
+        if entry:
+            fanout = entry[1]
+            with fanout.lock:
+                if listener in fanout.listeners:
+                    fanout.listeners.remove(listener)
+
+    def known_services(self, type_):
+        with self._lock:
+            entry = self._browsers.get(type_)
+        if not entry:
+            return []
+        with entry[1].lock:
+            return list(entry[1].known)
+
+    def shutdown(self):
+        """Cancel all browsers and close the shared instance (on application exit)."""
+        with self._lock:
+            browsers = list(self._browsers.values())
+            self._browsers.clear()
+            zc, self._zeroconf = self._zeroconf, None
+        for browser, _ in browsers:
+            browser.cancel()
+        if zc:
+            zc.close()
+
+
+zeroconf_service = ZeroconfService()